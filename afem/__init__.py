@@ -16,7 +16,3 @@
 # You should have received a copy of the GNU Lesser General Public
 # License along with this library; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
-import warnings
-
-# Always show warnings (maybe put them in the log?)
-warnings.simplefilter('always', Warning)
@@ -16,6 +16,8 @@
 # You should have received a copy of the GNU Lesser General Public
 # License along with this library; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+from threading import current_thread
+
 from OCCT.Adaptor3d import Adaptor3d_Curve, Adaptor3d_Surface
 from OCCT.BRepAdaptor import (BRepAdaptor_Curve, BRepAdaptor_CompCurve,
                               BRepAdaptor_Surface)
@@ -34,10 +36,19 @@ class AdaptorBase(object):
     :param obj: The underlying OpenCASCADE type.
     :type obj: OCCT.Adaptor3d.Adaptor3d_Curve or
         OCCT.Adaptor3d.Adaptor3d_Surface
+
+    :cvar bool use_cache: Option to cache adaptors on the geometry or shape
+        they are created from so that repeated conversions of the same
+        entity reuse one adaptor. Adaptors are cached per thread since
+        evaluating an adaptor is not thread safe. The cache is cleared when
+        the entity is modified (see :meth:`.Geometry.invalidate` and
+        :meth:`.Shape.invalidate`).
     """
     # Expected type
     _OCC_TYPE = None
 
+    use_cache = True
+
     def __init__(self, obj):
         if not isinstance(obj, self._OCC_TYPE):
             n1 = self._OCC_TYPE.__name__
@@ -47,6 +58,20 @@ class AdaptorBase(object):
             raise TypeError(msg)
         self._object = obj
 
+    @classmethod
+    def _cached(cls, entity, key, build):
+        """
+        Get the adaptor cached on the entity or build and cache a new one.
+        """
+        if not cls.use_cache:
+            return cls(build())
+        key = ('adaptor', cls.__name__, key, current_thread().ident)
+        adp = entity._cache.get(key)
+        if adp is None:
+            adp = cls(build())
+            entity._cache[key] = adp
+        return adp
+
 
 class AdaptorCurve(AdaptorBase):
     """
@@ -219,10 +244,10 @@ class GeomAdaptorCurve(AdaptorCurve):
         """
         if None not in [u1, u2]:
             adp_crv = GeomAdaptor_Curve(curve.object, u1, u2)
-        else:
-            adp_crv = GeomAdaptor_Curve(curve.object)
+            return cls(adp_crv)
 
-        return cls(adp_crv)
+        return cls._cached(curve, None,
+                           lambda: GeomAdaptor_Curve(curve.object))
 
 
 class EdgeAdaptorCurve(AdaptorCurve):
@@ -244,9 +269,9 @@ class EdgeAdaptorCurve(AdaptorCurve):
         :rtype: afem.adaptor.entities.EdgeAdaptorCurve
         """
         if face is None:
-            adp_crv = BRepAdaptor_Curve(edge.object)
-        else:
-            adp_crv = BRepAdaptor_Curve(edge.object, face.object)
+            return cls._cached(edge, None,
+                               lambda: BRepAdaptor_Curve(edge.object))
+        adp_crv = BRepAdaptor_Curve(edge.object, face.object)
         return cls(adp_crv)
 
 
@@ -269,8 +294,9 @@ class WireAdaptorCurve(AdaptorCurve):
         :return: The adaptor curve.
         :rtype: afem.adaptor.entities.WireAdaptorCurve
         """
-        adp_crv = BRepAdaptor_CompCurve(wire.object, curvilinear_knots)
-        return cls(adp_crv)
+        return cls._cached(wire, curvilinear_knots,
+                           lambda: BRepAdaptor_CompCurve(wire.object,
+                                                         curvilinear_knots))
 
 
 class AdaptorSurface(AdaptorBase):
@@ -435,10 +461,10 @@ class GeomAdaptorSurface(AdaptorSurface):
         if None not in [u1, u2, v1, v2]:
             adp_srf = GeomAdaptor_Surface(surface.object, u1, u2, v1, v2,
                                           tolu, tolv)
-        else:
-            adp_srf = GeomAdaptor_Surface(surface.object)
+            return cls(adp_srf)
 
-        return cls(adp_srf)
+        return cls._cached(surface, None,
+                           lambda: GeomAdaptor_Surface(surface.object))
 
 
 class FaceAdaptorSurface(AdaptorSurface):
@@ -460,5 +486,5 @@ class FaceAdaptorSurface(AdaptorSurface):
         :return: The adaptor surface.
         :rtype: afem.adaptor.entities.FaceAdaptorSurface
         """
-        adp_srf = BRepAdaptor_Surface(face.object, restrict)
-        return cls(adp_srf)
+        return cls._cached(face, restrict,
+                           lambda: BRepAdaptor_Surface(face.object, restrict))
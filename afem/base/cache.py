@@ -0,0 +1,362 @@
+# This file is part of AFEM which provides an engineering toolkit for airframe
+# finite element modeling during conceptual design.
+#
+# Copyright (C) 2016-2018  Laughlin Research, LLC (info@laughlinresearch.com)
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+import atexit
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict, defaultdict
+from functools import wraps
+
+from afem.config import logger
+
+__all__ = ["ShapeCache", "PropertyCache", "memoized_property"]
+
+
+class ShapeCache(object):
+    """
+    Least recently used (LRU) budget for shapes held in memory by parts and
+    other shape holders. When a budget is set, each evictable shape holder is
+    tracked when its shape is accessed and the least recently used shapes
+    are unloaded (i.e., spilled to a BREP file on disk) once the number of
+    loaded shapes exceeds the budget. Unloaded shapes are loaded again on
+    first access.
+
+    Eviction is opt-in. A shape loaded again is a new shape that no longer
+    shares sub-shapes with its neighbors, so only shapes made evictable
+    using :meth:`.ShapeHolder.set_evictable` (or
+    :meth:`afem.structure.group.Group.set_evictable`, which checks that the
+    parts are independent and not meshed) are tracked.
+
+    Usage:
+
+    >>> from afem.base.cache import ShapeCache
+    >>> from afem.structure import GroupAPI
+    >>> ShapeCache.set_budget(200)
+    >>> ShapeCache.set_spill_dir('./spill')
+    >>> GroupAPI.get_group('fittings').set_evictable()
+    """
+    _budget = None
+    _loaded = OrderedDict()
+    _lock = threading.RLock()
+    _spill_dir = None
+    _tmp_dir = None
+    _count = 0
+    binary = True
+
+    @classmethod
+    def enabled(cls):
+        """
+        :return: *True* if a budget is set, *False* if not.
+        :rtype: bool
+        """
+        return cls._budget is not None
+
+    @classmethod
+    def budget(cls):
+        """
+        :return: The maximum number of loaded shapes or *None* if no budget
+            is set.
+        :rtype: int or None
+        """
+        return cls._budget
+
+    @classmethod
+    def set_budget(cls, nshapes):
+        """
+        Set the maximum number of shapes to keep loaded.
+
+        :param nshapes: The number of shapes. If *None* then the budget is
+            removed and shapes are no longer unloaded automatically.
+        :type nshapes: int or None
+
+        :return: None.
+
+        :raise ValueError: If the number of shapes is less than one.
+        """
+        if nshapes is None:
+            with cls._lock:
+                cls._budget = None
+                cls._loaded.clear()
+            return None
+
+        nshapes = int(nshapes)
+        if nshapes < 1:
+            raise ValueError('The budget must be at least one shape.')
+        with cls._lock:
+            cls._budget = nshapes
+        cls._evict()
+
+    @classmethod
+    def nloaded(cls):
+        """
+        :return: The number of tracked shapes currently loaded.
+        :rtype: int
+        """
+        return len(cls._loaded)
+
+    @classmethod
+    def set_spill_dir(cls, path):
+        """
+        Set the directory that unloaded shapes are written to. If not set, a
+        temporary directory is used and removed when Python exits.
+
+        :param path: The directory. If *None* then a temporary directory is
+            used.
+        :type path: str or None
+
+        :return: None.
+        """
+        if path is not None and not os.path.isdir(path):
+            os.makedirs(path)
+        cls._spill_dir = path
+
+    @classmethod
+    def spill_file(cls):
+        """
+        Get a new file name in the spill directory.
+
+        :return: The file name.
+        :rtype: str
+        """
+        with cls._lock:
+            path = cls._spill_dir
+            if path is None:
+                if cls._tmp_dir is None:
+                    cls._tmp_dir = tempfile.mkdtemp(prefix='afem_spill_')
+                    atexit.register(shutil.rmtree, cls._tmp_dir, True)
+                path = cls._tmp_dir
+            cls._count += 1
+            n = cls._count
+        ext = '.bbrep' if cls.binary else '.brep'
+        return os.path.join(path, ''.join(['shape', str(n), ext]))
+
+    @classmethod
+    def touch(cls, holder):
+        """
+        Mark the shape of the holder as most recently used and unload the
+        least recently used shapes if over budget.
+
+        :param afem.base.entities.ShapeHolder holder: The shape holder.
+
+        :return: None.
+        """
+        key = id(holder)
+        with cls._lock:
+            if key in cls._loaded:
+                cls._loaded.move_to_end(key)
+                return None
+            cls._loaded[key] = weakref.ref(holder)
+        cls._evict(holder)
+
+    @classmethod
+    def discard(cls, holder):
+        """
+        Stop tracking the holder.
+
+        :param afem.base.entities.ShapeHolder holder: The shape holder.
+
+        :return: None.
+        """
+        with cls._lock:
+            cls._loaded.pop(id(holder), None)
+
+    @classmethod
+    def _evict(cls, keep=None):
+        """
+        Unload the least recently used shapes until within budget.
+        """
+        while True:
+            with cls._lock:
+                if cls._budget is None or len(cls._loaded) <= cls._budget:
+                    return None
+                key, ref = next(iter(cls._loaded.items()))
+                holder = ref()
+                if holder is keep:
+                    # Never unload the shape being accessed
+                    cls._loaded.move_to_end(key)
+                    if len(cls._loaded) == 1:
+                        return None
+                    continue
+                del cls._loaded[key]
+            if holder is not None:
+                holder.unload()
+                logger.debug('Unloaded shape to stay within budget.')
+
+
+class PropertyCache(object):
+    """
+    Statistics and settings for memoized properties of geometry and shapes
+    (e.g., *Curve.length*, *Shape.area*, and *Shape.tol_max*). Each value is
+    stored on the instance and cleared when the instance is modified.
+
+    Tolerances of shapes may be changed in place by tools like Boolean
+    operations and shape fixing, so these tools clear the memoized
+    tolerances of the shapes they were given using
+    :meth:`tolerance_changed`. Memoized tolerances are also tied to a global
+    version which is increased if no shapes are given.
+
+    Usage:
+
+    >>> from afem.base.cache import PropertyCache
+    >>> PropertyCache.reset_stats()
+    >>> # Run the model
+    >>> PropertyCache.print_stats()
+    """
+    enabled = True
+    _hits = defaultdict(int)
+    _misses = defaultdict(int)
+    _tol_version = 0
+    _tol_keys = set()
+
+    @classmethod
+    def set_enabled(cls, enabled=True):
+        """
+        Enable or disable memoization. When disabled, values are computed
+        on every access.
+
+        :param bool enabled: The option.
+
+        :return: None.
+        """
+        cls.enabled = bool(enabled)
+
+    @classmethod
+    def tolerance_version(cls):
+        """
+        :return: The current tolerance version.
+        :rtype: int
+        """
+        return cls._tol_version
+
+    @classmethod
+    def tolerance_changed(cls, *shapes):
+        """
+        Invalidate memoized tolerances.
+
+        :param afem.topology.entities.Shape shapes: The shapes whose
+            tolerances may have changed. If none are given then all memoized
+            tolerances are invalidated.
+
+        :return: None.
+
+        .. note::
+
+            Only the memoized values of the given shape instances are cleared.
+            Pass all the shapes a tool was given, or none if it may have
+            changed shapes it was not given.
+        """
+        if not shapes:
+            cls._tol_version += 1
+            return None
+
+        for shape in shapes:
+            cache = shape._cache
+            for key in cls._tol_keys:
+                cache.pop(key, None)
+
+    @classmethod
+    def stats(cls):
+        """
+        Get the number of hits and misses of each property.
+
+        :return: Dictionary where the key is the property name and the value
+            is a tuple of (hits, misses).
+        :rtype: dict
+        """
+        names = set(cls._hits) | set(cls._misses)
+        return dict((name, (cls._hits[name], cls._misses[name])) for name in
+                    names)
+
+    @classmethod
+    def reset_stats(cls):
+        """
+        Reset the hit and miss counters.
+
+        :return: None.
+        """
+        cls._hits.clear()
+        cls._misses.clear()
+
+    @classmethod
+    def format_stats(cls):
+        """
+        Format the hit and miss counters as a table.
+
+        :return: The table.
+        :rtype: str
+        """
+        lines = ['{:<28s}{:>10s}{:>10s}{:>8s}'.format('property', 'hits',
+                                                       'misses', 'rate')]
+        for name, (hits, misses) in sorted(cls.stats().items()):
+            rate = hits / float(hits + misses) if hits + misses else 0.
+            lines.append('{:<28s}{:>10d}{:>10d}{:>8.1%}'.format(
+                name, hits, misses, rate))
+        return '\n'.join(lines)
+
+    @classmethod
+    def print_stats(cls):
+        """
+        Print the hit and miss counters.
+
+        :return: None.
+        """
+        print(cls.format_stats())
+
+
+def memoized_property(fget=None, tolerance=False):
+    """
+    Decorator for a read-only property whose value is stored in the
+    *_cache* dictionary of the instance after the first access. The value is
+    recomputed after the cache is cleared (e.g., by *invalidate()*).
+
+    :param fget: The getter.
+    :param bool tolerance: Option to recompute the value if the tolerance
+        version of :class:`.PropertyCache` has changed.
+
+    :return: The property.
+    :rtype: property
+    """
+    if fget is None:
+        return lambda f: memoized_property(f, tolerance)
+
+    name = fget.__name__
+    label = getattr(fget, '__qualname__', name)
+    key = ('memoized', name)
+    if tolerance:
+        PropertyCache._tol_keys.add(key)
+
+    @wraps(fget)
+    def getter(self):
+        if not PropertyCache.enabled:
+            return fget(self)
+
+        version = PropertyCache._tol_version if tolerance else None
+        entry = self._cache.get(key)
+        if entry is not None and entry[0] == version:
+            PropertyCache._hits[label] += 1
+            return entry[1]
+
+        PropertyCache._misses[label] += 1
+        value = fget(self)
+        self._cache[key] = (version, value)
+        return value
+
+    return property(getter)
@@ -21,6 +21,7 @@ from collections import Sequence
 from OCCT.Quantity import Quantity_TOC_RGB, Quantity_Color
 from numpy.random import rand
 
+from afem.base.cache import ShapeCache
 from afem.config import logger
 
 __all__ = ["Metadata", "NamedItem", "ViewableItem", "ShapeHolder"]
@@ -169,6 +170,23 @@ class ShapeHolder(ViewableItem):
     :type expected_type: Type[afem.topology.entities.Shape] or
         tuple(Type[afem.topology.entities.Shape])
     :param afem.topology.entities.Shape shape: The shape.
+
+    .. note::
+
+        The shape may be loaded lazily. If a loader is set using
+        :meth:`set_shape_loader` then it is called to get the shape the first
+        time the shape is needed. The shape can be released from memory
+        using :meth:`unload` and will be loaded again when needed. A loaded
+        shape is a new shape, so it is no longer the same as any sub-shapes
+        it shared with other shapes. For this reason, shapes are only
+        unloaded automatically by :class:`.ShapeCache` if they are made
+        evictable using :meth:`set_evictable`, and pinned shapes (e.g., those
+        used in a mesh) are never unloaded.
+
+        Changes to the shape are tracked using :attr:`shape_revision`, which
+        is increased each time the shape is set. Tools like
+        :class:`afem.structure.mesh.IncrementalMesh` use it to find what
+        changed since they last ran.
     """
 
     def __init__(self, expected_type, shape=None):
@@ -177,10 +195,49 @@ class ShapeHolder(ViewableItem):
             self._types = expected_type
         else:
             self._types = (expected_type,)
-        self._shape = None
+        self._shape_data = None
+        self._loader = None
+        self._source = None
+        self._shape_rev = 0
+        self._evictable = False
+        self._pinned = False
         if shape is not None:
             self.set_shape(shape)
 
+    @property
+    def _shape(self):
+        if self._loader is not None:
+            self._load_shape()
+        # The shape may be modified in place once it is handed out so it
+        # can no longer be reloaded from its source
+        self._source = None
+        if self._evictable and ShapeCache.enabled() and \
+                self._shape_data is not None:
+            ShapeCache.touch(self)
+        return self._shape_data
+
+    @_shape.setter
+    def _shape(self, shape):
+        # A new shape no longer matches any file it was loaded from
+        self._shape_data = shape
+        self._loader = None
+        self._source = None
+        self._shape_rev += 1
+
+    def _load_shape(self):
+        """
+        Call the loader to get the shape.
+        """
+        loader = self._loader
+        if loader is None:
+            return None
+        shape = loader()
+        # Another thread may have loaded or set the shape meanwhile
+        if self._loader is loader:
+            self._shape_data = shape
+            self._loader = None
+            self._source = loader
+
     @property
     def shape(self):
         """
@@ -190,6 +247,145 @@ class ShapeHolder(ViewableItem):
         """
         return self._shape
 
+    @property
+    def is_loaded(self):
+        """
+        :return: *False* if the shape has a loader that has not been called
+            yet, *True* otherwise.
+        :rtype: bool
+        """
+        return self._loader is None
+
+    @property
+    def loaded_shape(self):
+        """
+        :return: The shape if it is loaded, *None* otherwise. Unlike
+            :attr:`shape`, this does not load the shape or keep it from being
+            loaded again from its source, so it should only be read.
+        :rtype: afem.topology.entities.Shape or None
+        """
+        if self._loader is not None:
+            return None
+        return self._shape_data
+
+    @property
+    def is_evictable(self):
+        """
+        :return: *True* if the shape can be unloaded automatically by
+            :class:`.ShapeCache`, *False* if not.
+        :rtype: bool
+        """
+        return self._evictable
+
+    @property
+    def is_pinned(self):
+        """
+        :return: *True* if the shape is pinned in memory, *False* if not.
+        :rtype: bool
+        """
+        return self._pinned
+
+    @property
+    def shape_revision(self):
+        """
+        :return: The number of times the shape has been set. Loading or
+            unloading the shape does not change it.
+        :rtype: int
+        """
+        return self._shape_rev
+
+    def set_shape_loader(self, loader):
+        """
+        Set a loader for the shape. The current shape is released and the
+        loader is called to get the shape the first time it is needed.
+
+        :param loader: A callable with no arguments that returns the shape.
+
+        :return: None.
+        """
+        ShapeCache.discard(self)
+        self._shape_data = None
+        self._loader = loader
+        self._source = loader
+
+    def load_shape(self):
+        """
+        Load the shape now if it is not loaded.
+
+        :return: None.
+        """
+        if self._loader is not None:
+            self._load_shape()
+        if self._evictable and ShapeCache.enabled() and \
+                self._shape_data is not None:
+            ShapeCache.touch(self)
+
+    def set_evictable(self, evictable=True):
+        """
+        Set whether the shape can be unloaded automatically by
+        :class:`.ShapeCache`. Only make a shape evictable if it does not
+        share sub-shapes with other shapes and is not used by a mesh or
+        Boolean history, since it is no longer the same shape once it is
+        loaded again.
+
+        :param bool evictable: The option.
+
+        :return: None.
+
+        :raise RuntimeError: If the shape is pinned.
+        """
+        if evictable and self._pinned:
+            raise RuntimeError('A pinned shape cannot be made evictable.')
+        self._evictable = bool(evictable)
+        if not self._evictable:
+            ShapeCache.discard(self)
+
+    def pin(self):
+        """
+        Pin the shape in memory so it is never unloaded (e.g., because it is
+        used in a mesh). The shape is no longer evictable.
+
+        :return: None.
+        """
+        self._pinned = True
+        self.set_evictable(False)
+
+    def unpin(self):
+        """
+        Unpin the shape so it can be unloaded again (e.g., once the mesh that
+        used it is released). The shape is not made evictable.
+
+        :return: None.
+        """
+        self._pinned = False
+
+    def unload(self):
+        """
+        Release the shape from memory. If the shape was loaded from a file
+        (e.g., a model archive) and has not been accessed since, it will be
+        loaded from there again. Otherwise it is spilled to a BREP file in the
+        directory given by :class:`.ShapeCache` since it may have been
+        modified in place. The shape is loaded again on first access.
+
+        :return: *True* if the shape is unloaded, *False* if there is no
+            shape or it is pinned.
+        :rtype: bool
+        """
+        if self._loader is not None:
+            return True
+        shape = self._shape_data
+        if shape is None or self._pinned:
+            return False
+
+        if self._source is None:
+            fn = ShapeCache.spill_file()
+            self._source = _SpillLoader(shape, fn, ShapeCache.binary)
+
+        ShapeCache.discard(self)
+        self._shape_data = None
+        self._loader = self._source
+        return True
+
     @shape.setter
     def shape(self, shape):
         self.set_shape(shape)
@@ -229,4 +425,25 @@ class ShapeHolder(ViewableItem):
                                                       expected))
             logger.warning(msg)
 
+        # Setting the same shape again means it was modified in place
+        if shape is self._shape_data:
+            shape.invalidate()
         self._shape = shape
+
+
+class _SpillLoader(object):
+    """
+    Write a shape to a BREP file and load it from there when called.
+    """
+
+    def __init__(self, shape, fn, binary):
+        from afem.exchange.brep import has_bintools, write_brep
+
+        self.fn = fn
+        self.binary = binary and has_bintools
+        write_brep(shape, fn, self.binary)
+
+    def __call__(self):
+        from afem.exchange.brep import read_brep
+
+        return read_brep(self.fn, self.binary)
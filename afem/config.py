@@ -19,17 +19,12 @@
 import logging
 import sys
 
-# Initialize logger.
-with open('afem.log', 'w') as log:
-    log.write('-----------------------------\n')
-    log.write('AFEM LOGGING FILE INITIALIZED\n')
-    log.write('-----------------------------\n')
+# Initialize logger. Nothing is written unless a handler is added (e.g., using
+# Settings.log_to_file() or Settings.log_to_console()).
 logger = logging.getLogger('afem')
 logger.setLevel(logging.INFO)
-_fh = logging.FileHandler('afem.log')
+logger.addHandler(logging.NullHandler())
 _fmt = logging.Formatter('%(levelname)s: %(message)s')
-_fh.setFormatter(_fmt)
-logger.addHandler(_fh)
 
 # Dictionary for units
 units_dict = {'i': 'INCH',
@@ -80,10 +75,30 @@ class Settings(object):
         units = units.lower()
         cls.units = units_dict[units]
 
+    @staticmethod
+    def log_to_file(fn='afem.log', mode='w'):
+        """
+        Option to add a file handler to the main logger.
+
+        :param str fn: The filename.
+        :param str mode: The file mode. Use 'w' to start a new file and 'a'
+            to append to an existing file.
+
+        :return: None.
+        """
+        if mode == 'w':
+            with open(fn, 'w') as log:
+                log.write('-----------------------------\n')
+                log.write('AFEM LOGGING FILE INITIALIZED\n')
+                log.write('-----------------------------\n')
+        fhdlr = logging.FileHandler(fn, 'a')
+        fhdlr.setFormatter(_fmt)
+        logger.addHandler(fhdlr)
+
     @staticmethod
     def log_to_console():
         """
-        Option to add a stream handler to the main file logger to log to
+        Option to add a stream handler to the main logger to log to
         stdout.
 
         :return: None.
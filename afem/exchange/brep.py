@@ -22,30 +22,57 @@ from OCCT.TopoDS import TopoDS_Shape
 
 from afem.topology.entities import Shape
 
+try:
+    from OCCT.BinTools import BinTools
 
-def write_brep(shape, fn):
+    has_bintools = True
+except ImportError:
+    has_bintools = False
+
+
+def write_brep(shape, fn, binary=False):
     """
     Write a BREP file using the shape.
 
     :param afem.topology.entities.Shape shape: The shape.
     :param str fn: The filename.
+    :param bool binary: Option to write a binary BREP file. Binary files
+        are smaller and much faster to read and write.
 
     :return: None.
+
+    :raise NotImplementedError: If a binary file is requested but BinTools
+        is not available.
     """
-    BRepTools.Write_(shape.object, fn)
+    if not binary:
+        BRepTools.Write_(shape.object, fn)
+        return None
 
+    if not has_bintools:
+        raise NotImplementedError('BinTools not available.')
+    BinTools.Write_(shape.object, fn)
 
-def read_brep(fn):
+
+def read_brep(fn, binary=False):
     """
     Read a BREP file and return the shape.
 
     :param str fn: The filename.
+    :param bool binary: Option to read a binary BREP file.
 
     :return: The shape.
     :rtype: afem.topology.entities.Shape
+
+    :raise NotImplementedError: If a binary file is requested but BinTools
+        is not available.
     """
     shape = TopoDS_Shape()
-    builder = BRep_Builder()
-    BRepTools.Read_(shape, fn, builder)
+    if not binary:
+        builder = BRep_Builder()
+        BRepTools.Read_(shape, fn, builder)
+        return Shape.wrap(shape)
 
+    if not has_bintools:
+        raise NotImplementedError('BinTools not available.')
+    BinTools.Read_(shape, fn)
     return Shape.wrap(shape)
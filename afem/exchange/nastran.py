@@ -24,7 +24,10 @@ def export_bdf(the_mesh, fn):
     Export groups of parts to Nastran bulk data format (only nodes and
     elements). Dummy materials and properties are applied to enable import into
     some pre-processors. Intended for development and debugging. Only supports
-    tri and quad elements for now.
+    tri and quad elements for now. If the nodes or elements have been
+    renumbered using an ordering or ID ranges (see
+    :meth:`afem.smesh.meshes.MeshDS.renumber_nodes`), the new ID's are
+    written.
 
     :param afem.smesh.meshes.Mesh the_mesh: The mesh.
     :param str fn: The filename.
@@ -53,11 +56,14 @@ def export_bdf(the_mesh, fn):
     _write_field(1., fout)
     fout.write('\n')
 
-    # Write grids.
-    for node in the_mesh.ds.node_iter:
+    # Write grids using the new ID's if the nodes have been renumbered
+    ds = the_mesh.ds
+    nodes = [(ds.mapped_node_id(node.id), node) for node in ds.node_iter]
+    nodes.sort(key=lambda data: data[0])
+    for nid, node in nodes:
         fout.write("%-8s" % "GRID")
         # ID
-        _write_field(node.id, fout)
+        _write_field(nid, fout)
         # CP
         _write_field(None, fout)
         # X1
@@ -71,7 +77,7 @@ def export_bdf(the_mesh, fn):
         fout.write('\n')
 
     # Write elements.
-    for elm in the_mesh.ds.faces_iter:
+    for elm in ds.faces_iter:
         if elm.is_tri:
             fout.write("%-8s" % "CTRIA3")
         elif elm.is_quad:
@@ -79,11 +85,11 @@ def export_bdf(the_mesh, fn):
         else:
             continue
         # EID
-        _write_field(elm.id, fout)
+        _write_field(ds.mapped_elm_id(elm.id), fout)
         # PID
         _write_field(1, fout)
         for nid in elm.nids:
-            _write_field(nid, fout)
+            _write_field(ds.mapped_node_id(nid), fout)
         fout.write('\n')
 
     fout.write("ENDDATA")
@@ -26,6 +26,7 @@ from OCCT.TCollection import TCollection_HAsciiString
 
 from afem.config import Settings, units_dict
 from afem.topology.entities import Shape
+from afem.topology.transform import rigid_instance
 
 __all__ = ["StepWrite", "StepRead"]
 
@@ -52,11 +53,21 @@ class StepWrite(object):
         * 2(auto): Writes shapes having a structure of (possibly nested)
           compounds in the form of STEP assemblies, single shapes are written
           without assembly structures.
+
+        When writing assemblies, instances that share the same underlying
+        shape (see :func:`afem.topology.transform.transform_shape`) are
+        written once and referenced by each instance. STEP cannot store
+        reflections so a reflected instance is transferred as a rigid
+        placement of a mirrored prototype (see
+        :func:`afem.topology.transform.rigid_instance`). The mirrored
+        prototype is shared by all reflected instances of the same shape, so
+        it is written once in addition to the original shape.
     """
 
     def __init__(self, schema='AP203', units=None, product_name=None,
                  assembly_mode=None):
         self._writer = STEPControl_Writer()
+        self._prototypes = {}
         self._fp = self._writer.WS().TransferWriter().FinderProcess()
         Interface_Static.SetCVal_('write.step.schema', schema)
 
@@ -94,6 +105,7 @@ class StepWrite(object):
             shape = Shape.to_shape(shape)
             if not shape:
                 continue
+            shape = rigid_instance(shape, self._prototypes)
             status = self._writer.Transfer(shape.object, STEPControl_AsIs)
             if int(status) < int(IFSelect_RetError):
                 added_shape = True
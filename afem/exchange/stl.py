@@ -18,6 +18,8 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
 from OCCT.StlAPI import StlAPI_Writer
 
+from afem.topology.tessellate import TessellateShapes
+
 __all__ = ["StlWrite"]
 
 
@@ -29,13 +31,18 @@ class StlWrite(StlAPI_Writer):
     def __init__(self):
         super(StlWrite, self).__init__()
 
-    def write(self, shape, fn):
+    def write(self, shape, fn, deflection=None):
         """
-        Converts shape to STL format and writes to a file.
+        Converts shape to STL format and writes to a file. The shape is
+        tessellated using :class:`afem.topology.tessellate.TessellateShapes`
+        unless it already has a fine enough triangulation.
         
         :param afem.topology.entities.Shape shape: The shape.
         :param str fn: The filename.
+        :param float deflection: The linear deflection. If not provided then
+            a value relative to the size of the shape is used.
          
         :return: None.
         """
+        TessellateShapes(shape, deflection)
         self.Write(shape.object, fn)
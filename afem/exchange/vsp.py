@@ -17,12 +17,15 @@
 # License along with this library; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
 import json
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
 
 from OCCT.BRepBuilderAPI import (BRepBuilderAPI_MakeFace,
                                  BRepBuilderAPI_MakeWire)
 from OCCT.GCPnts import GCPnts_QuasiUniformDeflection
 from OCCT.ShapeFix import ShapeFix_Wire
 from OCCT.ShapeUpgrade import ShapeUpgrade_SplitSurface
+from numpy import array, float64, full
 
 from afem.adaptor.entities import AdaptorCurve
 from afem.config import logger
@@ -31,7 +34,7 @@ from afem.exchange.xde import XdeDocument
 from afem.geometry import utils as geom_utils
 from afem.geometry.create import (PointFromParameter, NurbsSurfaceByInterp,
                                   NurbsCurveByPoints, NurbsCurveByApprox)
-from afem.geometry.entities import Geometry
+from afem.geometry.entities import Geometry, NurbsSurface
 from afem.occ import utils as occ_utils
 from afem.oml.entities import Body
 from afem.topology.check import CheckShape
@@ -64,18 +67,22 @@ class ImportVSP(object):
         surface. This method is experimental.
     :param float tol: Tolerance for approximation if *bspline_restrict* or
         *reloft* is *True*.
+    :param int nthreads: Number of threads used to process wing components.
+        If only one wing is found then the threads are used to reloft its
+        sections instead. If *None* then the number of CPUs is used.
 
     :raise TypeError: If a file is provided but the extension is not recognized
         or supported.
     """
 
     def __init__(self, fn=None, divide_closed=True, bspline_restrict=False,
-                 reloft=False, tol=0.01):
+                 reloft=False, tol=0.01, nthreads=1):
         self._bodies = {}
         self._divide = divide_closed
         self._restrict = bspline_restrict
         self._reloft = reloft
         self._tol = tol
+        self._nthreads = nthreads
         self._invalid = []
 
         if fn is not None:
@@ -171,6 +178,10 @@ class ImportVSP(object):
         href_surfs = {}
         vref_surfs = {}
 
+        # Wing components are processed after all components are found so
+        # they can be processed concurrently
+        wing_tasks = []
+
         # Read STEP file
         step_reader = StepRead(fn)
         master_shape = step_reader.shape
@@ -238,14 +249,9 @@ class ImportVSP(object):
 
             # Wing
             if metadata['m_Type'] == 5 and metadata['m_SurfType'] != 99:
-                wing, invalid = _process_wing(compound, self._divide,
-                                              self._restrict, self._tol,
-                                              self._reloft, comp_name)
-                self._invalid += invalid
-                if wing is not None:
-                    bodies[comp_name] = wing
-                    sref_id = metadata['Sref ID']
-                    wing_bodies[sref_id] = wing
+                # Reserve the name to keep the order of the bodies
+                bodies[comp_name] = None
+                wing_tasks.append((compound, comp_name, metadata['Sref ID']))
 
             # Fuselage
             elif metadata['m_Type'] in [4, 9]:
@@ -265,6 +271,16 @@ class ImportVSP(object):
                     body = Body(solid, comp_name)
                     bodies[comp_name] = body
 
+        # Process wings
+        for (_, comp_name, sref_id), (wing, invalid) in zip(
+                wing_tasks, self._process_wings(wing_tasks)):
+            self._invalid += invalid
+            if wing is not None:
+                bodies[comp_name] = wing
+                wing_bodies[sref_id] = wing
+            else:
+                del bodies[comp_name]
+
         # Attach wing reference surfaces to the bodies.
         for sref_id in wing_bodies:
             if sref_id not in ref_surfs:
@@ -287,6 +303,34 @@ class ImportVSP(object):
         # Update
         self._bodies.update(bodies)
 
+    def _process_wings(self, wing_tasks):
+        """
+        Process the wing components, concurrently if more than one thread is
+        used.
+        """
+        nthreads = self._nthreads
+        if nthreads is None:
+            nthreads = cpu_count()
+
+        # Use the threads for the sections if there is only one wing
+        nwings = len(wing_tasks)
+        if nthreads <= 1 or nwings <= 1:
+            return [_process_wing(compound, self._divide, self._restrict,
+                                  self._tol, self._reloft, comp_name,
+                                  nthreads)
+                    for compound, comp_name, _ in wing_tasks]
+
+        pool = ThreadPool(min(nthreads, nwings))
+        try:
+            return pool.map(
+                lambda task: _process_wing(task[0], self._divide,
+                                           self._restrict, self._tol,
+                                           self._reloft, task[1]),
+                wing_tasks)
+        finally:
+            pool.close()
+            pool.join()
+
     def export_step(self, fn, label_solids=True, label_faces=False,
                     names=None):
         """
@@ -367,7 +411,8 @@ class ImportVSP(object):
         return Body.save_bodies(fn, *bodies)
 
     @staticmethod
-    def rebuild_wing_solid(srfs, divide_closed=True, reloft=False, tol=0.01):
+    def rebuild_wing_solid(srfs, divide_closed=True, reloft=False, tol=0.01,
+                           nthreads=1):
         """
         Rebuild a solid shape from the OpenVSP wing surface(s). If only one
         surface is provided then it is assumed that a single surface models the
@@ -387,6 +432,8 @@ class ImportVSP(object):
             wing surface. This method is experimental.
         :param float tol: Tolerance for approximation if
             *bspline_restrict* or *reloft* is *True*.
+        :param int nthreads: Number of threads used to reloft the wing
+            sections. If *None* then the number of CPUs is used.
 
         :return: The new solid.
         :rtype: afem.topology.entities.Solid
@@ -399,7 +446,7 @@ class ImportVSP(object):
         nsrfs = len(srfs)
         if nsrfs == 1:
             solid, _ = _process_unsplit_wing(compound, divide_closed, reloft,
-                                             tol)
+                                             tol, nthreads)
             return solid
         elif nsrfs > 1:
             solid, _ = _build_solid(compound, divide_closed)
@@ -584,7 +631,7 @@ def _build_solid(compound, divide_closed):
 
 
 def _process_wing(compound, divide_closed, bspline_restrict, tol, reloft,
-                  name):
+                  name, nthreads=1):
     # Note that for VSP wings, the spanwise direction is u and the chord
     # direction is v, where v=0 is the TE and follows the lower surface fwd to
     # the LE, and then aft along the upper surface to the TE.
@@ -595,13 +642,13 @@ def _process_wing(compound, divide_closed, bspline_restrict, tol, reloft,
     vsp_surf = None
     if len(faces) == 1:
         solid, invalid = _process_unsplit_wing(compound, divide_closed, reloft,
-                                               tol)
+                                               tol, nthreads)
         vsp_surf = faces[0].surface
     else:
         solid, invalid = _build_solid(compound, divide_closed)
 
     if not solid:
-        return None
+        return None, invalid
 
     if bspline_restrict:
         solid = _bspline_restrict(solid, tol)
@@ -639,7 +686,7 @@ def _process_fuse(compound, divide_closed, name):
     return fuselage, invalid
 
 
-def _process_unsplit_wing(compound, divide_closed, reloft, tol):
+def _process_unsplit_wing(compound, divide_closed, reloft, tol, nthreads=1):
     # Process a wing that was generated without "Split Surfs" option.
 
     faces = compound.faces
@@ -665,7 +712,7 @@ def _process_unsplit_wing(compound, divide_closed, reloft, tol):
     # the tessellated curves may not match up to the wing end caps making
     # sewing unreliable, flat end caps are assumed.
     if reloft:
-        s1 = _reloft_wing_surface(s1, tol)
+        s1 = _reloft_wing_surface(s1, tol, nthreads)
 
         # Generate new flat end caps using isocurves at the root and tip of
         # this new surface
@@ -795,23 +842,57 @@ def _bspline_restrict(solid, tol):
     return new_solid
 
 
-def _reloft_wing_surface(srf, tol):
+def _reloft_wing_surface(srf, tol, nthreads=1):
     """
     Attempt to reloft an OpenVSP wing surface which was not split to achieve
-    higher continuity.
+    higher continuity. The isocurve at each section is tessellated and
+    approximated independently so sections are processed concurrently if
+    *nthreads* is greater than one.
     """
     logger.info('\tAttempting to reloft the surface...')
+    uknots = srf.uknots
+
+    # Surface data for evaluating the tessellation points in bulk
+    data = None
+    if isinstance(srf, NurbsSurface):
+        data = (srf.p, srf.q, srf.uk, srf.vk, srf.cpw)
+
     # Gather isocurves at each section, tessellate, and approximate
-    crvs = []
-    for u in srf.uknots:
-        c0 = srf.u_iso(u)
-        adp_crv = AdaptorCurve.to_adaptor(c0)
-        tool = GCPnts_QuasiUniformDeflection(adp_crv.object, tol)
-        if not tool.IsDone():
-            logger.info('\tTessellation failed. Using original surface.')
-            return srf
-        pnts = [c0.eval(tool.Parameter(i)) for i in
-                range(1, tool.NbPoints() + 1)]
-        c = NurbsCurveByApprox(pnts, tol=tol, continuity=Geometry.C1).curve
-        crvs.append(c)
+    if nthreads is None:
+        nthreads = cpu_count()
+    nthreads = min(nthreads, len(uknots))
+    if nthreads <= 1:
+        crvs = [_reloft_wing_section(srf, data, u, tol) for u in uknots]
+    else:
+        pool = ThreadPool(nthreads)
+        try:
+            crvs = pool.map(lambda u: _reloft_wing_section(srf, data, u, tol),
+                            uknots)
+        finally:
+            pool.close()
+            pool.join()
+
+    if None in crvs:
+        logger.info('\tTessellation failed. Using original surface.')
+        return srf
     return NurbsSurfaceByInterp(crvs, 1).surface
+
+
+def _reloft_wing_section(srf, data, u, tol):
+    """
+    Tessellate the isocurve of the wing surface at the u-parameter and
+    approximate the points with a C1 continuous curve.
+    """
+    c0 = srf.u_iso(u)
+    adp_crv = AdaptorCurve.to_adaptor(c0)
+    tool = GCPnts_QuasiUniformDeflection(adp_crv.object, tol)
+    if not tool.IsDone():
+        return None
+    v = array([tool.Parameter(i) for i in range(1, tool.NbPoints() + 1)],
+              dtype=float64)
+    if data is not None:
+        u = full(v.size, u, dtype=float64)
+        pnts = geom_utils.surface_points_array(*(data + (u, v)))
+    else:
+        pnts = [c0.eval(vi) for vi in v]
+    return NurbsCurveByApprox(pnts, tol=tol, continuity=Geometry.C1).curve
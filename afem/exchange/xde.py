@@ -36,6 +36,7 @@ from OCCT.XmlXCAFDrivers import XmlXCAFDrivers
 
 from afem.config import units_dict, Settings
 from afem.topology.entities import Shape
+from afem.topology.transform import rigid_instance
 
 __all__ = ["XdeDocument", "XdeLabel"]
 
@@ -73,11 +74,22 @@ class XdeDocument(object):
         self._step_writer = None
         self._step_fp = None
 
+        # Assemblies need to be updated after adding components
+        self._update = False
+
+        # Mirrored prototypes of reflected components
+        self._prototypes = {}
+
         self._init_tool()
 
     def _init_tool(self):
         self._tool = XCAFDoc_DocumentTool.ShapeTool_(self._doc.Main())
 
+    def _update_assemblies(self):
+        if self._update:
+            self._tool.UpdateAssemblies()
+            self._update = False
+
     @property
     def main_label(self):
         """
@@ -125,6 +137,7 @@ class XdeDocument(object):
         if not fn.endswith(self._ext):
             fn += self._ext
 
+        self._update_assemblies()
         txt = TCollection_ExtendedString(fn)
         status = self._app.SaveAs(self._doc, txt)
         return status == PCDM_StoreStatus.PCDM_SS_OK
@@ -170,6 +183,7 @@ class XdeDocument(object):
         :return: *True* if transferred, *False* otherwise.
         :rtype: bool
         """
+        self._update_assemblies()
         self._step_writer = STEPCAFControl_Writer()
         self._step_writer.SetNameMode(True)
         self._step_writer.SetColorMode(True)
@@ -305,6 +319,48 @@ class XdeDocument(object):
             label.set_name(name)
         return label
 
+    def new_assembly(self, name=None):
+        """
+        Create a new top-level assembly. Use :meth:`.add_component` to add
+        shapes to it.
+
+        :param str name: The label name.
+
+        :return: The assembly label.
+        :rtype: afem.exchange.xde.XdeLabel
+        """
+        label = self.new_shape()
+        if name is not None:
+            label.set_name(name)
+        return label
+
+    def add_component(self, label, shape, name=None):
+        """
+        Add a shape as a component of an assembly. The component references
+        a top-level label of the shape without its location so instances
+        that share the same underlying shape (see
+        :func:`afem.topology.transform.transform_shape`) are stored once and
+        written to STEP as assembly instances. STEP cannot store reflections
+        so an instance that is a reflection is added as a rigid placement of
+        a mirrored prototype (see
+        :func:`afem.topology.transform.rigid_instance`), which is shared by
+        all the reflected instances of the same shape in the document.
+
+        :param afem.exchange.xde.XdeLabel label: The assembly label.
+        :param afem.topology.entities.Shape shape: The shape.
+        :param str name: The component label name.
+
+        :return: The component label.
+        :rtype: afem.exchange.xde.XdeLabel
+        """
+        shape = rigid_instance(shape, self._prototypes)
+        label = XdeLabel(self._tool.AddComponent(label.object, shape.object,
+                                                 False))
+        self._update = True
+        if name is not None:
+            label.set_name(name)
+        return label
+
     def remove_shape(self, label, remove_completely=True):
         """
         Remove a shape.
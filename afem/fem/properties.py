@@ -33,12 +33,36 @@ class Property(NamedItem):
 class Shell(Property):
     """
     Shell element property.
+
+    :param str name: The name.
+    :param float t: The thickness.
+    :param afem.fem.materials.Material mat: The material.
     """
 
-    def __init__(self, name, t):
+    def __init__(self, name, t, mat=None):
         super(Shell, self).__init__(name)
         self._t = t
+        self._mat = mat
 
     @property
     def t(self):
         return self._t
+
+    @property
+    def mat(self):
+        """
+        :return: The material or *None* if not set.
+        :rtype: afem.fem.materials.Material or None
+        """
+        return self._mat
+
+    @property
+    def mass_per_area(self):
+        """
+        :return: The mass per unit area (thickness times density). This is
+            zero if no material has been set.
+        :rtype: float
+        """
+        if self._mat is None:
+            return 0.
+        return self._t * self._mat.rho
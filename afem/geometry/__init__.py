@@ -16,9 +16,9 @@
 # You should have received a copy of the GNU Lesser General Public
 # License along with this library; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
-from afem.geometry.check import *
-from afem.geometry.create import *
-from afem.geometry.distance import *
-from afem.geometry.entities import *
-from afem.geometry.intersect import *
-from afem.geometry.project import *
+from afem.misc.lazy import lazy_package
+
+_SUBMODULES = ['arclength', 'check', 'create', 'distance', 'entities',
+               'intersect', 'project']
+
+__getattr__, __dir__ = lazy_package(globals(), _SUBMODULES)
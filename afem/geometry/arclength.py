@@ -0,0 +1,371 @@
+# This file is part of AFEM which provides an engineering toolkit for airframe
+# finite element modeling during conceptual design.
+#
+# Copyright (C) 2016-2018  Laughlin Research, LLC (info@laughlinresearch.com)
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+from OCCT.GCPnts import GCPnts_AbscissaPoint
+from OCCT.Geom import Geom_BSplineCurve, Geom_TrimmedCurve
+from OCCT.GeomAdaptor import GeomAdaptor_Curve
+from OCCT.TColStd import TColStd_Array1OfReal
+from OCCT.TColgp import TColgp_Array1OfPnt
+from OCCT.gp import gp_Pnt, gp_Vec
+from numpy import (array, clip, cumsum, float64, full, hstack, isnan, linspace,
+                   nan, searchsorted, unique, where, zeros)
+from numpy.linalg import norm
+
+from afem.config import logger
+from afem.geometry.utils import curve_points_array, homogenize_array1d
+from afem.occ.utils import (to_np_from_tcolgp_array1_pnt,
+                            to_np_from_tcolstd_array1_real)
+
+__all__ = ["ArcLengthTable"]
+
+# Five point Gauss-Legendre rule on [0, 1]
+_GL_X = array([0.04691007703066802, 0.23076534494715845, 0.5,
+               0.76923465505284150, 0.95308992296933200])
+_GL_W = array([0.11846344252809454, 0.23931433524968323, 0.28444444444444444,
+               0.23931433524968323, 0.11846344252809454])
+
+# Parameters beyond this are treated as infinite
+_INFINITE = 1.0e100
+
+
+class ArcLengthTable(object):
+    """
+    Cumulative arc-length table of a curve used to convert between parameters
+    and distances along the curve without solving the arc-length integral
+    from scratch for every query. The table stores the distance and speed
+    (i.e., the magnitude of the first derivative) at parameters subdividing
+    each knot span. Distances are found by Gauss-Legendre integration from
+    the nearest table entry and parameters are found by inverting a cubic
+    Hermite spline of the table followed by one Newton step. The number of
+    subdivisions is doubled until the total length matches
+    ``GCPnts_AbscissaPoint`` within the tolerance. If it still does not
+    match after six doublings, a warning is logged and the table distances
+    are computed using ``GCPnts_AbscissaPoint`` instead.
+
+    Queries for arrays of parameters or distances are evaluated together.
+    For non-periodic B-spline curves the speeds are evaluated in a single
+    vectorized pass, while other curves are evaluated one point at a time.
+
+    The table is usually obtained using
+    :meth:`afem.geometry.entities.Curve.arc_length_table`, which caches the
+    table on the curve until the curve is modified.
+
+    :param afem.geometry.entities.Curve curve: The curve.
+    :param float tol: The relative tolerance of the total length.
+    :param int nsub: The initial number of subdivisions of each knot span.
+        Curves without knots use 16 times this number of subdivisions.
+
+    :raise ValueError: If the curve is not bounded.
+    """
+
+    def __init__(self, curve, tol=1.0e-7, nsub=4):
+        if not self.is_supported(curve):
+            raise ValueError('Arc-length tables require a bounded curve.')
+
+        self._curve = curve.object
+        self._tol = tol
+        u1 = self._curve.FirstParameter()
+        u2 = self._curve.LastParameter()
+
+        # Knot spans
+        basis = self._curve
+        if isinstance(basis, Geom_TrimmedCurve):
+            basis = basis.BasisCurve()
+        self._nurbs_data = None
+        if isinstance(basis, Geom_BSplineCurve):
+            knots = [basis.Knot(i) for i in range(1, basis.NbKnots() + 1)]
+            breaks = [u for u in knots if u1 < u < u2]
+            if not basis.IsPeriodic():
+                self._nurbs_data = _bspline_data(basis)
+        else:
+            breaks = []
+            nsub *= 16
+        breaks = unique(array([u1] + breaks + [u2], dtype=float64))
+
+        # Refine until the total length matches
+        adp_crv = GeomAdaptor_Curve(self._curve)
+        total = GCPnts_AbscissaPoint.Length_(adp_crv, u1, u2, tol)
+        for _ in range(6):
+            u = hstack([linspace(a, b, nsub + 1)[:-1] for a, b in
+                        zip(breaks[:-1], breaks[1:])] + [breaks[-1:]])
+            s = hstack([[0.], cumsum(self._integrate(u[:-1], u[1:]))])
+            if abs(s[-1] - total) <= tol * max(total, 1.):
+                break
+            nsub *= 2
+        else:
+            msg = ('Arc-length table did not reach a relative tolerance of '
+                   '{} with {} entries (error of {:.3g}). Using '
+                   'GCPnts_AbscissaPoint for the table distances.')
+            logger.warning(msg.format(tol, u.size, abs(s[-1] - total)))
+            ds = [GCPnts_AbscissaPoint.Length_(adp_crv, a, b, tol) for a, b in
+                  zip(u[:-1], u[1:])]
+            s = hstack([[0.], cumsum(ds)])
+
+        self._u = u
+        self._s = s
+        self._speed = self._speeds(u)
+
+    @property
+    def tol(self):
+        """
+        :return: The relative tolerance of the total length.
+        :rtype: float
+        """
+        return self._tol
+
+    @property
+    def u1(self):
+        """
+        :return: The first parameter.
+        :rtype: float
+        """
+        return self._u[0]
+
+    @property
+    def u2(self):
+        """
+        :return: The last parameter.
+        :rtype: float
+        """
+        return self._u[-1]
+
+    @property
+    def length(self):
+        """
+        :return: The total length of the curve.
+        :rtype: float
+        """
+        return self._s[-1]
+
+    @property
+    def size(self):
+        """
+        :return: The number of table entries.
+        :rtype: int
+        """
+        return self._u.size
+
+    def distance(self, u):
+        """
+        Distance along the curve from the first parameter.
+
+        :param u: The parameter(s).
+        :type u: float or collections.Sequence(float) or numpy.ndarray
+
+        :return: The distance(s). Parameters outside the curve bounds give
+            *NaN*.
+        :rtype: float or numpy.ndarray
+        """
+        uarr = array(u, dtype=float64, ndmin=1)
+        s = full(uarr.shape, nan)
+        valid = (uarr >= self.u1) & (uarr <= self.u2)
+        if valid.any():
+            s[valid] = self._distance(uarr[valid])
+        if array(u).ndim == 0:
+            return s[0]
+        return s
+
+    def parameter(self, s):
+        """
+        Parameter at a distance along the curve from the first parameter.
+
+        :param s: The distance(s).
+        :type s: float or collections.Sequence(float) or numpy.ndarray
+
+        :return: The parameter(s). Distances outside the curve length give
+            *NaN*.
+        :rtype: float or numpy.ndarray
+        """
+        sarr = array(s, dtype=float64, ndmin=1)
+        u = self._invert(sarr)
+
+        # One Newton step
+        valid = ~isnan(u)
+        if valid.any():
+            uv = u[valid]
+            speed = self._speeds(uv)
+            ok = speed > 0.
+            du = (self._distance(uv[ok]) - sarr[valid][ok]) / speed[ok]
+            uv[ok] = clip(uv[ok] - du, self.u1, self.u2)
+            u[valid] = uv
+        if array(s).ndim == 0:
+            return u[0]
+        return u
+
+    def arc_length(self, u1, u2):
+        """
+        Curve length between the parameters.
+
+        :param float u1: First parameter.
+        :param float u2: Last parameter.
+
+        :return: The length or *NaN* if a parameter is outside the curve
+            bounds.
+        :rtype: float
+        """
+        s1, s2 = self.distance([u1, u2])
+        return abs(s2 - s1)
+
+    def parameter_from(self, u0, ds):
+        """
+        Parameter at a distance along the curve from another parameter.
+
+        :param float u0: The initial parameter.
+        :param float ds: The distance. A negative value is a distance towards
+            the first parameter.
+
+        :return: The parameter or *None* if it is outside the curve bounds.
+        :rtype: float or None
+        """
+        s0 = self.distance(u0)
+        if isnan(s0):
+            return None
+        u = self.parameter(s0 + ds)
+        if isnan(u):
+            return None
+        return float(u)
+
+    def uniform_parameters(self, n, u1=None, u2=None):
+        """
+        Parameters of equidistant points along the curve.
+
+        :param int n: The number of points (*n* > 1).
+        :param float u1: The first parameter. If not provided then the first
+            parameter of the curve is used.
+        :param float u2: The last parameter. If not provided then the last
+            parameter of the curve is used.
+
+        :return: The parameters or *None* if *u1* or *u2* is outside the
+            curve bounds.
+        :rtype: numpy.ndarray or None
+
+        :raise ValueError: If *n* < 2.
+        """
+        n = int(n)
+        if n < 2:
+            raise ValueError('At least two points are required.')
+        if u1 is None:
+            u1 = self.u1
+        if u2 is None:
+            u2 = self.u2
+        s1, s2 = self.distance([u1, u2])
+        if isnan(s1) or isnan(s2):
+            return None
+        u = self.parameter(linspace(s1, s2, n))
+        u[0], u[-1] = u1, u2
+        return u
+
+    @staticmethod
+    def is_supported(curve):
+        """
+        Check if an arc-length table can be built for the curve.
+
+        :param afem.geometry.entities.Curve curve: The curve.
+
+        :return: *True* if the curve is bounded, *False* if not.
+        :rtype: bool
+        """
+        u1 = curve.object.FirstParameter()
+        u2 = curve.object.LastParameter()
+        return -_INFINITE < u1 < u2 < _INFINITE
+
+    def _speeds(self, u):
+        """
+        Magnitudes of the first derivative at an array of parameters.
+        """
+        if self._nurbs_data is not None:
+            _, cu = curve_points_array(*(self._nurbs_data + (u, True)))
+            return norm(cu, axis=1)
+
+        speeds = zeros(u.shape, dtype=float64)
+        p, v = gp_Pnt(), gp_Vec()
+        for k, ui in enumerate(u):
+            self._curve.D1(ui, p, v)
+            speeds[k] = v.Magnitude()
+        return speeds
+
+    def _integrate(self, a, b):
+        """
+        Gauss-Legendre integration of the speed between arrays of
+        parameters.
+        """
+        h = b - a
+        x = a[:, None] + h[:, None] * _GL_X[None, :]
+        speeds = self._speeds(x.ravel()).reshape(x.shape)
+        return h * speeds.dot(_GL_W)
+
+    def _distance(self, u):
+        """
+        Distances to an array of parameters inside the bounds.
+        """
+        i = clip(searchsorted(self._u, u, 'right') - 1, 0, self._u.size - 2)
+        return self._s[i] + self._integrate(self._u[i], u)
+
+    def _invert(self, s):
+        """
+        Invert the cubic Hermite spline of the table.
+        """
+        u = full(s.shape, nan)
+        tol = self._tol * max(self.length, 1.)
+        valid = (s >= -tol) & (s <= self.length + tol)
+        if not valid.any():
+            return u
+        sv = clip(s[valid], 0., self.length)
+
+        i = clip(searchsorted(self._s, sv, 'right') - 1, 0, self._s.size - 2)
+        s0, s1 = self._s[i], self._s[i + 1]
+        u0, u1 = self._u[i], self._u[i + 1]
+        h = s1 - s0
+        t = where(h > 0., (sv - s0) / where(h > 0., h, 1.), 0.)
+
+        # Derivatives du/ds scaled by the interval. Fall back to linear
+        # interpolation if the speed vanishes at either end.
+        sp0, sp1 = self._speed[i], self._speed[i + 1]
+        ok = (sp0 > 0.) & (sp1 > 0.)
+        m0 = zeros(sv.shape)
+        m1 = zeros(sv.shape)
+        m0[ok] = h[ok] / sp0[ok]
+        m1[ok] = h[ok] / sp1[ok]
+        m0[~ok] = u1[~ok] - u0[~ok]
+        m1[~ok] = u1[~ok] - u0[~ok]
+
+        t2 = t * t
+        t3 = t2 * t
+        uv = ((2. * t3 - 3. * t2 + 1.) * u0 + (t3 - 2. * t2 + t) * m0 +
+              (-2. * t3 + 3. * t2) * u1 + (t3 - t2) * m1)
+        u[valid] = clip(uv, u0, u1)
+        return u
+
+
+def _bspline_data(curve):
+    """
+    Get the degree, knot vector, and homogeneous control points of a
+    B-spline curve.
+    """
+    n = curve.NbPoles()
+    p = curve.Degree()
+    tcol_knots = TColStd_Array1OfReal(1, n + p + 1)
+    curve.KnotSequence(tcol_knots)
+    tcol_poles = TColgp_Array1OfPnt(1, n)
+    curve.Poles(tcol_poles)
+    tcol_weights = TColStd_Array1OfReal(1, n)
+    curve.Weights(tcol_weights)
+    cp = to_np_from_tcolgp_array1_pnt(tcol_poles)
+    w = to_np_from_tcolstd_array1_real(tcol_weights)
+    return (p, to_np_from_tcolstd_array1_real(tcol_knots),
+            homogenize_array1d(cp, w))
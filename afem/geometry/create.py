@@ -36,7 +36,6 @@ from OCCT.gp import gp_Ax3, gp_Pln, gp_Quaternion, gp_Trsf
 from OCCT.gp import gp_Extrinsic_XYZ
 from numpy import array, cross, mean, zeros
 from numpy.linalg import norm
-from scipy.linalg import lu_factor, lu_solve
 
 from afem.adaptor.entities import AdaptorCurve
 from afem.config import logger
@@ -67,6 +66,15 @@ __all__ = ["PointByXYZ", "PointByArray",
            "NurbsSurfaceByInterp", "NurbsSurfaceByApprox"]
 
 
+def _arc_length_table(c, tol):
+    """
+    Get the cached arc-length table if the entity is a bounded curve.
+    """
+    if isinstance(c, Curve):
+        return c.arc_length_table(tol)
+    return None
+
+
 # POINT -----------------------------------------------------------------------
 
 class PointByXYZ(object):
@@ -115,9 +123,24 @@ class PointFromParameter(object):
     :param float u0: The initial parameter.
     :param float ds: The distance along the curve from the given parameter.
     :param float tol: Tolerance.
+
+    .. note::
+
+        If *c* is a bounded curve then its cached arc-length table is used
+        (see :meth:`.Curve.arc_length_table`). Otherwise, or if the point is
+        beyond the ends of the curve, ``GCPnts_AbscissaPoint`` is used.
     """
 
     def __init__(self, c, u0, ds, tol=1.0e-7):
+        table = _arc_length_table(c, tol)
+        if table is not None:
+            u = table.parameter_from(u0, ds)
+            if u is not None:
+                self._is_done = True
+                self._u = u
+                self._p = c.eval(u)
+                return
+
         adp_curve = AdaptorCurve.to_adaptor(c)
 
         tool = GCPnts_AbscissaPoint(tol, adp_curve.object, ds, u0)
@@ -190,31 +213,42 @@ class PointsAlongCurveByNumber(object):
 
         # Adjust u1 and u2 if d1 or d2 != 0
         if d1 is not None:
-            tool = PointFromParameter(adp_crv, u1, d1, tol)
+            tool = PointFromParameter(c, u1, d1, tol)
             if tool.is_done:
                 u1 = tool.parameter
         if d2 is not None:
-            tool = PointFromParameter(adp_crv, u2, d2, tol)
+            tool = PointFromParameter(c, u2, d2, tol)
             if tool.is_done:
                 u2 = tool.parameter
 
-        # Create uniform abscissa
-        tool = GCPnts_UniformAbscissa(adp_crv.object, n, u1, u2, tol)
-        if not tool.IsDone():
-            msg = 'GCPnts_UniformAbscissa failed in PointsAlongCurveByNumber.'
-            logger.warning(msg)
+        # Use the arc-length table if available
+        prms = None
+        table = _arc_length_table(c, tol)
+        if table is not None and n > 1:
+            prms = table.uniform_parameters(n, u1, u2)
+
+        if prms is None:
+            # Create uniform abscissa
+            tool = GCPnts_UniformAbscissa(adp_crv.object, n, u1, u2, tol)
+            if not tool.IsDone():
+                msg = ('GCPnts_UniformAbscissa failed in '
+                       'PointsAlongCurveByNumber.')
+                logger.warning(msg)
+            else:
+                prms = [tool.Parameter(i) for i in
+                        range(1, tool.NbPoints() + 1)]
 
         # Gather results
-        self._is_done = tool.IsDone()
+        self._is_done = prms is not None
         self._npts = 0
         self._prms = []
         self._pnts = []
         self._ds = None
 
         if self._is_done:
-            self._npts = tool.NbPoints()
-            for i in range(1, self._npts + 1):
-                u = tool.Parameter(i)
+            self._npts = len(prms)
+            for u in prms:
+                u = float(u)
                 p = adp_crv.eval(u)
                 self._pnts.append(p)
                 self._prms.append(u)
@@ -307,32 +341,44 @@ class PointsAlongCurveByDistance(object):
 
         # Adjust u1 and u2 if d1 or d2 != 0
         if d1 is not None:
-            tool = PointFromParameter(adp_crv, u1, d1, tol)
+            tool = PointFromParameter(c, u1, d1, tol)
             if tool.is_done:
                 u1 = tool.parameter
         if d2 is not None:
-            tool = PointFromParameter(adp_crv, u2, d2, tol)
+            tool = PointFromParameter(c, u2, d2, tol)
             if tool.is_done:
                 u2 = tool.parameter
 
         # Determine number of points
-        arc_length = adp_crv.arc_length(u1, u2, tol)
+        table = _arc_length_table(c, tol)
+        if table is not None:
+            arc_length = table.arc_length(u1, u2)
+        else:
+            arc_length = adp_crv.arc_length(u1, u2, tol)
         n = ceil(arc_length / maxd) + 1
         if n < nmin:
             n = nmin
 
-        # Create uniform abscissa
-        ua = GCPnts_UniformAbscissa(adp_crv.object, int(n), u1, u2, tol)
-        if not ua.IsDone():
-            msg = "GCPnts_UniformAbscissa failed."
-            raise RuntimeError(msg)
+        # Use the arc-length table if available
+        uniform_prms = None
+        if table is not None and n > 1:
+            uniform_prms = table.uniform_parameters(n, u1, u2)
+
+        if uniform_prms is None:
+            # Create uniform abscissa
+            ua = GCPnts_UniformAbscissa(adp_crv.object, int(n), u1, u2, tol)
+            if not ua.IsDone():
+                msg = "GCPnts_UniformAbscissa failed."
+                raise RuntimeError(msg)
+            uniform_prms = [ua.Parameter(i) for i in
+                            range(1, ua.NbPoints() + 1)]
 
         # Gather results
-        npts = ua.NbPoints()
+        npts = len(uniform_prms)
         pnts = []
         prms = []
-        for i in range(1, npts + 1):
-            u = ua.Parameter(i)
+        for u in uniform_prms:
+            u = float(u)
             p = adp_crv.eval(u)
             pnts.append(p)
             prms.append(u)
@@ -1099,7 +1145,7 @@ class PlaneFromParameter(object):
     def __init__(self, c, u0, ds, ref_pln=None, tol=1.0e-7):
         adp_curve = AdaptorCurve.to_adaptor(c)
 
-        tool = PointFromParameter(adp_curve, u0, ds, tol)
+        tool = PointFromParameter(c, u0, ds, tol)
 
         u = tool.parameter
         self._u = u
@@ -1234,7 +1280,7 @@ class PlanesAlongCurveByNumber(object):
     def __init__(self, c, n, ref_pln=None, u1=None, u2=None, d1=None,
                  d2=None, tol=1.0e-7):
         adp_crv = AdaptorCurve.to_adaptor(c)
-        pnt_builder = PointsAlongCurveByNumber(adp_crv, n, u1, u2, d1, d2, tol)
+        pnt_builder = PointsAlongCurveByNumber(c, n, u1, u2, d1, d2, tol)
         if pnt_builder.npts == 0:
             msg = ('Failed to generate points along the curve for creating '
                    'planes along a curve by number.')
@@ -1342,7 +1388,7 @@ class PlanesAlongCurveByDistance(object):
     def __init__(self, c, maxd, ref_pln=None, u1=None, u2=None, d1=None,
                  d2=None, nmin=0, tol=1.0e-7):
         adp_crv = AdaptorCurve.to_adaptor(c)
-        pnt_builder = PointsAlongCurveByDistance(adp_crv, maxd, u1, u2, d1, d2,
+        pnt_builder = PointsAlongCurveByDistance(c, maxd, u1, u2, d1, d2,
                                                  nmin, tol)
         if pnt_builder.npts == 0:
             msg = ('Failed to generate points along the curve for creating '
@@ -1809,29 +1855,11 @@ class NurbsSurfaceByInterp(object):
         BSplCLib.Knots_(tcol_vknot_seq, tcol_vknots, tcol_vmult, False)
 
         # Perform n + 1 interpolations in v-direction to generate surface
-        # control points.
-        cpw = zeros((n + 1, m + 1, 4), dtype=float)
-        for i in range(0, n + 1):
-            qp = pnts_matrix[i]
-            # Set up system of linear equations.
-            a = zeros((m + 1, m + 1), dtype=float)
-            for j in range(0, m + 1):
-                # span1, _ = CLib.bsplclib_LocateParameter(pnt, tcol_vknots,
-                #                                          tcol_vmult,
-                #                                         vknots[j], False)
-                # Evaluate basis function. Figure out how to use math_Matrix
-                # and use OCC in future.
-                # mat = occ_math.math_Matrix(1, q, 1, q)
-                # CLib.bsplclib_EvalBsplineBasis(span, q, q, tcol_vknot_seq,
-                #                                vknots[j], mat)
-                span = geom_utils.find_span(m, q, vknots[j], vk)
-                a[j, span - q: span + 1] = geom_utils.basis_funs(span,
-                                                                 vknots[j], q,
-                                                                 vk)
-            # Solve for [a][cp] = [qp] using LU decomposition.
-            lu, piv = lu_factor(a, overwrite_a=True, check_finite=False)
-            cpw[i, :] = lu_solve((lu, piv), qp, trans=0, overwrite_b=True,
-                                 check_finite=True)
+        # control points. The coefficient matrix only depends on the
+        # v-parameters so all the interpolations are solved at once.
+        qp = pnts_matrix.transpose((1, 0, 2))
+        cpw = geom_utils.global_interp_array(qp, vknots, q, vk)
+        cpw = cpw.transpose((1, 0, 2))
 
         # Create surface.
         cp, w = geom_utils.dehomogenize_array2d(cpw)
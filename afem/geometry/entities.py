@@ -17,6 +17,7 @@
 # License along with this library; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
 from math import radians
+from weakref import finalize
 
 from OCCT.BRepBuilderAPI import (BRepBuilderAPI_MakeFace,
                                  BRepBuilderAPI_MakeEdge,
@@ -39,10 +40,13 @@ from OCCT.TColStd import (TColStd_Array1OfInteger, TColStd_Array1OfReal,
 from OCCT.TColgp import TColgp_Array1OfPnt, TColgp_Array2OfPnt
 from OCCT.gp import (gp_Ax1, gp_Ax2, gp_Ax3, gp_Dir, gp_Pnt, gp_Pnt2d,
                      gp_Vec2d, gp_Dir2d, gp_Vec)
-from numpy import add, array, float64, subtract, ones
+from numpy import (add, array, float64, linspace, meshgrid, ones, subtract,
+                   zeros)
 
+from afem.base.cache import memoized_property
 from afem.base.entities import ViewableItem
 from afem.geometry import utils as geom_utils
+from afem.geometry.arclength import ArcLengthTable
 from afem.misc import utils as misc_utils
 from afem.occ import utils as occ_utils
 
@@ -1850,6 +1854,40 @@ class Axis3(gp_Ax3):
 
 
 # Transient types that are wrapped.
+class _GeometryData(object):
+    """
+    Data cached on an OpenCASCADE geometry and shared by all of its wrappers.
+    """
+    __slots__ = ('cache', 'version', 'deps')
+
+    def __init__(self):
+        self.cache = {}
+        self.version = 0
+        self.deps = ()
+
+
+# Shared data keyed by the id of the OpenCASCADE geometry
+_geometry_data = {}
+
+
+def _get_geometry_data(obj):
+    """
+    Get the data shared by the wrappers of the OpenCASCADE geometry. The
+    data is released when the Python object of the geometry is destroyed.
+    """
+    key = id(obj)
+    data = _geometry_data.get(key)
+    if data is None:
+        data = _GeometryData()
+        try:
+            finalize(obj, _geometry_data.pop, key, None)
+        except TypeError:
+            # Cannot track the object so keep the data on the wrapper
+            return data
+        _geometry_data[key] = data
+    return data
+
+
 class Geometry(ViewableItem):
     """
     Base class for geometry.
@@ -1878,6 +1916,14 @@ class Geometry(ViewableItem):
 
     :raise TypeError: If the wrapped type of ``obj`` does not match the
         expected type.
+
+    .. note::
+
+        Data derived from the geometry (e.g., arc-length tables and adaptors)
+        is cached on the underlying OpenCASCADE object and is shared by all
+        instances wrapping it. Methods that modify the geometry clear the
+        cache. If the underlying OpenCASCADE object is modified directly then
+        :meth:`invalidate` should be called.
     """
     # Expected type
     _OCC_TYPE = Geom_Geometry
@@ -1905,6 +1951,7 @@ class Geometry(ViewableItem):
             raise TypeError(msg)
         super(Geometry, self).__init__()
         self._object = obj
+        self._data = _get_geometry_data(obj)
 
         # Set default color
         if isinstance(self, Curve):
@@ -1920,6 +1967,45 @@ class Geometry(ViewableItem):
         """
         return self._object
 
+    @property
+    def _cache(self):
+        """
+        :return: The data cached on the geometry. The cache is cleared if any
+            geometry this one depends on has been modified since the data was
+            cached.
+        :rtype: dict
+        """
+        data = self._data
+        deps = self._dependencies()
+        if not deps:
+            return data.cache
+
+        if len(deps) != len(data.deps) or any(
+                d1 is not d2[0] or d2[1].version != d2[2] for d1, d2 in
+                zip(deps, data.deps)):
+            data.cache.clear()
+            data.version += 1
+            # Hold the dependencies so their data stays alive
+            dep_data = [_get_geometry_data(d) for d in deps]
+            data.deps = tuple((d, ddata, ddata.version) for d, ddata in
+                              zip(deps, dep_data))
+        return data.cache
+
+    def _dependencies(self):
+        """
+        Get the OpenCASCADE geometry this one depends on.
+        """
+        return ()
+
+    def invalidate(self):
+        """
+        Clear any data cached on the geometry.
+
+        :return: None.
+        """
+        self._data.cache.clear()
+        self._data.version += 1
+
     def translate(self, v):
         """
         Translate the geometry along the vector.
@@ -1933,6 +2019,7 @@ class Geometry(ViewableItem):
         """
         v = Vector.to_vector(v)
         self.object.Translate(v)
+        self.invalidate()
         return True
 
     def mirror(self, pln):
@@ -1948,6 +2035,7 @@ class Geometry(ViewableItem):
         gp_ax2 = gp_Ax2()
         gp_ax2.SetAxis(gp_pln.Axis())
         self.object.Mirror(gp_ax2)
+        self.invalidate()
         return True
 
     def scale(self, pnt, s):
@@ -1962,6 +2050,7 @@ class Geometry(ViewableItem):
         """
         pnt = Point.to_point(pnt)
         self.object.Scale(pnt, s)
+        self.invalidate()
         return True
 
     def rotate(self, ax1, angle):
@@ -1976,6 +2065,7 @@ class Geometry(ViewableItem):
         """
         angle = radians(angle)
         self.object.Rotate(ax1, angle)
+        self.invalidate()
         return True
 
 
@@ -2068,7 +2158,7 @@ class Curve(Geometry):
         """
         return self.eval(self.u2)
 
-    @property
+    @memoized_property
     def length(self):
         """
         :return: Curve length.
@@ -2141,6 +2231,7 @@ class Curve(Geometry):
         :return: None.
         """
         self.object.Reverse()
+        self.invalidate()
 
     def reversed_u(self, u):
         """
@@ -2169,6 +2260,26 @@ class Curve(Geometry):
         adp_crv = GeomAdaptor_Curve(self.object)
         return GCPnts_AbscissaPoint.Length_(adp_crv, u1, u2, tol)
 
+    def arc_length_table(self, tol=1.0e-7):
+        """
+        Get the arc-length table of the curve. The table is cached on the
+        curve and reused until the curve is modified or a smaller tolerance
+        is requested.
+
+        :param float tol: The relative tolerance of the total length.
+
+        :return: The arc-length table or *None* if the curve is not bounded.
+        :rtype: afem.geometry.arclength.ArcLengthTable or None
+        """
+        table = self._cache.get('arc_length_table')
+        if table is not None and table.tol <= tol:
+            return table
+        if not ArcLengthTable.is_supported(self):
+            return None
+        table = ArcLengthTable(self, tol)
+        self._cache['arc_length_table'] = table
+        return table
+
     @staticmethod
     def wrap(curve):
         """
@@ -2260,6 +2371,7 @@ class Circle(Curve):
         :return: None.
         """
         self.object.SetRadius(r)
+        self.invalidate()
 
 
 class Ellipse(Curve):
@@ -2293,6 +2405,7 @@ class Ellipse(Curve):
         :return: None.
         """
         self.object.SetMajorRadius(r)
+        self.invalidate()
 
     def set_minor_radius(self, r):
         """
@@ -2303,6 +2416,7 @@ class Ellipse(Curve):
         :return: None.
         """
         self.object.SetMinorRadius(r)
+        self.invalidate()
 
 
 class NurbsCurve(Curve):
@@ -2402,6 +2516,7 @@ class NurbsCurve(Curve):
         self.object.Knots(tcol_knots)
         geom_utils.reparameterize_knots(u1, u2, tcol_knots)
         self.object.SetKnots(tcol_knots)
+        self.invalidate()
         return True
 
     def segment(self, u1, u2):
@@ -2417,6 +2532,7 @@ class NurbsCurve(Curve):
         if u1 > u2:
             return False
         self.object.Segment(u1, u2)
+        self.invalidate()
         return True
 
     def set_cp(self, i, cp, weight=None):
@@ -2434,6 +2550,7 @@ class NurbsCurve(Curve):
             self.object.SetPole(i, cp)
         else:
             self.object.SetPole(i, cp, weight)
+        self.invalidate()
 
     @classmethod
     def by_data(cls, cp, knots, mult, p, weights=None, is_periodic=False):
@@ -2474,6 +2591,12 @@ class TrimmedCurve(Curve):
         """
         return Curve.wrap(self.object.BasisCurve())
 
+    def _dependencies(self):
+        """
+        Get the basis curve this one depends on.
+        """
+        return self.object.BasisCurve(),
+
     def set_trim(self, u1, u2, sense=True, adjust_periodic=True):
         """
         Set the trimming parameters on the basis curve.
@@ -2494,6 +2617,7 @@ class TrimmedCurve(Curve):
             curve.
         """
         self.object.SetTrim(u1, u2, sense, adjust_periodic)
+        self.invalidate()
 
     @classmethod
     def by_parameters(cls, basis_curve, u1=None, u2=None, sense=True,
@@ -2618,7 +2742,7 @@ class Surface(Geometry):
         """
         return self.object.V2()
 
-    @property
+    @memoized_property
     def area(self):
         """
         :return: The surface area.
@@ -2727,6 +2851,40 @@ class Surface(Geometry):
         BRepGProp.SurfaceProperties_(f, sprops, tol)
         return sprops.Mass()
 
+    def param_grid(self, n):
+        """
+        Get a uniform grid of parameters and the points on the surface at
+        them. The grid is cached on the surface and reused until the surface
+        is modified.
+
+        :param int n: Number of parameters in each direction.
+
+        :return: The parameters with shape (n * n, 2) and the points with
+            shape (n * n, 3).
+        :rtype: tuple(numpy.ndarray)
+        """
+        key = ('param_grid', n)
+        grid = self._cache.get(key)
+        if grid is not None:
+            return grid
+
+        us = linspace(self.u1, self.u2, n)
+        vs = linspace(self.v1, self.v2, n)
+        uu, vv = meshgrid(us, vs, indexing='ij')
+        uv = zeros((n * n, 2), dtype=float64)
+        uv[:, 0] = uu.ravel()
+        uv[:, 1] = vv.ravel()
+        if isinstance(self, NurbsSurface):
+            pnts = geom_utils.surface_points_array(
+                *(self.nurbs_data + (uv[:, 0], uv[:, 1])))
+        else:
+            pnts = zeros((n * n, 3), dtype=float64)
+            for i in range(n * n):
+                pnts[i] = self.eval(uv[i, 0], uv[i, 1]).xyz
+        grid = (uv, pnts)
+        self._cache[key] = grid
+        return grid
+
     def u_iso(self, u):
         """
         Get a iso-parametric curve at a constant u-parameter.
@@ -2828,6 +2986,7 @@ class Plane(Surface):
         pln = self.gp_pln
         pln.Rotate(pln.XAxis(), radians(angle))
         self.object.SetPln(pln)
+        self.invalidate()
 
     def rotate_y(self, angle):
         """
@@ -2840,6 +2999,7 @@ class Plane(Surface):
         pln = self.gp_pln
         pln.Rotate(pln.YAxis(), radians(angle))
         self.object.SetPln(pln)
+        self.invalidate()
 
     @classmethod
     def by_system(cls, ax3):
@@ -2997,6 +3157,16 @@ class NurbsSurface(Surface):
         """
         return geom_utils.homogenize_array2d(self.cp, self.w)
 
+    @memoized_property
+    def nurbs_data(self):
+        """
+        :return: The degrees, knot vectors, and homogeneous control points
+            (p, q, uk, vk, cpw) used for array evaluation. They are cached
+            until the surface is modified.
+        :rtype: tuple
+        """
+        return self.p, self.q, self.uk, self.vk, self.cpw
+
     def set_udomain(self, u1=0., u2=1.):
         """
         Reparameterize the knot vector between *u1* and *u2*.
@@ -3013,6 +3183,7 @@ class NurbsSurface(Surface):
         self.object.UKnots(tcol_knots)
         geom_utils.reparameterize_knots(u1, u2, tcol_knots)
         self.object.SetUKnots(tcol_knots)
+        self.invalidate()
         return True
 
     def set_vdomain(self, v1=0., v2=1.):
@@ -3031,6 +3202,7 @@ class NurbsSurface(Surface):
         self.object.VKnots(tcol_knots)
         geom_utils.reparameterize_knots(v1, v2, tcol_knots)
         self.object.SetVKnots(tcol_knots)
+        self.invalidate()
         return True
 
     def local_to_global_param(self, d, *args):
@@ -3080,6 +3252,7 @@ class NurbsSurface(Surface):
         if u1 > u2 or v1 > v2:
             return False
         self.object.CheckAndSegment(u1, u2, v1, v2)
+        self.invalidate()
         return True
 
     def locate_u(self, u, tol2d=1.0e-9, with_knot_repetition=False):
@@ -3125,6 +3298,7 @@ class NurbsSurface(Surface):
         :return: None.
         """
         self.object.InsertUKnot(u, m, tol2d)
+        self.invalidate()
 
     def insert_vknot(self, v, m=1, tol2d=1.0e-9):
         """
@@ -3139,6 +3313,7 @@ class NurbsSurface(Surface):
         :return: None.
         """
         self.object.InsertVKnot(v, m, tol2d)
+        self.invalidate()
 
     def set_uknots(self, uknots):
         """
@@ -3155,6 +3330,7 @@ class NurbsSurface(Surface):
         if uk.Size() != self.object.NbUKnots():
             raise ValueError('Incorrect number of knot values.')
         self.object.SetUKnots(uk)
+        self.invalidate()
 
     def set_vknots(self, vknots):
         """
@@ -3171,6 +3347,7 @@ class NurbsSurface(Surface):
         if vk.Size() != self.object.NbVKnots():
             raise ValueError('Incorrect number of knot values.')
         self.object.SetVKnots(vk)
+        self.invalidate()
 
     def set_cp(self, i, j, cp, weight=None):
         """
@@ -3188,6 +3365,7 @@ class NurbsSurface(Surface):
             self.object.SetPole(i, j, cp)
         else:
             self.object.SetPole(i, j, cp, weight)
+        self.invalidate()
 
     def set_cp_row(self, u_index, cp, weights=None):
         """
@@ -3207,6 +3385,7 @@ class NurbsSurface(Surface):
         else:
             tcol_w = occ_utils.to_tcolstd_array1_real(weights)
             self.object.SetPoleRow(u_index, tcol_gp, tcol_w)
+        self.invalidate()
 
     def set_cp_col(self, v_index, cp, weights=None):
         """
@@ -3226,6 +3405,7 @@ class NurbsSurface(Surface):
         else:
             tcol_w = occ_utils.to_tcolstd_array1_real(weights)
             self.object.SetPoleCol(v_index, tcol_gp, tcol_w)
+        self.invalidate()
 
     @classmethod
     def by_data(cls, cp, uknots, vknots, umult, vmult, p, q, weights=None,
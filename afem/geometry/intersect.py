@@ -161,7 +161,8 @@ class IntersectCurveCurve(CurveIntersector):
         e1 = BRepBuilderAPI_MakeEdge(crv1.object).Edge()
         e2 = BRepBuilderAPI_MakeEdge(crv2.object).Edge()
 
-        # Set tolerance to be half intersection tolerance
+        # Set tolerance to be half intersection tolerance. The edges are only
+        # used here so there are no memoized tolerances to invalidate.
         shp_tol = ShapeFix_ShapeTolerance()
         tol = itol / 2.
         shp_tol.SetTolerance(e1, tol)
@@ -16,18 +16,22 @@
 # You should have received a copy of the GNU Lesser General Public
 # License along with this library; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
-from math import sqrt
+from math import isinf, sqrt
 
 from OCCT.Extrema import (Extrema_ExtPC, Extrema_ExtCC, Extrema_POnCurv,
-                          Extrema_ExtPS, Extrema_ExtCS, Extrema_POnSurf)
+                          Extrema_ExtPS, Extrema_ExtCS, Extrema_POnSurf,
+                          Extrema_LocateExtPC, Extrema_GenLocateExtPS)
 from OCCT.GeomProjLib import GeomProjLib
+from OCCT.gp import gp_Pnt
+from numpy import array, float64, full, nan, zeros
 
 from afem.adaptor.entities import AdaptorCurve, AdaptorSurface
 from afem.geometry.check import CheckGeom
 from afem.geometry.entities import Curve, Line
 
 __all__ = ["PointProjector", "ProjectPointToCurve",
-           "ProjectPointToSurface", "CurveProjector", "ProjectCurveToPlane",
+           "ProjectPointToSurface", "PointsProjector", "ProjectPointsToCurve",
+           "ProjectPointsToSurface", "CurveProjector", "ProjectCurveToPlane",
            "ProjectCurveToSurface"]
 
 
@@ -286,6 +290,297 @@ class ProjectPointToSurface(PointProjector):
             pnt.set_xyz(self.nearest_point)
 
 
+class PointsProjector(object):
+    """
+    Base class for projecting an array of points. Each point has a single
+    result which is the nearest projection found. Results for points that
+    failed to project are *nan*.
+    """
+
+    def __init__(self):
+        self._status = zeros(0, dtype=bool)
+        self._pnts = zeros((0, 3), dtype=float64)
+        self._params = zeros(0, dtype=float64)
+        self._dists = zeros(0, dtype=float64)
+
+    @property
+    def npts(self):
+        """
+        :return: Number of points.
+        :rtype: int
+        """
+        return self._status.size
+
+    @property
+    def success(self):
+        """
+        :return: *True* if all the points were projected, *False* if not.
+        :rtype: bool
+        """
+        return bool(self._status.all())
+
+    @property
+    def status(self):
+        """
+        :return: Array with the status of each point.
+        :rtype: numpy.ndarray
+        """
+        return self._status
+
+    @property
+    def points(self):
+        """
+        :return: Array of projected points with shape (N, 3).
+        :rtype: numpy.ndarray
+        """
+        return self._pnts
+
+    @property
+    def parameters(self):
+        """
+        :return: Array of parameters with shape (N,) for curves or (N, 2)
+            for surfaces.
+        :rtype: numpy.ndarray
+        """
+        return self._params
+
+    @property
+    def distances(self):
+        """
+        :return: Array of projection distances with shape (N,).
+        :rtype: numpy.ndarray
+        """
+        return self._dists
+
+    @staticmethod
+    def _to_array(pnts):
+        """
+        Convert points to an array of shape (N, 3).
+        """
+        pnts = array(pnts, dtype=float64)
+        if pnts.ndim == 1:
+            pnts = pnts.reshape(1, -1)
+        if pnts.ndim != 2 or pnts.shape[1] != 3:
+            msg = 'Points must be an array with shape (N, 3).'
+            raise ValueError(msg)
+        return pnts
+
+
+class ProjectPointsToCurve(PointsProjector):
+    """
+    Project an array of points to a curve. Only normal projections are
+    supported and the nearest projection is kept for each point. The extrema
+    tools are built once and, if enabled, each solve is started from the
+    parameter of the previous point which is efficient for ordered points
+    like those along a path. A local solution is only kept if it is a
+    minimum and no farther than the previous projected point or the ends of
+    the curve, otherwise a global search is used for that point.
+
+    :param array_like pnts: The points with shape (N, 3).
+    :param crv: Curve to project to.
+    :type crv: afem.adaptor.entities.AdaptorCurve or
+        afem.geometry.entities.Curve or afem.topology.entities.Edge or
+        afem.topology.entities.Wire
+    :param bool warm_start: Option to use the previous parameter as the
+        initial guess for the next point. Only use this for ordered points
+        since the checks of the local solution cannot rule out a nearer
+        projection far from the previous one.
+    :param float tol: The tolerance.
+
+    :raise ValueError: If the points are not an array of shape (N, 3).
+
+    Usage:
+
+    >>> from afem.geometry import *
+    >>> line = LineByVector(Point(), Direction(1., 0., 0.)).line
+    >>> proj = ProjectPointsToCurve([(1., 1., 0.), (5., 5., 0.)], line)
+    >>> proj.success
+    True
+    >>> proj.parameters
+    array([1., 5.])
+    >>> proj.distances
+    array([1., 5.])
+    """
+
+    def __init__(self, pnts, crv, warm_start=False, tol=1.0e-9):
+        super(ProjectPointsToCurve, self).__init__()
+
+        pnts = self._to_array(pnts)
+        adp_crv = AdaptorCurve.to_adaptor(crv)
+        hcrv = adp_crv.object
+        u1, u2 = adp_crv.u1, adp_crv.u2
+
+        # Build global tool once
+        ext = Extrema_ExtPC()
+        ext.Initialize(hcrv, u1, u2, tol)
+
+        # Points that bound the nearest distance of a local solution
+        bounds = [hcrv.Value(u) for u in (u1, u2) if not isinf(u)]
+
+        n = pnts.shape[0]
+        status = zeros(n, dtype=bool)
+        params = full(n, nan, dtype=float64)
+        dists = full(n, nan, dtype=float64)
+        xyz = full((n, 3), nan, dtype=float64)
+
+        u0, p0 = None, None
+        for i in range(n):
+            p = gp_Pnt(*pnts[i])
+            ui, di = None, None
+
+            # Local solution from previous parameter
+            if warm_start and u0 is not None:
+                loc = Extrema_LocateExtPC(p, hcrv, u0, tol)
+                if loc.IsDone() and loc.IsMin():
+                    dloc = sqrt(loc.SquareDistance())
+                    if _is_nearest(p, dloc, bounds + [p0], tol):
+                        ui = loc.Point().Parameter()
+                        di = dloc
+
+            # Global solution
+            if ui is None:
+                ext.Perform(p)
+                if ext.IsDone():
+                    dmin = None
+                    for j in range(1, ext.NbExt() + 1):
+                        dj = ext.SquareDistance(j)
+                        if dmin is None or dj < dmin:
+                            dmin = dj
+                            ui = ext.Point(j).Parameter()
+                    if dmin is not None:
+                        di = sqrt(dmin)
+
+            if ui is None:
+                continue
+
+            pi = hcrv.Value(ui)
+            status[i] = True
+            params[i] = ui
+            dists[i] = di
+            xyz[i] = pi.X(), pi.Y(), pi.Z()
+            u0, p0 = ui, pi
+
+        self._status = status
+        self._params = params
+        self._dists = dists
+        self._pnts = xyz
+
+
+class ProjectPointsToSurface(PointsProjector):
+    """
+    Project an array of points to a surface. Only normal projections are
+    supported and the nearest projection is kept for each point. The extrema
+    tools are built once and, if enabled, each solve is started from the
+    parameters of the previous point which is efficient for ordered points
+    like those along a path. A local solution is only kept if it is no
+    farther than the previous projected point or the corners of the
+    surface, otherwise a global search is used for that point.
+
+    :param array_like pnts: The points with shape (N, 3).
+    :param srf: Surface to project to.
+    :type srf: afem.adaptor.entities.AdaptorSurface or
+        afem.geometry.entities.Surface or afem.topology.entities.Face
+    :param bool warm_start: Option to use the previous parameters as the
+        initial guess for the next point. Only use this for ordered points
+        since the checks of the local solution cannot rule out a nearer
+        projection far from the previous one.
+    :param float tol: The tolerance.
+
+    :raise ValueError: If the points are not an array of shape (N, 3).
+
+    Usage:
+
+    >>> from afem.geometry import *
+    >>> pln = PlaneByNormal(Point(), Direction(0., 0., 1.)).plane
+    >>> proj = ProjectPointsToSurface([(1., 1., 1.), (2., 1., 2.)], pln)
+    >>> proj.success
+    True
+    >>> proj.parameters
+    array([[1., 1.],
+           [2., 1.]])
+    >>> proj.distances
+    array([1., 2.])
+    """
+
+    def __init__(self, pnts, srf, warm_start=False, tol=1.0e-7):
+        super(ProjectPointsToSurface, self).__init__()
+
+        pnts = self._to_array(pnts)
+        adp_srf = AdaptorSurface.to_adaptor(srf)
+        hsrf = adp_srf.object
+        u1, u2 = adp_srf.u1, adp_srf.u2
+        v1, v2 = adp_srf.v1, adp_srf.v2
+
+        # Build global tool once
+        ext = Extrema_ExtPS()
+        ext.Initialize(hsrf, u1, u2, v1, v2, tol, tol)
+
+        # Points that bound the nearest distance of a local solution
+        bounds = []
+        if not any(isinf(x) for x in (u1, u2, v1, v2)):
+            bounds = [hsrf.Value(u, v) for u in (u1, u2) for v in (v1, v2)]
+
+        n = pnts.shape[0]
+        status = zeros(n, dtype=bool)
+        params = full((n, 2), nan, dtype=float64)
+        dists = full(n, nan, dtype=float64)
+        xyz = full((n, 3), nan, dtype=float64)
+
+        uv0, p0 = None, None
+        for i in range(n):
+            p = gp_Pnt(*pnts[i])
+            uvi, di = None, None
+
+            # Local solution from previous parameters
+            if warm_start and uv0 is not None:
+                loc = Extrema_GenLocateExtPS(p, hsrf, uv0[0], uv0[1], tol,
+                                             tol)
+                if loc.IsDone():
+                    dloc = sqrt(loc.SquareDistance())
+                    if _is_nearest(p, dloc, bounds + [p0], tol):
+                        uvi = loc.Point().Parameter(0., 0.)
+                        di = dloc
+
+            # Global solution
+            if uvi is None:
+                ext.Perform(p)
+                if ext.IsDone():
+                    dmin = None
+                    for j in range(1, ext.NbExt() + 1):
+                        dj = ext.SquareDistance(j)
+                        if dmin is None or dj < dmin:
+                            dmin = dj
+                            uvi = ext.Point(j).Parameter(0., 0.)
+                    if dmin is not None:
+                        di = sqrt(dmin)
+
+            if uvi is None:
+                continue
+
+            pi = hsrf.Value(*uvi)
+            status[i] = True
+            params[i] = uvi
+            dists[i] = di
+            xyz[i] = pi.X(), pi.Y(), pi.Z()
+            uv0, p0 = uvi, pi
+
+        self._status = status
+        self._params = params
+        self._dists = dists
+        self._pnts = xyz
+
+
+def _is_nearest(p, d, pnts, tol):
+    """
+    Check that a local solution is no farther than known points on the
+    curve or surface. Otherwise it cannot be the nearest projection.
+    """
+    for q in pnts:
+        if d > p.Distance(q) + tol:
+            return False
+    return True
+
+
 class CurveProjector(object):
     """
     Base class for curve projections.
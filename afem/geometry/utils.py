@@ -19,8 +19,10 @@
 from __future__ import division, division
 
 from OCCT.BSplCLib import BSplCLib
-from numpy import array, diff, float64, floor, hstack, sqrt, sum, zeros
+from numpy import (arange, array, clip, diff, einsum, float64, floor, hstack,
+                   searchsorted, sqrt, sum, where, zeros)
 from numpy.linalg import norm
+from scipy.linalg import lu_factor, lu_solve
 
 
 def local_to_global_param(a, b, *args):
@@ -243,3 +245,200 @@ def basis_funs(i, u, p, uk):
             saved = left[j - r] * temp
         bf[j] = saved
     return array(bf, dtype=float)
+
+
+def find_spans(n, p, u, uk):
+    """
+    Determine the knot span indices of an array of parameters.
+
+    :param int n: Number of control points - 1.
+    :param int p: Degree.
+    :param ndarray u: Parameters.
+    :param ndarray uk: Knot vector.
+
+    :return: Knot spans.
+    :rtype: ndarray
+
+    *Reference:* Vectorized version of Algorithm A2.1 from "The NURBS Book".
+    """
+    spans = searchsorted(uk, u, side='right') - 1
+    return clip(spans, p, n)
+
+
+def basis_funs_array(spans, u, p, uk):
+    """
+    Compute the non-vanishing basis functions for an array of parameters.
+
+    :param ndarray spans: Knot span indices.
+    :param ndarray u: Parameters.
+    :param int p: Degree.
+    :param ndarray uk: Knot vector.
+
+    :return: Non-vanishing basis functions with shape (N, p + 1).
+    :rtype: ndarray
+
+    Reference: Vectorized version of Algorithm A2.2 from "The NURBS Book"
+    """
+    npts = u.size
+    bf = zeros((npts, p + 1), dtype=float64)
+    bf[:, 0] = 1.0
+    left = zeros((npts, p + 1), dtype=float64)
+    right = zeros((npts, p + 1), dtype=float64)
+    for j in range(1, p + 1):
+        left[:, j] = u - uk[spans + 1 - j]
+        right[:, j] = uk[spans + j] - u
+        saved = zeros(npts, dtype=float64)
+        for r in range(0, j):
+            temp = bf[:, r] / (right[:, r + 1] + left[:, j - r])
+            bf[:, r] = saved + right[:, r + 1] * temp
+            saved = left[:, j - r] * temp
+        bf[:, j] = saved
+    return bf
+
+
+def basis_ders_array(spans, u, p, uk):
+    """
+    Compute the first derivatives of the non-vanishing basis functions for an
+    array of parameters.
+
+    :param ndarray spans: Knot span indices.
+    :param ndarray u: Parameters.
+    :param int p: Degree.
+    :param ndarray uk: Knot vector.
+
+    :return: First derivatives of the basis functions with shape (N, p + 1).
+    :rtype: ndarray
+
+    Reference: Equation 2.9 from "The NURBS Book"
+    """
+    ders = zeros((u.size, p + 1), dtype=float64)
+    if p == 0:
+        return ders
+
+    # Basis functions of degree p - 1 on the same span
+    bf = basis_funs_array(spans, u, p - 1, uk)
+    for k in range(0, p + 1):
+        i = spans - p + k
+        if k > 0:
+            d = uk[i + p] - uk[i]
+            ders[:, k] += where(d > 0., bf[:, k - 1] / where(d > 0., d, 1.),
+                                0.)
+        if k < p:
+            d = uk[i + p + 1] - uk[i + 1]
+            ders[:, k] -= where(d > 0., bf[:, k] / where(d > 0., d, 1.), 0.)
+    return p * ders
+
+
+def curve_points_array(p, uk, cpw, u, d1=False):
+    """
+    Evaluate points on a NURBS curve for an array of parameters.
+
+    :param int p: Degree.
+    :param ndarray uk: Knot vector.
+    :param ndarray cpw: Homogeneous control points with shape (n, 4).
+    :param ndarray u: Parameters.
+    :param bool d1: Option to also return the first derivatives.
+
+    :return: Curve points with shape (N, 3). If *d1* is *True* then the
+        first derivatives are also returned.
+    :rtype: ndarray or tuple(ndarray)
+
+    Reference: Vectorized version of Algorithms A4.1 and A4.2 from "The NURBS
+    Book"
+    """
+    n = cpw.shape[0] - 1
+    spans = find_spans(n, p, u, uk)
+    nu = basis_funs_array(spans, u, p, uk)
+
+    # Control points influencing each parameter with shape (N, p+1, 4)
+    iu = spans.reshape(-1, 1) - p + arange(p + 1)
+    pw = cpw[iu]
+
+    cw = einsum('nk,nkc->nc', nu, pw)
+    w = cw[:, 3:]
+    pnts = cw[:, :3] / w
+    if not d1:
+        return pnts
+
+    dnu = basis_ders_array(spans, u, p, uk)
+    cwu = einsum('nk,nkc->nc', dnu, pw)
+    cu = (cwu[:, :3] - cwu[:, 3:] * pnts) / w
+    return pnts, cu
+
+
+def surface_points_array(p, q, uk, vk, cpw, u, v, d1=False):
+    """
+    Evaluate points on a NURBS surface for arrays of parameters.
+
+    :param int p: Degree in u-direction.
+    :param int q: Degree in v-direction.
+    :param ndarray uk: Knot vector in u-direction.
+    :param ndarray vk: Knot vector in v-direction.
+    :param ndarray cpw: Homogeneous control points with shape (n, m, 4).
+    :param ndarray u: Parameters in u-direction.
+    :param ndarray v: Parameters in v-direction.
+    :param bool d1: Option to also return the first derivatives.
+
+    :return: Surface points with shape (N, 3). If *d1* is *True* then the
+        first derivatives in the u- and v-directions are also returned.
+    :rtype: ndarray or tuple(ndarray)
+
+    Reference: Vectorized version of Algorithms A3.5 and A4.3 from "The NURBS
+    Book"
+    """
+    n = cpw.shape[0] - 1
+    m = cpw.shape[1] - 1
+    uspans = find_spans(n, p, u, uk)
+    vspans = find_spans(m, q, v, vk)
+    nu = basis_funs_array(uspans, u, p, uk)
+    nv = basis_funs_array(vspans, v, q, vk)
+
+    # Control points influencing each parameter with shape (N, p+1, q+1, 4)
+    iu = uspans.reshape(-1, 1) - p + arange(p + 1)
+    iv = vspans.reshape(-1, 1) - q + arange(q + 1)
+    pw = cpw[iu[:, :, None], iv[:, None, :]]
+
+    sw = einsum('nk,nl,nklc->nc', nu, nv, pw)
+    w = sw[:, 3:]
+    pnts = sw[:, :3] / w
+    if not d1:
+        return pnts
+
+    dnu = basis_ders_array(uspans, u, p, uk)
+    dnv = basis_ders_array(vspans, v, q, vk)
+    swu = einsum('nk,nl,nklc->nc', dnu, nv, pw)
+    swv = einsum('nk,nl,nklc->nc', nu, dnv, pw)
+    su = (swu[:, :3] - swu[:, 3:] * pnts) / w
+    sv = (swv[:, :3] - swv[:, 3:] * pnts) / w
+    return pnts, su, sv
+
+
+def global_interp_array(qp, u, p, uk):
+    """
+    Compute the control points of curves that interpolate several sets of
+    points using the same parameters and knot vector. The coefficient
+    matrix only depends on the parameters so it is built and factored once
+    and all the control points are solved for using LU decomposition.
+
+    :param ndarray qp: Points to interpolate with shape (m + 1, ...) where
+        the first axis corresponds to the parameters. The remaining axes
+        may contain any number of sets of (homogeneous) points.
+    :param ndarray u: Parameters with shape (m + 1,).
+    :param int p: Degree.
+    :param ndarray uk: Knot vector.
+
+    :return: Control points with the same shape as *qp*.
+    :rtype: ndarray
+
+    Reference: Vectorized version of Algorithm A9.1 from "The NURBS Book"
+    """
+    m = u.size - 1
+    spans = find_spans(m, p, u, uk)
+    bf = basis_funs_array(spans, u, p, uk)
+    a = zeros((m + 1, m + 1), dtype=float64)
+    for k in range(0, p + 1):
+        a[arange(m + 1), spans - p + k] = bf[:, k]
+    lu, piv = lu_factor(a, overwrite_a=True, check_finite=False)
+    b = array(qp, dtype=float64).reshape(m + 1, -1)
+    cp = lu_solve((lu, piv), b, trans=0, overwrite_b=True, check_finite=True)
+    return cp.reshape(qp.shape)
@@ -16,4 +16,10 @@
 # You should have received a copy of the GNU Lesser General Public
 # License along with this library; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
-from afem.graphics.display import Viewer
+from afem.misc.lazy import lazy_package
+
+_SUBMODULES = {
+    'display': ['Viewer'],
+    'render': ['OffscreenRenderer']}
+
+__getattr__, __dir__ = lazy_package(globals(), _SUBMODULES)
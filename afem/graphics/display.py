@@ -17,14 +17,19 @@
 # License along with this library; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
 import os
+from collections import OrderedDict
 
+from OCCT.AIS import AIS_ColoredShape, AIS_Shape
 from OCCT.SMESH import SMESH_Mesh, SMESH_subMesh
+from OCCT.TopAbs import TopAbs_FACE
 from OCCT.TopoDS import TopoDS_Shape
 from OCCT.Visualization import BasicViewer
 
 from afem.base.entities import ViewableItem
 from afem.smesh.meshes import Mesh, SubMesh
 from afem.structure.group import Group
+from afem.topology.entities import Compound, Shape
+from afem.topology.tessellate import TessellateShapes
 
 __all__ = ["Viewer"]
 
@@ -41,6 +46,10 @@ class Viewer(BasicViewer):
         super(Viewer, self).__init__(width, height)
         self.SetLabel('AFEM')
 
+        # Map faces and IDs of merged presentations to their parts
+        self._face_to_part = {}
+        self._id_to_part = {}
+
     def display_item(self, item):
         """
         Display a type derived from ``ViewableItem``.
@@ -53,18 +62,140 @@ class Viewer(BasicViewer):
         return self.display_shape(item.displayed_shape, item.color,
                                   item.transparency)
 
-    def display_group(self, group, include_subgroup=True):
+    def display_group(self, group, include_subgroup=True, deflection=None,
+                      merged=False):
         """
-        Display all parts of a group.
+        Display all parts of a group. The part shapes are first tessellated
+        in a single parallel pass using
+        :class:`afem.topology.tessellate.TessellateShapes` and the stored
+        triangulation is then used for display. Parts that are already
+        tessellated finely enough are not tessellated again.
 
         :param afem.structure.group.Group group: The group.
         :param bool include_subgroup: Option to recursively include parts
             from any subgroups.
+        :param float deflection: The linear deflection. If not provided then
+            a value relative to the size of the group is used.
+        :param bool merged: Option to display the parts in a single
+            multi-colored presentation rather than one presentation per
+            part. This is much faster for groups with many parts. See
+            :meth:`.display_parts_merged`.
+
+        :return: None.
+        """
+        parts = group.get_parts(include_subgroup)
+        if not parts:
+            return None
+
+        TessellateShapes([part.shape for part in parts], deflection)
+
+        # Use the stored triangulation rather than re-meshing each part
+        drawer = self._my_context.DefaultDrawer()
+        auto_triangulation = drawer.IsAutoTriangulation()
+        drawer.SetAutoTriangulation(False)
+        try:
+            if merged:
+                self.display_parts_merged(parts)
+            else:
+                for part in parts:
+                    self.display_item(part)
+        finally:
+            drawer.SetAutoTriangulation(auto_triangulation)
+
+    def display_parts_merged(self, parts):
+        """
+        Display parts using a single multi-colored presentation. The color of
+        each part is preserved. Since transparency applies to an entire
+        presentation, one presentation is created for each unique
+        transparency value. The faces of the presentations are selectable
+        and the selected parts are available using :attr:`.selected_parts`.
+
+        :param collections.Sequence(afem.structure.entities.Part) parts: The
+            parts.
+
+        :return: The presentations created for the parts.
+        :rtype: list(OCCT.AIS.AIS_ColoredShape)
+        """
+        # Group parts by transparency
+        part_sets = OrderedDict()
+        for part in parts:
+            part_sets.setdefault(part.transparency, []).append(part)
+
+        context = self._my_context
+        face_mode = AIS_Shape.SelectionMode_(TopAbs_FACE)
+        ais_shapes = []
+        for transparency, part_set in part_sets.items():
+            cmp = Compound.by_shapes([part.shape for part in part_set])
+            ais_shape = AIS_ColoredShape(cmp.object)
+            for part in part_set:
+                if part.color is not None:
+                    ais_shape.SetCustomColor(part.shape.object, part.color)
+                for face in part.shape.faces:
+                    self._face_to_part[face] = part
+                self._id_to_part[part.id] = part
+
+            context.Display(ais_shape, False)
+            if transparency > 0.:
+                context.SetTransparency(ais_shape, transparency, False)
+            context.Activate(ais_shape, face_mode)
+            ais_shapes.append(ais_shape)
+
+        context.UpdateCurrentViewer()
+        return ais_shapes
+
+    @property
+    def selected_parts(self):
+        """
+        :return: The parts currently selected in merged presentations
+            sorted by their ID.
+        :rtype: list(afem.structure.entities.Part)
+        """
+        context = self._my_context
+        faces = []
+        context.InitSelected()
+        while context.MoreSelected():
+            if context.HasSelectedShape():
+                faces.append(Shape.wrap(context.SelectedShape()))
+            context.NextSelected()
+        return self.find_parts(faces)
+
+    def find_parts(self, faces):
+        """
+        Find the parts displayed in merged presentations that own the faces.
+
+        :param collections.Sequence(afem.topology.entities.Face) faces: The
+            faces.
+
+        :return: The parts sorted by their ID.
+        :rtype: list(afem.structure.entities.Part)
+        """
+        parts = {}
+        for face in faces:
+            part = self._face_to_part.get(face, None)
+            if part is not None:
+                parts[part.id] = part
+        return [parts[pid] for pid in sorted(parts)]
+
+    def part_by_id(self, pid):
+        """
+        Get a part displayed in a merged presentation by its ID.
+
+        :param int pid: The part ID.
+
+        :return: The part or *None* if not found.
+        :rtype: afem.structure.entities.Part or None
+        """
+        return self._id_to_part.get(pid, None)
+
+    def clear(self):
+        """
+        Clear the contents of the viewer.
 
         :return: None.
         """
-        for part in group.get_parts(include_subgroup):
-            self.display_item(part)
+        super(Viewer, self).clear()
+        self._face_to_part.clear()
+        self._id_to_part.clear()
 
     def add(self, *items):
         """
@@ -0,0 +1,316 @@
+# This file is part of AFEM which provides an engineering toolkit for airframe
+# finite element modeling during conceptual design.
+#
+# Copyright (C) 2016-2018  Laughlin Research, LLC (info@laughlinresearch.com)
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+try:
+    from OCCT.Xw import Xw_Window
+
+    has_xw = True
+except ImportError:
+    Xw_Window = None
+    has_xw = False
+
+from OCCT.AIS import AIS_InteractiveContext, AIS_Shaded, AIS_Shape
+from OCCT.Aspect import Aspect_DisplayConnection
+from OCCT.MeshVS import MeshVS_Mesh, MeshVS_MeshPrsBuilder
+from OCCT.OpenGl import OpenGl_GraphicDriver
+from OCCT.Quantity import Quantity_Color, Quantity_TOC_RGB
+from OCCT.SMESH import SMESH_Mesh, SMESH_MeshVSLink, SMESH_subMesh
+from OCCT.TColStd import TColStd_HPackedMapOfInteger
+from OCCT.TopoDS import TopoDS_Shape
+from OCCT.V3d import (V3d_Viewer, V3d_XposYnegZpos, V3d_Zpos, V3d_Zneg,
+                      V3d_Yneg, V3d_Ypos, V3d_Xneg, V3d_Xpos)
+
+from afem.base.entities import ViewableItem
+from afem.smesh.meshes import Mesh, SubMesh
+from afem.structure.group import Group
+from afem.topology.entities import Shape
+from afem.topology.tessellate import TessellateShapes
+
+__all__ = ["OffscreenRenderer"]
+
+# Shading display mode for MeshVS_Mesh
+_MESHVS_SHADING = 2
+
+
+class OffscreenRenderer(object):
+    """
+    Render entities to image files without an interactive window. The
+    graphic driver, view, and interactive context are created once and
+    reused for each call to :meth:`.render` so that many variants can be
+    rendered in a single process.
+
+    A connection to an X server is still required by OpenGL. On a headless
+    Linux machine a virtual frame buffer with software rendering can be used
+    (e.g., ``LIBGL_ALWAYS_SOFTWARE=1 xvfb-run python script.py``).
+
+    :param int width: Image width in pixels.
+    :param int height: Image height in pixels.
+    :param collections.Sequence(float) background: The background color
+        (0. <= r, g, b <= 1.).
+    :param float deflection: The linear deflection used to tessellate the
+        shapes. If not provided then a value relative to the size of the
+        entities is used.
+
+    :raise NotImplementedError: If offscreen windows are not available on
+        this platform.
+
+    Usage:
+
+    >>> from afem.graphics.render import OffscreenRenderer
+    >>> from afem.topology import *
+    >>> box = BoxBySize(10., 10., 10.).solid
+    >>> r = OffscreenRenderer(400, 300)
+    >>> r.render(box, 'box_iso.png')
+    True
+    >>> r.render(box, 'box_top.png', 'top')
+    True
+    """
+
+    #: Camera presets mapping to view orientations.
+    CAMERAS = {'iso': V3d_XposYnegZpos,
+               'top': V3d_Zpos,
+               'bottom': V3d_Zneg,
+               'front': V3d_Yneg,
+               'back': V3d_Ypos,
+               'left': V3d_Xneg,
+               'right': V3d_Xpos}
+
+    def __init__(self, width=800, height=600, background=(1., 1., 1.),
+                 deflection=None):
+        if not has_xw:
+            raise NotImplementedError('Offscreen rendering not available.')
+
+        self._deflection = deflection
+
+        self._display = Aspect_DisplayConnection()
+        self._driver = OpenGl_GraphicDriver(self._display, True)
+
+        self._viewer = V3d_Viewer(self._driver)
+        self._viewer.SetDefaultLights()
+        self._viewer.SetLightOn()
+
+        self._window = Xw_Window(self._display, 'AFEM', 0, 0, width, height)
+        self._window.SetVirtual(True)
+
+        self._view = self._viewer.CreateView()
+        self._view.SetImmediateUpdate(False)
+        self._view.SetWindow(self._window)
+        r, g, b = background
+        self._view.SetBackgroundColor(Quantity_TOC_RGB, r, g, b)
+
+        # Shapes are tessellated before display so use the stored
+        # triangulation
+        self._context = AIS_InteractiveContext(self._viewer)
+        self._context.SetDisplayMode(AIS_Shaded, False)
+        self._context.DefaultDrawer().SetAutoTriangulation(False)
+
+    @property
+    def view(self):
+        """
+        :return: The underlying view.
+        :rtype: OCCT.V3d.V3d_View
+        """
+        return self._view
+
+    @property
+    def context(self):
+        """
+        :return: The underlying interactive context.
+        :rtype: OCCT.AIS.AIS_InteractiveContext
+        """
+        return self._context
+
+    def clear(self):
+        """
+        Remove all displayed entities.
+
+        :return: None.
+        """
+        self._context.RemoveAll(False)
+
+    def render(self, items, fn, camera='iso', fit=True):
+        """
+        Display the items, set the camera, and write an image file. Any
+        previously displayed entities are removed first.
+
+        :param items: The item(s) to render.
+        :type items: afem.base.entities.ViewableItem or
+            OCCT.TopoDS.TopoDS_Shape or
+            afem.structure.group.Group or
+            OCCT.SMESH.SMESH_Mesh or
+            OCCT.SMESH.SMESH_subMesh or
+            afem.smesh.meshes.Mesh or
+            afem.smesh.meshes.SubMesh or
+            collections.Sequence
+        :param str fn: The filename. The image format is determined by the
+            extension.
+        :param str camera: The camera preset. See :attr:`.CAMERAS` for
+            available options.
+        :param bool fit: Option to fit the contents in the view.
+
+        :return: *True* if the image was written, *False* if not.
+        :rtype: bool
+
+        :raise ValueError: If the camera preset is not recognized.
+        """
+        try:
+            orientation = self.CAMERAS[camera.lower()]
+        except KeyError:
+            msg = 'Unrecognized camera preset: {}.'.format(camera)
+            raise ValueError(msg)
+
+        if not isinstance(items, (list, tuple)):
+            items = [items]
+
+        self.clear()
+        self.add(*items)
+
+        self._view.SetProj(orientation)
+        if fit:
+            self._view.FitAll(0.01, False)
+        self._view.Redraw()
+        return self._view.Dump(fn)
+
+    def add(self, *items):
+        """
+        Add items to be rendered. Shapes are tessellated in a single pass
+        using :class:`afem.topology.tessellate.TessellateShapes` and existing
+        triangulation is reused.
+
+        :param items: The items.
+        :type items: afem.base.entities.ViewableItem or
+            OCCT.TopoDS.TopoDS_Shape or
+            afem.structure.group.Group or
+            OCCT.SMESH.SMESH_Mesh or
+            OCCT.SMESH.SMESH_subMesh or
+            afem.smesh.meshes.Mesh or
+            afem.smesh.meshes.SubMesh
+
+        :return: None.
+        """
+        # Gather shapes with their color and transparency
+        shapes = []
+        meshes = []
+        for item in items:
+            if isinstance(item, ViewableItem):
+                shape = Shape.wrap(item.displayed_shape)
+                shapes.append((shape, item.color, item.transparency))
+            elif isinstance(item, Group):
+                for part in item.get_parts():
+                    shapes.append((part.shape, part.color, part.transparency))
+            elif isinstance(item, TopoDS_Shape):
+                shapes.append((Shape.wrap(item), None, 0.))
+            elif isinstance(item, (Mesh, SubMesh)):
+                meshes.append(item.object)
+            elif isinstance(item, (SMESH_Mesh, SMESH_subMesh)):
+                meshes.append(item)
+
+        if shapes:
+            TessellateShapes([data[0] for data in shapes], self._deflection)
+
+        for shape, color, transparency in shapes:
+            self._display_shape(shape, color, transparency)
+
+        for mesh in meshes:
+            self._display_mesh(mesh)
+
+    def _display_shape(self, shape, color=None, transparency=0.):
+        """
+        Display a shape.
+        """
+        ais_shape = AIS_Shape(shape.object)
+        if isinstance(color, Quantity_Color):
+            self._context.SetColor(ais_shape, color, False)
+        if transparency > 0.:
+            self._context.SetTransparency(ais_shape, transparency, False)
+        self._context.Display(ais_shape, False)
+        return ais_shape
+
+    def _display_mesh(self, mesh):
+        """
+        Display a mesh or only the elements of a sub-mesh.
+        """
+        # The data source is always the whole mesh so the nodes and elements
+        # outside of a sub-mesh are hidden
+        sub_mesh = None
+        if isinstance(mesh, SMESH_subMesh):
+            sub_mesh = mesh
+            mesh = mesh.GetFather()
+        vs_link = SMESH_MeshVSLink(mesh)
+        mesh_vs = MeshVS_Mesh(True)
+        mesh_vs.SetDataSource(vs_link)
+        if sub_mesh is not None:
+            nids, eids = _submesh_ids(sub_mesh)
+            mesh_vs.SetHiddenNodes(_hidden_ids(vs_link.GetAllNodes(), nids))
+            mesh_vs.SetHiddenElems(_hidden_ids(vs_link.GetAllElements(),
+                                               eids))
+        prs_builder = MeshVS_MeshPrsBuilder(mesh_vs)
+        mesh_vs.AddBuilder(prs_builder, True)
+        self._context.Display(mesh_vs, False)
+        self._context.SetDisplayMode(mesh_vs, _MESHVS_SHADING, False)
+        return mesh_vs
+
+
+def _submesh_ids(sub_mesh):
+    """
+    Get the ID's of the nodes and elements of a sub-mesh, including those on
+    the sub-shapes of its shape (e.g., the edges and vertices of a face).
+
+    :param OCCT.SMESH.SMESH_subMesh sub_mesh: The sub-mesh.
+
+    :return: The node and element ID's.
+    :rtype: tuple(set(int))
+    """
+    mesh_ds = sub_mesh.GetFather().GetMeshDS()
+    shape = Shape.wrap(sub_mesh.GetSubShape())
+    shapes = [shape] + shape.faces + shape.edges + shape.vertices
+
+    nids, eids = set(), set()
+    for sub_shape in shapes:
+        sub_meshds = mesh_ds.MeshElements(sub_shape.object)
+        if sub_meshds is None:
+            continue
+        iter_ = sub_meshds.GetNodes()
+        while iter_.more():
+            nids.add(iter_.next().GetID())
+        iter_ = sub_meshds.GetElements()
+        while iter_.more():
+            elm = iter_.next()
+            eids.add(elm.GetID())
+            # Include nodes that are stored on another shape
+            for i in range(elm.NbNodes()):
+                nids.add(elm.GetNode(i).GetID())
+    return nids, eids
+
+
+def _hidden_ids(all_ids, ids):
+    """
+    Build the map of ID's to hide from a mesh presentation.
+
+    :param OCCT.TColStd.TColStd_PackedMapOfInteger all_ids: All the ID's.
+    :param set(int) ids: The ID's to show.
+
+    :return: The ID's to hide.
+    :rtype: OCCT.TColStd.TColStd_HPackedMapOfInteger
+    """
+    hidden = TColStd_HPackedMapOfInteger()
+    hidden_map = hidden.ChangeMap()
+    hidden_map.Assign(all_ids)
+    for id_ in ids:
+        hidden_map.Remove(id_)
+    return hidden
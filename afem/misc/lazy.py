@@ -0,0 +1,135 @@
+# This file is part of AFEM which provides an engineering toolkit for airframe
+# finite element modeling during conceptual design.
+#
+# Copyright (C) 2016-2018  Laughlin Research, LLC (info@laughlinresearch.com)
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+import importlib
+import os
+import re
+import sys
+from types import ModuleType
+
+__all__ = ["lazy_package"]
+
+_ALL_RE = re.compile(r'^__all__\s*=\s*\[(.*?)\]', re.MULTILINE | re.DOTALL)
+_NAME_RE = re.compile(r'[\'"](\w+)[\'"]')
+
+
+def _read_all(path):
+    """
+    Read the names in *__all__* of a module source file without importing it.
+    """
+    with open(path, 'r') as f:
+        match = _ALL_RE.search(f.read())
+    if match is None:
+        return []
+    return _NAME_RE.findall(match.group(1))
+
+
+class _LazyModule(ModuleType):
+    """
+    Module type that calls the module *__getattr__* and *__dir__* functions
+    for Python versions before 3.7, which do not support them (PEP 562).
+    """
+
+    def __getattr__(self, name):
+        getattr_ = self.__dict__.get('__getattr__')
+        if getattr_ is None:
+            msg = 'module {!r} has no attribute {!r}'.format(self.__name__,
+                                                             name)
+            raise AttributeError(msg)
+        return getattr_(name)
+
+    def __dir__(self):
+        dir_ = self.__dict__.get('__dir__')
+        if dir_ is None:
+            return sorted(self.__dict__)
+        return dir_()
+
+
+def lazy_package(namespace, submodules):
+    """
+    Load the public names of a package from its submodules on first access
+    rather than when the package is imported (PEP 562). This replaces a
+    series of ``from package.submodule import *`` statements in the
+    package *__init__.py*:
+
+    >>> from afem.misc.lazy import lazy_package
+    >>> __getattr__, __dir__ = lazy_package(globals(), ['check', 'entities'])
+
+    Accessing a name imports only the submodule that defines it while
+    ``from package import *`` imports all the submodules as before. Python
+    versions before 3.7 do not call a module *__getattr__*, so the class of
+    the package module is changed to a module type that does.
+
+    :param dict namespace: The *globals()* of the package.
+    :param submodules: The submodules in import order. If a list then the
+        names in each submodule's *__all__* are exported. If a dictionary
+        then it maps each submodule to the list of names it exports.
+    :type submodules: list(str) or dict
+
+    :return: The *__getattr__* and *__dir__* functions for the package.
+    :rtype: tuple(function, function)
+    """
+    package = namespace['__name__']
+    path = os.path.dirname(namespace['__file__'])
+    if isinstance(submodules, dict):
+        items = list(submodules.items())
+    else:
+        items = [(sub, None) for sub in submodules]
+    subs = set(sub for sub, _ in items)
+    index = {}
+
+    def _index():
+        # Later submodules override earlier ones like star imports do
+        if not index:
+            for sub, names in items:
+                if names is None:
+                    names = _read_all(os.path.join(path, sub + '.py'))
+                for name in names:
+                    index[name] = sub
+        return index
+
+    def __getattr__(name):
+        if name == '__all__':
+            for sub, _ in items:
+                importlib.import_module('.'.join([package, sub]))
+            names = list(_index())
+            namespace['__all__'] = names
+            return names
+
+        if name in subs:
+            return importlib.import_module('.'.join([package, name]))
+
+        sub = _index().get(name)
+        if sub is None:
+            msg = 'module {!r} has no attribute {!r}'.format(package, name)
+            raise AttributeError(msg)
+
+        module = importlib.import_module('.'.join([package, sub]))
+        value = getattr(module, name)
+        namespace[name] = value
+        return value
+
+    def __dir__():
+        return sorted(set(namespace) | set(_index()))
+
+    # Module __getattr__ is not supported before Python 3.7, but the class
+    # of a module can be changed since Python 3.5
+    if sys.version_info < (3, 7):
+        sys.modules[package].__class__ = _LazyModule
+
+    return __getattr__, __dir__
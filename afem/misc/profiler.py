@@ -0,0 +1,363 @@
+# This file is part of AFEM which provides an engineering toolkit for airframe
+# finite element modeling during conceptual design.
+#
+# Copyright (C) 2016-2018  Laughlin Research, LLC (info@laughlinresearch.com)
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from afem.config import logger
+
+__all__ = ["Profiler", "profile_part", "profile_builder",
+           "ProfiledBuilderType"]
+
+
+class _PartStack(threading.local):
+    def __init__(self):
+        self.names = []
+
+
+class Profiler(object):
+    """
+    Opt-in instrumentation of the expensive operations in AFEM (Boolean
+    operations, part builders, sewing, shape fixing, and meshing). When
+    enabled, each operation records its wall time along with information
+    like argument and result sub-shape counts, the fuzzy value, and the
+    parallel flag. The name of the part being built or modified is recorded
+    as well so that time can be attributed to parts. Recording is disabled
+    by default and costs a single flag check per operation when off.
+
+    Usage:
+
+    >>> from afem.misc.profiler import Profiler
+    >>> Profiler.enable()
+    >>> # Build the model
+    >>> Profiler.export_chrome_trace('afem_trace.json')
+    >>> Profiler.print_summary()
+    """
+    _enabled = False
+    _events = []
+    _lock = threading.Lock()
+    _parts = _PartStack()
+    _t0 = time.perf_counter()
+
+    @classmethod
+    def enable(cls, reset=True):
+        """
+        Start recording operations.
+
+        :param bool reset: Option to clear previously recorded events.
+
+        :return: None.
+        """
+        if reset:
+            cls.reset()
+        cls._enabled = True
+
+    @classmethod
+    def disable(cls):
+        """
+        Stop recording operations. Recorded events are kept.
+
+        :return: None.
+        """
+        cls._enabled = False
+
+    @classmethod
+    def reset(cls):
+        """
+        Clear all recorded events and reset the time origin.
+
+        :return: None.
+        """
+        with cls._lock:
+            cls._events = []
+        cls._t0 = time.perf_counter()
+
+    @classmethod
+    def is_enabled(cls):
+        """
+        :return: *True* if recording, *False* if not.
+        :rtype: bool
+        """
+        return cls._enabled
+
+    @classmethod
+    def events(cls):
+        """
+        :return: The recorded events. Each event is a dictionary with keys
+            'op', 'cat', 'part', 'start', 'time', 'tid', and 'args'. Times
+            are in seconds.
+        :rtype: list(dict)
+        """
+        with cls._lock:
+            return list(cls._events)
+
+    @classmethod
+    def current_part(cls):
+        """
+        :return: The name of the part currently being built or modified in
+            this thread.
+        :rtype: str or None
+        """
+        if cls._parts.names:
+            return cls._parts.names[-1]
+        return None
+
+    @classmethod
+    @contextmanager
+    def part(cls, name):
+        """
+        Context manager to attribute the operations inside it to a part.
+
+        :param str name: The part name.
+        """
+        if not cls._enabled:
+            yield
+            return
+        cls._parts.names.append(name)
+        try:
+            yield
+        finally:
+            cls._parts.names.pop()
+
+    @classmethod
+    @contextmanager
+    def record(cls, op, cat='afem', part=None):
+        """
+        Context manager to record an operation. When recording, a dictionary
+        is provided that can be updated with information about the operation.
+        When not recording, *None* is provided so the caller can skip
+        gathering that information.
+
+        :param str op: The operation name.
+        :param str cat: The operation category.
+        :param str part: The part name. If not provided the current part is
+            used.
+
+        Usage:
+
+        >>> with Profiler.record('FuseShapes', 'bop') as info:
+        ...     bop.Build()
+        ...     if info is not None:
+        ...         info['nfaces'] = len(bop.shape.faces)
+        """
+        if not cls._enabled:
+            yield None
+            return
+
+        if part is None:
+            part = cls.current_part()
+        info = {}
+        t0 = time.perf_counter()
+        try:
+            yield info
+        finally:
+            dt = time.perf_counter() - t0
+            event = {'op': op, 'cat': cat, 'part': part,
+                     'start': t0 - cls._t0, 'time': dt,
+                     'tid': threading.current_thread().ident,
+                     'args': info}
+            with cls._lock:
+                cls._events.append(event)
+
+    @classmethod
+    def chrome_trace(cls):
+        """
+        Build the recorded events in the Chrome trace event format. The
+        result can be loaded in chrome://tracing, Perfetto, or speedscope to
+        view a flame graph.
+
+        :return: The trace.
+        :rtype: dict
+        """
+        pid = os.getpid()
+        trace = []
+        for e in cls.events():
+            args = dict(e['args'])
+            if e['part'] is not None:
+                args['part'] = e['part']
+            trace.append({'name': e['op'], 'cat': e['cat'], 'ph': 'X',
+                          'ts': e['start'] * 1.0e6, 'dur': e['time'] * 1.0e6,
+                          'pid': pid, 'tid': e['tid'], 'args': args})
+        return {'traceEvents': trace, 'displayTimeUnit': 'ms'}
+
+    @classmethod
+    def export_chrome_trace(cls, fn='afem_trace.json'):
+        """
+        Write the recorded events to a Chrome trace file.
+
+        :param str fn: The filename.
+
+        :return: None.
+        """
+        with open(fn, 'w') as f:
+            json.dump(cls.chrome_trace(), f)
+
+    @classmethod
+    def summary(cls, by=('op', 'part')):
+        """
+        Summarize the recorded events. Time is inclusive, so an operation
+        nested inside another (e.g., a Boolean operation inside a part
+        builder) is counted by both.
+
+        :param by: The event keys to group by ('op', 'cat', and/or 'part').
+        :type by: str or collections.Sequence(str)
+
+        :return: List of rows sorted by total time. Each row is a dictionary
+            with the group keys and 'count', 'total', 'mean', and 'max'.
+        :rtype: list(dict)
+        """
+        if isinstance(by, str):
+            by = (by,)
+
+        groups = {}
+        for e in cls.events():
+            key = tuple([e[k] for k in by])
+            groups.setdefault(key, []).append(e['time'])
+
+        rows = []
+        for key, times in groups.items():
+            row = dict(zip(by, key))
+            row['count'] = len(times)
+            row['total'] = sum(times)
+            row['mean'] = row['total'] / len(times)
+            row['max'] = max(times)
+            rows.append(row)
+        rows.sort(key=lambda r: r['total'], reverse=True)
+        return rows
+
+    @classmethod
+    def format_summary(cls, by=('op', 'part'), limit=None):
+        """
+        Format the summary as a table.
+
+        :param by: The event keys to group by.
+        :type by: str or collections.Sequence(str)
+        :param int limit: The maximum number of rows.
+
+        :return: The table.
+        :rtype: str
+        """
+        if isinstance(by, str):
+            by = (by,)
+        rows = cls.summary(by)
+        if limit is not None:
+            rows = rows[:limit]
+
+        widths = [max([len(k)] + [len(str(r[k])) for r in rows]) for k in by]
+        header = '  '.join([k.ljust(w) for k, w in zip(by, widths)])
+        header += '{:>8s}{:>12s}{:>12s}{:>12s}'.format('count', 'total (s)',
+                                                      'mean (s)', 'max (s)')
+        lines = [header, '-' * len(header)]
+        for r in rows:
+            line = '  '.join([str(r[k]).ljust(w) for k, w in zip(by, widths)])
+            line += '{:>8d}{:>12.4f}{:>12.4f}{:>12.4f}'.format(
+                r['count'], r['total'], r['mean'], r['max'])
+            lines.append(line)
+        return '\n'.join(lines)
+
+    @classmethod
+    def print_summary(cls, by=('op', 'part'), limit=None):
+        """
+        Print the summary table.
+
+        :param by: The event keys to group by.
+        :type by: str or collections.Sequence(str)
+        :param int limit: The maximum number of rows.
+
+        :return: None.
+        """
+        print(cls.format_summary(by, limit))
+
+    @classmethod
+    def log_summary(cls, by=('op', 'part'), limit=None):
+        """
+        Log the summary table at the info level.
+
+        :param by: The event keys to group by.
+        :type by: str or collections.Sequence(str)
+        :param int limit: The maximum number of rows.
+
+        :return: None.
+        """
+        logger.info('\n' + cls.format_summary(by, limit))
+
+
+def profile_part(method):
+    """
+    Decorator for part methods so the operations they perform are
+    attributed to the part.
+
+    :param method: The part method.
+
+    :return: The wrapped method.
+    """
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if not Profiler._enabled:
+            return method(self, *args, **kwargs)
+        with Profiler.part(self.name):
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+def profile_builder(cls, init):
+    """
+    Wrap the constructor of a part builder to record it. Only the
+    constructor of the class being instantiated is recorded so calls to
+    base class constructors are not counted twice.
+
+    :param type cls: The builder class.
+    :param init: The constructor.
+
+    :return: The wrapped constructor.
+    """
+
+    @wraps(init)
+    def wrapper(self, *args, **kwargs):
+        if not Profiler._enabled or type(self) is not cls:
+            return init(self, *args, **kwargs)
+
+        name = kwargs.get('name', args[0] if args else None)
+        if not isinstance(name, str):
+            name = None
+        with Profiler.part(name):
+            with Profiler.record(cls.__name__, 'builder', name) as info:
+                init(self, *args, **kwargs)
+                info['nparts'] = len(getattr(self, '_parts', [None]))
+
+    return wrapper
+
+
+class ProfiledBuilderType(type):
+    """
+    Metaclass for part builders that wraps the constructor of each derived
+    builder using :func:`profile_builder`. A metaclass is used rather than
+    *__init_subclass__()* so that it also works in Python 3.5.
+    """
+
+    def __init__(cls, name, bases, namespace):
+        super(ProfiledBuilderType, cls).__init__(name, bases, namespace)
+        # Only derived builders are recorded
+        if any(isinstance(base, ProfiledBuilderType) for base in bases):
+            cls.__init__ = profile_builder(cls, cls.__init__)
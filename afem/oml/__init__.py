@@ -16,5 +16,10 @@
 # You should have received a copy of the GNU Lesser General Public
 # License along with this library; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
-from afem.oml.check import CheckOML
-from afem.oml.entities import Body
+from afem.misc.lazy import lazy_package
+
+_SUBMODULES = {
+    'check': ['CheckOML'],
+    'entities': ['Body']}
+
+__getattr__, __dir__ = lazy_package(globals(), _SUBMODULES)
@@ -16,10 +16,14 @@
 # You should have received a copy of the GNU Lesser General Public
 # License along with this library; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+from numpy import argmin, array, clip, cross, einsum, float64, sqrt, zeros
+
 from afem.base.entities import ShapeHolder, NamedItem
 from afem.geometry.create import PlaneByPoints
-from afem.geometry.entities import Surface, TrimmedCurve
-from afem.geometry.project import ProjectPointToCurve, ProjectPointToSurface
+from afem.geometry.entities import NurbsSurface, Surface, TrimmedCurve
+from afem.geometry.project import (ProjectPointToCurve, ProjectPointToSurface,
+                                   ProjectPointsToSurface)
+from afem.geometry.utils import surface_points_array
 from afem.topology.bop import IntersectShapes
 from afem.topology.create import FaceBySurface, WiresByConnectedEdges
 from afem.topology.distance import DistancePointToShapes
@@ -48,9 +52,31 @@ class Body(NamedItem, ShapeHolder):
         self.random_color()
 
         # Geometry data
+        self._mirror_data = None
         self._sref = None
         self._sref_shape = None
 
+    @property
+    def _sref(self):
+        if self._mirror_data is not None:
+            self._mirror_sref()
+        return self._sref_data
+
+    @_sref.setter
+    def _sref(self, sref):
+        self._mirror_data = None
+        self._sref_data = sref
+
+    def _mirror_sref(self):
+        """
+        Copy and mirror the reference surface of a mirrored instance.
+        """
+        sref, pln = self._mirror_data
+        self._mirror_data = None
+        sref = sref.copy()
+        sref.mirror(pln)
+        self._sref_data = sref
+
     @property
     def outer_shell(self):
         """
@@ -176,6 +202,159 @@ class Body(NamedItem, ShapeHolder):
             raise RuntimeError(msg)
         return proj.nearest_param
 
+    def eval_array(self, u, v):
+        """
+        Evaluate points on the reference surface for arrays of parameters.
+        If the reference surface is a NURBS surface then the points are
+        evaluated in a single vectorized pass.
+
+        :param array_like u: Parameters in u-direction.
+        :param array_like v: Parameters in v-direction.
+
+        :return: Points on the reference surface with shape (N, 3).
+        :rtype: numpy.ndarray
+        """
+        u = array(u, dtype=float64).ravel()
+        v = array(v, dtype=float64).ravel()
+
+        data = self._nurbs_data()
+        if data is not None:
+            return surface_points_array(*(data + (u, v)))
+
+        pnts = zeros((u.size, 3), dtype=float64)
+        for i in range(u.size):
+            pnts[i] = self._sref.eval(u[i], v[i]).xyz
+        return pnts
+
+    def norm_array(self, u, v):
+        """
+        Evaluate surface normals of the reference surface for arrays of
+        parameters. If the reference surface is a NURBS surface then the
+        normals are evaluated in a single vectorized pass.
+
+        :param array_like u: Parameters in u-direction.
+        :param array_like v: Parameters in v-direction.
+
+        :return: Reference surface normals with shape (N, 3).
+        :rtype: numpy.ndarray
+        """
+        u = array(u, dtype=float64).ravel()
+        v = array(v, dtype=float64).ravel()
+
+        data = self._nurbs_data()
+        if data is not None:
+            _, su, sv = surface_points_array(*(data + (u, v, True)))
+            return cross(su, sv)
+
+        vecs = zeros((u.size, 3), dtype=float64)
+        for i in range(u.size):
+            vecs[i] = self._sref.norm(u[i], v[i]).xyz
+        return vecs
+
+    def invert_array(self, pnts, ngrid=20, max_iter=20, tol=1.0e-10):
+        """
+        Find the parameters on the reference surface by inverting an array of
+        points. For a NURBS reference surface, the initial guess for each
+        point is the nearest point of a coarse parameter grid which is
+        computed once and cached. The parameters are then refined using
+        Gauss-Newton iterations for all points at once. Points that do not
+        converge, and all points for other surface types, are inverted by
+        :class:`afem.geometry.project.ProjectPointsToSurface`.
+
+        :param array_like pnts: The points with shape (N, 3).
+        :param int ngrid: Number of grid parameters in each direction.
+        :param int max_iter: Maximum number of iterations.
+        :param float tol: Tolerance for the parameter update.
+
+        :return: Parameters on the reference surface with shape (N, 2).
+        :rtype: numpy.ndarray
+
+        :raise RuntimeError: If the inversion fails for any point.
+        """
+        pnts = array(pnts, dtype=float64).reshape(-1, 3)
+
+        data = self._nurbs_data()
+        if data is None:
+            return self._invert_by_projection(pnts)
+
+        # Initial guess from nearest grid point
+        grid_uv, grid_pnts = self._sref.param_grid(ngrid)
+        nearest = zeros(pnts.shape[0], dtype=int)
+        chunk = 1000
+        for i in range(0, pnts.shape[0], chunk):
+            diff = pnts[i:i + chunk, None, :] - grid_pnts[None, :, :]
+            nearest[i:i + chunk] = argmin(einsum('ijk,ijk->ij', diff, diff),
+                                          axis=1)
+        u = grid_uv[nearest, 0].copy()
+        v = grid_uv[nearest, 1].copy()
+
+        # Gauss-Newton refinement
+        u1, u2, v1, v2 = self.u1, self.u2, self.v1, self.v2
+        converged = zeros(u.size, dtype=bool)
+        for _ in range(max_iter):
+            srf_pnts, su, sv = surface_points_array(*(data + (u, v, True)))
+            r = srf_pnts - pnts
+            a11 = einsum('ij,ij->i', su, su)
+            a12 = einsum('ij,ij->i', su, sv)
+            a22 = einsum('ij,ij->i', sv, sv)
+            b1 = -einsum('ij,ij->i', su, r)
+            b2 = -einsum('ij,ij->i', sv, r)
+            det = a11 * a22 - a12 * a12
+            valid = det > 0.
+            det[~valid] = 1.
+            du = (a22 * b1 - a12 * b2) / det
+            dv = (a11 * b2 - a12 * b1) / det
+            du[~valid] = 0.
+            dv[~valid] = 0.
+            # Use the step after clipping so points on the boundary converge
+            unew = clip(u + du, u1, u2)
+            vnew = clip(v + dv, v1, v2)
+            du, dv = unew - u, vnew - v
+            u, v = unew, vnew
+            converged = valid & (sqrt(du * du + dv * dv) <= tol)
+            if converged.all():
+                break
+
+        uv = zeros((u.size, 2), dtype=float64)
+        uv[:, 0] = u
+        uv[:, 1] = v
+
+        # Fall back to projection for points that did not converge
+        if not converged.all():
+            uv[~converged] = self._invert_by_projection(pnts[~converged])
+        return uv
+
+    def clear_sref_cache(self):
+        """
+        Clear data cached for array evaluation and inversion of the reference
+        surface. The data is stored on the reference surface and is cleared
+        automatically when the surface is modified using its methods, so
+        this is only needed if the underlying surface is modified directly.
+
+        :return: None.
+        """
+        if self._sref is not None:
+            self._sref.invalidate()
+
+    def _nurbs_data(self):
+        """
+        Get the cached data of a NURBS reference surface.
+        """
+        srf = self._sref
+        if not isinstance(srf, NurbsSurface):
+            return None
+        return srf.nurbs_data
+
+    def _invert_by_projection(self, pnts):
+        """
+        Invert points using a batch projection.
+        """
+        proj = ProjectPointsToSurface(pnts, self._sref)
+        if not proj.success:
+            msg = 'Failed to invert point.'
+            raise RuntimeError(msg)
+        return proj.parameters
+
     def extract_plane(self, u1, v1, u2, v2):
         """
         Extract a plane between parameters on the reference surface. The
@@ -279,19 +458,30 @@ class Body(NamedItem, ShapeHolder):
             bbox.enlarge(tol)
         return bbox
 
-    def mirrored(self, pln, name=None):
+    def mirrored(self, pln, name=None, instance=False):
         """
         Mirror this Body using the plane.
 
         :param afem.geometry.entities.Plane pln: The plane.
         :param str name: The name of the new Body.
+        :param bool instance: Option to create the mirrored shape as an
+            instance that shares the topology and geometry of this Body
+            rather than a full copy. The reference shape is then an instance
+            too and the reference surface is only copied the first time it is
+            used.
 
         :return: Mirrored Body.
         :rtype: afem.oml.entities.Body
         """
-        solid = mirror_shape(self.shape, pln)
+        solid = mirror_shape(self.shape, pln, not instance)
         body = Body(solid, name)
-        if self.sref is not None:
+        if self.sref is None:
+            return body
+
+        if instance:
+            body._mirror_data = (self.sref, pln)
+            body._sref_shape = mirror_shape(self.sref_shape, pln, False)
+        else:
             sref = self.sref.copy()
             sref.mirror(pln)
             body.set_sref(sref)
@@ -16,4 +16,8 @@
 # You should have received a copy of the GNU Lesser General Public
 # License along with this library; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
-from afem.sketch.entities import *
+from afem.misc.lazy import lazy_package
+
+_SUBMODULES = ['entities']
+
+__getattr__, __dir__ = lazy_package(globals(), _SUBMODULES)
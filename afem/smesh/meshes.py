@@ -16,8 +16,14 @@
 # You should have received a copy of the GNU Lesser General Public
 # License along with this library; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+from itertools import combinations
+
 from OCCT.SMESH import SMESH_Gen, SMESH_subMesh
+from numpy import arange, array, concatenate, int8, ones, searchsorted
 
+from afem.base.entities import ShapeHolder
+from afem.config import logger
+from afem.misc.profiler import Profiler
 from afem.smesh.entities import Node, Element
 from afem.topology.entities import Shape
 
@@ -108,7 +114,16 @@ class MeshGen(object):
                 shape = mesh.shape
             else:
                 raise ValueError('No shape could be found.')
-        return self._gen.Compute(mesh.object, shape.object)
+        # Computing may add or remove nodes and elements
+        mesh.ds.clear_id_maps()
+        with Profiler.record('MeshGen.compute', 'mesh') as info:
+            status = self._gen.Compute(mesh.object, shape.object)
+        if info is not None:
+            info['nfaces'] = len(shape.faces)
+            info['nnodes'] = mesh.num_nodes
+            info['nelements'] = mesh.num_faces
+            info['status'] = bool(status)
+        return status
 
 
 class Mesh(object):
@@ -231,6 +246,7 @@ class Mesh(object):
         """
         new_mesh = cls.__new__(cls)
         new_mesh._mesh = mesh
+        new_mesh._ds = MeshDS(new_mesh)
         return new_mesh
 
     def shape_to_mesh(self, shape):
@@ -242,6 +258,7 @@ class Mesh(object):
         :return: None
         """
         self._mesh.ShapeToMesh(shape.object)
+        self._ds.clear_id_maps()
 
     def add_hypothesis(self, hypothesis, shape=None):
         """
@@ -297,6 +314,7 @@ class Mesh(object):
         :return: None.
         """
         self._mesh.Clear()
+        self._ds.clear_id_maps()
 
     def clear_submesh(self, shape):
         """
@@ -308,6 +326,7 @@ class Mesh(object):
         """
         shape_id = self.ds.shape_to_index(shape)
         self._mesh.ClearSubMesh(shape_id)
+        self._ds.clear_id_maps()
 
     def get_submesh(self, sub_shape):
         """
@@ -340,7 +359,14 @@ class Mesh(object):
         :param str fn: The output file.
 
         :return: None
+
+        .. note::
+
+            The ID's of the mesh data structure are written. Maps computed by
+            :meth:`MeshDS.renumber_nodes` or :meth:`MeshDS.renumber_elements`
+            are not applied.
         """
+        self._warn_id_maps('DAT')
         self._mesh.ExportDAT(fn)
 
     def export_stl(self, fn, is_ascii=True):
@@ -351,6 +377,12 @@ class Mesh(object):
         :param bool is_ascii: ASCII text output or binary.
 
         :return: None.
+
+        .. note::
+
+            The STL format does not store ID's so maps computed by
+            :meth:`MeshDS.renumber_nodes` or :meth:`MeshDS.renumber_elements`
+            have no effect.
         """
         self._mesh.ExportSTL(fn, is_ascii)
 
@@ -361,9 +393,27 @@ class Mesh(object):
         :param str fn: The output file.
 
         :return: None
+
+        .. note::
+
+            The ID's of the mesh data structure are written. Maps computed by
+            :meth:`MeshDS.renumber_nodes` or :meth:`MeshDS.renumber_elements`
+            are not applied.
         """
+        self._warn_id_maps('UNV')
         self._mesh.ExportUNV(fn)
 
+    def _warn_id_maps(self, fmt):
+        """
+        Warn if the nodes or elements have been renumbered using a map that
+        the exporter does not apply.
+        """
+        if self._ds.node_id_map is None and self._ds.elm_id_map is None:
+            return
+        msg = ("The {} exporter writes the ID's of the mesh data structure "
+               "and ignores the renumbered ID's.".format(fmt))
+        logger.warning(msg)
+
 
 class MeshDS(object):
     """
@@ -374,6 +424,8 @@ class MeshDS(object):
 
     def __init__(self, mesh):
         self._ds = mesh.object.GetMeshDS()
+        self._node_map = None
+        self._elm_map = None
 
     @property
     def object(self):
@@ -506,27 +558,211 @@ class MeshDS(object):
         """
         self._ds.MoveNode(node.object, x, y, z)
 
-    def renumber_nodes(self, start=1, step=1):
+    @property
+    def node_id_map(self):
+        """
+        :return: The map from node ID's to the new ID's computed by
+            :meth:`renumber_nodes`, or *None* if not computed.
+        :rtype: dict or None
+        """
+        return self._node_map
+
+    @property
+    def elm_id_map(self):
+        """
+        :return: The map from element ID's to the new ID's computed by
+            :meth:`renumber_elements`, or *None* if not computed.
+        :rtype: dict or None
+        """
+        return self._elm_map
+
+    def clear_id_maps(self):
+        """
+        Clear the maps computed by :meth:`renumber_nodes` and
+        :meth:`renumber_elements`. This is done automatically when the mesh
+        is computed or cleared.
+
+        :return: None.
+        """
+        self._node_map = None
+        self._elm_map = None
+
+    def mapped_node_id(self, nid):
+        """
+        Get the new ID of a node if the nodes have been renumbered using an
+        ordering.
+
+        :param int nid: The node ID.
+
+        :return: The new node ID, or the original ID if not renumbered.
+        :rtype: int
+        """
+        if self._node_map is None:
+            return nid
+        return self._node_map[nid]
+
+    def mapped_elm_id(self, eid):
+        """
+        Get the new ID of an element if the elements have been renumbered
+        using ID ranges.
+
+        :param int eid: The element ID.
+
+        :return: The new element ID, or the original ID if not renumbered.
+        :rtype: int
+        """
+        if self._elm_map is None:
+            return eid
+        return self._elm_map[eid]
+
+    def compute_node_ordering(self, method='rcm'):
+        """
+        Compute an ordering of the nodes from the connectivity graph of the
+        edge and face elements.
+
+        :param str method: The ordering method. Use 'rcm' for the Reverse
+            Cuthill-McKee ordering, which reduces the bandwidth and profile of
+            the assembled matrices, or 'natural' for the current order.
+
+        :return: The node ID's in the new order.
+        :rtype: numpy.ndarray
+
+        :raise ValueError: If the method is not supported.
+        """
+        if method not in ['rcm', 'natural']:
+            raise ValueError('Unsupported ordering method.')
+
+        nids = array(sorted([n.id for n in self.node_iter]), dtype=int)
+        if method == 'natural' or nids.size == 0:
+            return nids
+
+        # Import on demand since SciPy sparse is slow to import
+        from scipy.sparse import coo_matrix
+        from scipy.sparse.csgraph import reverse_cuthill_mckee
+
+        rows, cols = self._node_graph(nids)
+        n = nids.size
+        graph = coo_matrix((ones(rows.size, dtype=int8), (rows, cols)),
+                           shape=(n, n)).tocsr()
+        perm = reverse_cuthill_mckee(graph, symmetric_mode=True)
+        return nids[perm]
+
+    def _node_graph(self, nids):
+        """
+        Get the rows and columns of the node connectivity graph. Elements are
+        grouped by their number of nodes so that the node pairs are computed
+        in bulk.
+        """
+        conn = {}
+        for iter_ in [self.edge_iter, self.faces_iter]:
+            for elm in iter_:
+                elm_nids = elm.nids
+                conn.setdefault(len(elm_nids), []).append(elm_nids)
+
+        rows, cols = [], []
+        for k, elm_nids in conn.items():
+            indx = searchsorted(nids, array(elm_nids, dtype=int))
+            for i, j in combinations(range(k), 2):
+                rows += [indx[:, i], indx[:, j]]
+                cols += [indx[:, j], indx[:, i]]
+        if not rows:
+            return array([], dtype=int), array([], dtype=int)
+        return concatenate(rows), concatenate(cols)
+
+    def renumber_nodes(self, start=1, step=1, method=None):
         """
         Renumber nodes.
 
         :param int start: Starting node id.
         :param int step: Step between id's.
+        :param method: The ordering method (see
+            :meth:`compute_node_ordering`). If *None* then the nodes are
+            renumbered sequentially in the mesh data structure. Otherwise,
+            the ordering is stored as a map from the node ID's to the new
+            ID's (see :meth:`mapped_node_id`). The map is only applied by
+            :func:`afem.exchange.nastran.export_bdf` since the mesh data
+            structure itself does not support arbitrary ID's.
+        :type method: str or None
 
         :return: None.
         """
-        self._ds.Renumber(True, start, step)
+        if method is None:
+            self._ds.Renumber(True, start, step)
+            self._node_map = None
+            return
+
+        order = self.compute_node_ordering(method)
+        new_ids = start + step * arange(order.size)
+        self._node_map = dict(zip(order.tolist(), new_ids.tolist()))
 
-    def renumber_elements(self, start=1, step=1):
+    def renumber_elements(self, start=1, step=1, ranges=None):
         """
         Renumber elements.
 
         :param int start: Starting element id.
         :param int step: Step between id's.
+        :param ranges: Pairs of a part (or shape) and the first ID of its
+            elements. The elements of each part are numbered sequentially
+            starting at the given ID and the remaining elements are numbered
+            starting at *start* using the ID's that are not already used. The
+            new ID's are stored as a map (see :meth:`mapped_elm_id`) that is
+            only applied by :func:`afem.exchange.nastran.export_bdf`. If
+            *None* then the elements are renumbered sequentially in the mesh
+            data structure.
+        :type ranges: collections.Sequence(tuple(afem.structure.entities.Part
+            or afem.topology.entities.Shape, int)) or None
 
         :return: None.
-        """
-        self._ds.Renumber(False, start, step)
+
+        :raise ValueError: If the ID ranges overlap.
+        """
+        if ranges is None:
+            self._ds.Renumber(False, start, step)
+            self._elm_map = None
+            return
+
+        elm_map = {}
+        used = set()
+        for entity, first_id in ranges:
+            eid = first_id
+            for elm_id in self._element_ids(entity):
+                if elm_id in elm_map:
+                    continue
+                if eid in used:
+                    raise ValueError('Element ID ranges overlap.')
+                elm_map[elm_id] = eid
+                used.add(eid)
+                eid += step
+
+        # Number remaining elements with unused ID's
+        eid = start
+        for iter_ in [self.edge_iter, self.faces_iter]:
+            for elm in iter_:
+                if elm.id in elm_map:
+                    continue
+                while eid in used:
+                    eid += step
+                elm_map[elm.id] = eid
+                used.add(eid)
+        self._elm_map = elm_map
+
+    def _element_ids(self, entity):
+        """
+        Get the ID's of the elements on the faces of a part or shape, or on
+        its edges if it has no faces.
+        """
+        if isinstance(entity, ShapeHolder):
+            entity = entity.shape
+        shapes = entity.faces
+        if not shapes:
+            shapes = entity.edges
+
+        eids = []
+        for shape in shapes:
+            if not self.has_elements(shape):
+                continue
+            eids += [elm.id for elm in self.mesh_elements(shape).elm_iter]
+        return eids
 
     def has_elements(self, shape):
         """
@@ -652,6 +888,18 @@ class SubMesh(object):
         new_mesh._ds = SubMeshDS(new_mesh)
         return new_mesh
 
+    def check_compute_state(self):
+        """
+        Update the compute state of the sub-mesh using its nodes and
+        elements. A sub-mesh filled with existing nodes and elements is then
+        considered computed and is not computed again.
+
+        :return: *True* if the sub-mesh is computed, *False* if not.
+        :rtype: bool
+        """
+        self._mesh.ComputeStateEngine(SMESH_subMesh.CHECK_COMPUTE_STATE)
+        return self._mesh.IsMeshComputed()
+
     def can_add_hypothesis(self, hyp):
         """
         Check to see if the hypothesis can be attached.
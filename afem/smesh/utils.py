@@ -535,6 +535,31 @@ class MeshHelper(object):
         """
         return self._helper.ShapeToIndex(shape.object)
 
+    def node_u(self, edge, node):
+        """
+        Get the parameter of a node on an edge.
+
+        :param afem.topology.entities.Edge edge: The edge.
+        :param afem.smesh.entities.Node node: The node.
+
+        :return: The parameter.
+        :rtype: float
+        """
+        return self._helper.GetNodeU(edge.object, node.object)
+
+    def node_uv(self, face, node):
+        """
+        Get the parameters of a node on a face.
+
+        :param afem.topology.entities.Face face: The face.
+        :param afem.smesh.entities.Node node: The node.
+
+        :return: The parameters.
+        :rtype: tuple(float, float)
+        """
+        uv = self._helper.GetNodeUV(face.object, node.object)
+        return uv.X(), uv.Y()
+
     def add_node(self, x, y, z, id_=0, u=0., v=0.):
         """
         Create a node.
@@ -16,10 +16,9 @@
 # You should have received a copy of the GNU Lesser General Public
 # License along with this library; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
-from afem.structure.group import *
-from afem.structure.check import *
-from afem.structure.create import *
-from afem.structure.entities import *
-from afem.structure.fix import *
-from afem.structure.join import *
-from afem.structure.modify import *
+from afem.misc.lazy import lazy_package
+
+_SUBMODULES = ['group', 'archive', 'check', 'create', 'entities', 'fix',
+               'join', 'mass', 'mesh', 'modify']
+
+__getattr__, __dir__ = lazy_package(globals(), _SUBMODULES)
@@ -0,0 +1,571 @@
+# This file is part of AFEM which provides an engineering toolkit for airframe
+# finite element modeling during conceptual design.
+#
+# Copyright (C) 2016-2018  Laughlin Research, LLC (info@laughlinresearch.com)
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+import json
+import os
+import shutil
+import tempfile
+import threading
+import zipfile
+from multiprocessing.pool import ThreadPool
+
+from OCCT.BRep import BRep_Tool
+from OCCT.ShapeBuild import ShapeBuild_ReShape
+from OCCT.ShapeFix import ShapeFix_Edge
+from OCCT.TopAbs import TopAbs_FORWARD
+from OCCT.TopoDS import TopoDS_Shape
+
+from afem.config import Settings, logger
+from afem.exchange.brep import has_bintools, read_brep, write_brep
+from afem.structure.group import Group, GroupAPI
+from afem.structure.utils import order_parts_by_id
+from afem.topology.create import CompoundByShapes, EdgeByCurve, FaceBySurface
+from afem.topology.entities import Shape
+
+__all__ = ["ModelArchive"]
+
+_FORMAT = 'afem-archive'
+_VERSION = 3
+_MANIFEST = 'manifest.json'
+_INTERFACES = 'interfaces'
+_PARTS_DIR = 'parts'
+
+# Types of sub-shapes that may be shared by parts
+_SUB_SHAPES = ('faces', 'edges', 'vertices')
+
+
+class ModelArchive(object):
+    """
+    A model archive. The archive is either a directory or a zip file
+    containing a JSON manifest with the group hierarchy, the type, color,
+    transparency, and metadata of each part, and a BREP file for the shape,
+    reference curve, and reference surface of each part (if any). The files
+    are written and read in parallel and the part shapes can be loaded
+    lazily one part at a time.
+
+    Sub-shapes shared by parts (e.g., the edges and vertices at the
+    interfaces of fused parts) are also written to a separate BREP file.
+    The manifest stores the index of each shared sub-shape in the part
+    shape and in this file, and the shared sub-shapes are substituted when
+    a part shape is read so that parts are still conformal after reading,
+    which is needed to build a conformal mesh.
+
+    :param str path: The path to the archive. If it ends with ".zip" the
+        archive is a zip file, otherwise it is a directory.
+
+    Usage:
+
+    >>> from afem.structure import GroupAPI, ModelArchive
+    >>> archive = ModelArchive('wing.zip')
+    >>> archive.write()
+    >>> GroupAPI.reset()
+    >>> parts = archive.read(lazy=True)
+    """
+
+    def __init__(self, path):
+        self._path = path
+        self._is_zip = path.lower().endswith('.zip')
+        self._manifest = None
+
+    @property
+    def path(self):
+        """
+        :return: The path to the archive.
+        :rtype: str
+        """
+        return self._path
+
+    @property
+    def is_zip(self):
+        """
+        :return: *True* if the archive is a zip file, *False* if it is a
+            directory.
+        :rtype: bool
+        """
+        return self._is_zip
+
+    @property
+    def manifest(self):
+        """
+        :return: The manifest. It is read from the archive the first time it
+            is needed.
+        :rtype: dict
+
+        :raise ValueError: If the manifest is not a model archive manifest
+            or its version is not supported.
+        """
+        if self._manifest is None:
+            if self._is_zip:
+                with zipfile.ZipFile(self._path, 'r') as zf:
+                    data = zf.read(_MANIFEST).decode('utf-8')
+            else:
+                with open(os.path.join(self._path, _MANIFEST), 'r') as f:
+                    data = f.read()
+            manifest = json.loads(data)
+            if manifest.get('format') != _FORMAT:
+                raise ValueError('Not a model archive: {}.'.format(
+                    self._path))
+            if manifest.get('version') != _VERSION:
+                raise ValueError('Unsupported model archive version: '
+                                 '{}.'.format(manifest.get('version')))
+            self._manifest = manifest
+        return self._manifest
+
+    @property
+    def part_names(self):
+        """
+        :return: The names of the parts in the archive.
+        :rtype: list(str)
+        """
+        return [entry['name'] for entry in self.manifest['parts']]
+
+    def write(self, group='_master', include_subgroup=True, binary=True,
+              compress=True, nthreads=None, overwrite=False):
+        """
+        Write the parts of a group and its subgroups to the archive. An
+        existing archive is replaced, but any other file or non-empty
+        directory at the path is only replaced if *overwrite* is *True*.
+
+        :param group: The group. By default the master model is used.
+        :type group: str or afem.structure.group.Group or None
+        :param bool include_subgroup: Option to recursively include parts
+            and groups from any subgroups.
+        :param bool binary: Option to write binary BREP files if available.
+        :param bool compress: Option to compress the files in a zip archive.
+        :param int nthreads: Number of threads. If not provided then the
+            number of CPUs is used.
+        :param bool overwrite: Option to replace a file or directory at the
+            path that is not a model archive.
+
+        :return: The manifest.
+        :rtype: dict
+
+        :raise TypeError: If an :class:`.Group` instance is not found.
+        :raise ValueError: If something other than a model archive exists
+            at the path and *overwrite* is *False*.
+        """
+        group = GroupAPI.get_group(group)
+        if not isinstance(group, Group):
+            raise TypeError('Could not find group.')
+
+        if not overwrite and not self._can_replace():
+            msg = ('Path exists and is not a model archive: {}. Use '
+                   'overwrite=True to replace it.'.format(self._path))
+            raise ValueError(msg)
+
+        binary = binary and has_bintools
+        ext = '.bbrep' if binary else '.brep'
+
+        # Group hierarchy with parents before children
+        groups = []
+        stack = [group]
+        while stack:
+            current = stack.pop(0)
+            if current is not group:
+                parent = current.parent
+                groups.append({'name': current.name,
+                               'parent': None if parent is group else
+                               parent.name})
+            if include_subgroup:
+                stack += current.children
+
+        # Parts and their files
+        parts = order_parts_by_id(group.get_parts(include_subgroup))
+        part_group = {}
+        for g in [group] + [GroupAPI.get_group(g['name']) for g in groups]:
+            for part in g.get_parts(False):
+                part_group[part] = None if g is group else g.name
+
+        # Sub-shapes shared by parts are written once to the interface file
+        sub_shapes = {}
+        owners = {}
+        for part in parts:
+            if part.shape.is_null:
+                continue
+            sub_shapes[part] = [getattr(part.shape, attr) for attr in
+                                _SUB_SHAPES]
+            for shapes in sub_shapes[part]:
+                for shape in shapes:
+                    owners.setdefault(shape, set()).add(part)
+        interfaces = []
+        interface_index = {}
+
+        entries, jobs = [], []
+        for part in parts:
+            base = '/'.join([_PARTS_DIR, str(part.id)])
+            entry = {'id': part.id,
+                     'name': part.name,
+                     'type': part.type,
+                     'group': part_group.get(part),
+                     'color': _color_to_list(part.color),
+                     'transparency': part.transparency,
+                     'metadata': _json_metadata(part),
+                     'shape': None,
+                     'interfaces': [],
+                     'cref': None,
+                     'sref': None}
+            if part in sub_shapes:
+                entry['shape'] = base + ext
+                jobs.append((part.shape, entry['shape']))
+                for attr, shapes in zip(_SUB_SHAPES, sub_shapes[part]):
+                    for i, shape in enumerate(shapes):
+                        if len(owners[shape]) < 2:
+                            continue
+                        k = interface_index.get(shape)
+                        if k is None:
+                            k = len(interfaces)
+                            interface_index[shape] = k
+                            interfaces.append(Shape.wrap(
+                                shape.object.Oriented(TopAbs_FORWARD)))
+                        entry['interfaces'].append([attr, i, k])
+            if part.has_cref:
+                entry['cref'] = base + '.cref' + ext
+                edge = EdgeByCurve(part.cref).edge
+                jobs.append((edge, entry['cref']))
+            if part.has_sref:
+                entry['sref'] = base + '.sref' + ext
+                face = FaceBySurface(part.sref).face
+                jobs.append((face, entry['sref']))
+            entries.append(entry)
+
+        interfaces_fn = None
+        if interfaces:
+            interfaces_fn = _INTERFACES + ext
+            jobs.append((CompoundByShapes(interfaces).compound,
+                         interfaces_fn))
+
+        manifest = {'format': _FORMAT,
+                    'version': _VERSION,
+                    'units': Settings.units,
+                    'binary': binary,
+                    'interfaces': interfaces_fn,
+                    'groups': groups,
+                    'parts': entries}
+
+        # Write the files to the directory or a temporary one for a zip
+        if self._is_zip:
+            root = tempfile.mkdtemp(prefix='afem_archive_')
+        else:
+            if os.path.isdir(self._path):
+                shutil.rmtree(self._path)
+            elif os.path.exists(self._path):
+                os.remove(self._path)
+            root = self._path
+        os.makedirs(os.path.join(root, _PARTS_DIR))
+
+        try:
+            args = [(shape, os.path.join(root, fn), binary) for shape, fn in
+                    jobs]
+            pool = ThreadPool(nthreads)
+            try:
+                pool.map(_write_job, args)
+            finally:
+                pool.close()
+                pool.join()
+
+            with open(os.path.join(root, _MANIFEST), 'w') as f:
+                json.dump(manifest, f, indent=1)
+
+            if self._is_zip:
+                mode = zipfile.ZIP_DEFLATED if compress else \
+                    zipfile.ZIP_STORED
+                with zipfile.ZipFile(self._path, 'w', mode) as zf:
+                    zf.write(os.path.join(root, _MANIFEST), _MANIFEST)
+                    for _, fn in jobs:
+                        zf.write(os.path.join(root, fn), fn)
+        finally:
+            if self._is_zip:
+                shutil.rmtree(root, ignore_errors=True)
+
+        self._manifest = manifest
+        msg = ' '.join(['Wrote', str(len(entries)), 'part(s) to archive',
+                        self._path])
+        logger.info(msg)
+        return manifest
+
+    def read(self, group=None, names=None, lazy=True, nthreads=None):
+        """
+        Read parts from the archive. The group hierarchy is recreated under
+        the given group.
+
+        :param group: The group to load the parts into. If ``None`` then
+            the active group is used.
+        :type group: str or afem.structure.group.Group or None
+        :param collections.Sequence(str) names: The names of the parts to
+            read. If not provided then all parts are read.
+        :param bool lazy: Option to load the part shapes on first access. If
+            *False*, the shapes are read now.
+        :param int nthreads: Number of threads. If not provided then the
+            number of CPUs is used.
+
+        :return: The parts.
+        :rtype: list(afem.structure.entities.Part)
+        """
+        from afem.structure.create import CreatePartByName
+
+        manifest = self.manifest
+        binary = manifest['binary']
+        group = GroupAPI.get_group(group)
+
+        entries = manifest['parts']
+        if names is not None:
+            names = set(names)
+            entries = [e for e in entries if e['name'] in names]
+
+        # Recreate groups
+        groups = {None: group}
+        for data in manifest['groups']:
+            parent = groups.get(data['parent'], group)
+            new_group = GroupAPI.create_group(data['name'], parent, False)
+            if new_group is None:
+                new_group = GroupAPI.get_group(data['name'])
+            groups[data['name']] = new_group
+
+        # Read reference geometry, and shapes unless lazy
+        shared = _SharedShapes(self, manifest['interfaces'], binary)
+        jobs = []
+        for entry in entries:
+            keys = ('cref', 'sref') if lazy else ('shape', 'cref', 'sref')
+            for key in keys:
+                if entry[key] is not None:
+                    jobs.append(entry[key])
+        if not lazy and any(entry['interfaces'] for entry in entries):
+            jobs.append(manifest['interfaces'])
+
+        pool = ThreadPool(nthreads)
+        try:
+            shapes = pool.map(lambda fn: self.read_shape(fn, binary), jobs)
+        finally:
+            pool.close()
+            pool.join()
+        shapes = dict(zip(jobs, shapes))
+        if manifest['interfaces'] in shapes:
+            shared.set_interfaces(shapes[manifest['interfaces']])
+
+        # Create parts
+        parts = []
+        for entry in entries:
+            cref, sref = None, None
+            if entry['cref'] is not None:
+                cref = shapes[entry['cref']].curve
+            if entry['sref'] is not None:
+                sref = shapes[entry['sref']].surface
+            shape = None
+            if not lazy:
+                shape = shared.rebuild(shapes.get(entry['shape']),
+                                       entry['interfaces'])
+            part = CreatePartByName(entry['type'], name=entry['name'],
+                                    shape=shape, cref=cref, sref=sref,
+                                    group=groups.get(entry['group'],
+                                                     group)).part
+            if lazy:
+                part.set_shape_loader(_ArchiveLoader(shared, entry['shape'],
+                                                     entry['interfaces']))
+            color = entry['color']
+            if color is not None:
+                part.set_color(*color)
+            part.set_transparency(entry['transparency'])
+            part.metadata.update(entry['metadata'])
+            parts.append(part)
+
+        msg = ' '.join(['Read', str(len(parts)), 'part(s) from archive',
+                        self._path])
+        logger.info(msg)
+        return parts
+
+    def read_shape(self, fn, binary=None):
+        """
+        Read a single shape from the archive.
+
+        :param str fn: The relative path of the file in the archive.
+        :param bool binary: Option to read a binary BREP file. If not
+            provided the manifest is used.
+
+        :return: The shape.
+        :rtype: afem.topology.entities.Shape
+        """
+        if binary is None:
+            binary = self.manifest['binary']
+
+        if not self._is_zip:
+            return read_brep(os.path.join(self._path, fn), binary)
+
+        # Extract to a temporary file since OpenCASCADE reads from files
+        tmp = tempfile.mkdtemp(prefix='afem_archive_')
+        try:
+            with zipfile.ZipFile(self._path, 'r') as zf:
+                local = zf.extract(fn, tmp)
+            return read_brep(local, binary)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def _can_replace(self):
+        """
+        Check if the path is free or holds a model archive.
+        """
+        path = self._path
+        if not os.path.exists(path):
+            return True
+        if os.path.isdir(path):
+            if not os.listdir(path):
+                return True
+            if self._is_zip:
+                return False
+            return os.path.isfile(os.path.join(path, _MANIFEST))
+        if not self._is_zip or not zipfile.is_zipfile(path):
+            return False
+        with zipfile.ZipFile(path, 'r') as zf:
+            return _MANIFEST in zf.namelist()
+
+
+class _SharedShapes(object):
+    """
+    The sub-shapes shared by the parts of an archive. The interface file is
+    read once when the first part that needs it is loaded so that all parts
+    get the same sub-shapes. They are released once every part that needs
+    them has been loaded.
+    """
+
+    def __init__(self, archive, fn, binary):
+        self.archive = archive
+        self.fn = fn
+        self.binary = binary
+        self._interfaces = None
+        self._pending = 0
+        self._released = False
+        self._lock = threading.Lock()
+
+    def add_pending(self):
+        with self._lock:
+            self._pending += 1
+
+    def release(self, loader):
+        with self._lock:
+            if loader.loaded:
+                return
+            loader.loaded = True
+            self._pending -= 1
+            if self._pending <= 0:
+                self._interfaces = None
+                self._released = True
+
+    def set_interfaces(self, compound):
+        self._interfaces = list(compound.shape_iter)
+
+    def read(self, fn):
+        if fn is None:
+            return Shape(TopoDS_Shape())
+        return self.archive.read_shape(fn, self.binary)
+
+    def rebuild(self, shape, interfaces):
+        """
+        Substitute the shared sub-shapes in a part shape.
+        """
+        if shape is None:
+            return Shape(TopoDS_Shape())
+        if not interfaces:
+            return shape
+
+        # The shared sub-shapes are modified below so parts are rebuilt one
+        # at a time
+        with self._lock:
+            if self._interfaces is None:
+                if self._released:
+                    msg = ('Shared sub-shapes were read again after all '
+                           'parts were loaded so they are no longer shared '
+                           'with the other parts.')
+                    logger.warning(msg)
+                self.set_interfaces(self.archive.read_shape(self.fn,
+                                                            self.binary))
+            shared = self._interfaces
+            if self._released:
+                self._interfaces = None
+
+            sub_shapes = {}
+            reshape = ShapeBuild_ReShape()
+            for attr, i, k in interfaces:
+                if attr not in sub_shapes:
+                    sub_shapes[attr] = getattr(shape, attr)
+                old = sub_shapes[attr][i].object
+                new = shared[k].object.Oriented(old.Orientation())
+                reshape.Replace(old, new)
+            new_shape = Shape.wrap(reshape.Apply(shape.object))
+
+            # The shared edges only have curves on the surfaces they were
+            # written with, so add the curves on the surfaces of this part
+            edges = set([shared[k] for attr, _, k in interfaces if
+                         attr == 'edges'])
+            if edges:
+                fix = ShapeFix_Edge()
+                for face in new_shape.faces:
+                    for edge in face.edges:
+                        if edge not in edges:
+                            continue
+                        is_seam = BRep_Tool.IsClosed_(edge.object,
+                                                      face.object)
+                        fix.FixAddPCurve(edge.object, face.object, is_seam)
+        return new_shape
+
+
+class _ArchiveLoader(object):
+    """
+    Load a part shape from an archive when called.
+    """
+
+    def __init__(self, shared, fn, interfaces):
+        self.shared = shared
+        self.fn = fn
+        self.interfaces = interfaces
+        self.loaded = False
+        if interfaces:
+            shared.add_pending()
+
+    def __call__(self):
+        shape = self.shared.read(self.fn)
+        shape = self.shared.rebuild(shape, self.interfaces)
+        if self.interfaces:
+            self.shared.release(self)
+        return shape
+
+
+def _write_job(args):
+    shape, fn, binary = args
+    write_brep(shape, fn, binary)
+
+
+def _color_to_list(color):
+    if color is None:
+        return None
+    return [color.Red(), color.Green(), color.Blue()]
+
+
+def _json_metadata(part):
+    """
+    Get the metadata that can be stored in JSON.
+    """
+    data = {}
+    for key, value in part.metadata.items():
+        try:
+            json.dumps({key: value})
+        except (TypeError, ValueError):
+            msg = ('Metadata "{}" of part {} cannot be stored in an '
+                   'archive.'.format(key, part.name))
+            logger.warning(msg)
+            continue
+        data[key] = value
+    return data
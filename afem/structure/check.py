@@ -16,9 +16,19 @@
 # You should have received a copy of the GNU Lesser General Public
 # License along with this library; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+import time
+from collections import Counter
+from multiprocessing.pool import ThreadPool
+
+from afem.config import logger
 from afem.structure.entities import *
+from afem.structure.group import Group, GroupAPI
+from afem.structure.utils import order_parts_by_id
+from afem.topology.check import CheckShape
+from afem.topology.entities import Compound
+from afem.topology.fix import FixShape
 
-__all__ = ["CheckPart"]
+__all__ = ["CheckPart", "CheckGroup"]
 
 
 class CheckPart(object):
@@ -99,3 +109,219 @@ class CheckPart(object):
         :rtype: bool
         """
         return isinstance(part, Rib)
+
+
+def _check_part(args):
+    """
+    Check a part shape and record the errors and elapsed time.
+    """
+    part, geom = args
+    t0 = time.time()
+    check = CheckShape(part.shape, geom)
+    errors = Counter(check.errors)
+    return part, check.is_valid, errors, time.time() - t0
+
+
+class CheckGroup(object):
+    """
+    Check the shapes of all parts in a group and optionally fix the invalid
+    ones. Parts are independent so they are checked concurrently in a thread
+    pool. If requested and any part is invalid, the invalid parts are fixed
+    together using :class:`.FixShape`. Valid parts are not healed, but the
+    context is applied to those sharing sub-shapes with an invalid part so
+    that any replaced sub-shapes stay shared. The parts that changed are
+    then checked again.
+
+    :param group: The group. If ``None`` then the active group is used.
+    :type group: str or afem.structure.group.Group or None
+    :param bool include_subgroup: Option to recursively include parts
+        from any subgroups.
+    :param bool fix: Option to fix the invalid parts.
+    :param bool geom: Option to check geometry in addition to topology.
+    :param int nthreads: Number of threads. If not provided then the number
+        of CPUs is used.
+    :param float precision: Basic precision value used for fixing.
+    :param float min_tol: Minimum allowed tolerance used for fixing.
+    :param float max_tol: Maximum allowed tolerance used for fixing.
+
+    :raise TypeError: If an :class:`.Group` instance is not found.
+    """
+
+    def __init__(self, group=None, include_subgroup=True, fix=False,
+                 geom=True, nthreads=None, precision=None, min_tol=None,
+                 max_tol=None):
+        group = GroupAPI.get_group(group)
+        if not isinstance(group, Group):
+            raise TypeError('Could not find group.')
+
+        t0 = time.time()
+        parts = order_parts_by_id(group.get_parts(include_subgroup))
+        self._results = {}
+        for part in parts:
+            self._results[part] = {'valid': True,
+                                   'errors': Counter(),
+                                   'check_time': 0.,
+                                   'fixed': False,
+                                   'fix_time': 0.}
+        self._parts = parts
+
+        self._fix_time = 0.
+        pool = ThreadPool(nthreads)
+        try:
+            self._check(pool, parts, geom)
+
+            if fix and self.invalid_parts:
+                self._fix(precision, min_tol, max_tol)
+                self._check(pool, self.fixed_parts, geom)
+        finally:
+            pool.close()
+            pool.join()
+
+        self._time = time.time() - t0
+
+        msg = ' '.join(['Checked', str(len(parts)), 'part(s) in',
+                        '{:.3f}'.format(self._time), 'seconds with',
+                        str(len(self.invalid_parts)), 'invalid.'])
+        logger.info(msg)
+
+    def _check(self, pool, parts, geom):
+        """
+        Check the parts in the thread pool and update the results.
+        """
+        args = [(part, geom) for part in parts]
+        for part, is_valid, errors, dt in pool.map(_check_part, args):
+            results = self._results[part]
+            results['valid'] = is_valid
+            results['errors'] = errors
+            results['check_time'] += dt
+
+    def _fix(self, precision, min_tol, max_tol):
+        """
+        Fix the invalid parts using a single context and apply it to them and
+        to their neighbors.
+        """
+        t0 = time.time()
+        invalid = self.invalid_parts
+        shapes = [part.shape for part in invalid]
+        vertices = set()
+        for shape in shapes:
+            vertices.update(shape.vertices)
+
+        compound = Compound.by_shapes(shapes)
+        fix = FixShape(compound, precision, min_tol, max_tol)
+        fixed = []
+        for part in invalid:
+            part.set_shape(fix.apply(part.shape))
+            fixed.append(part)
+
+        # Only propagate replaced sub-shapes to valid neighbors
+        for part in self._parts:
+            if part in fixed:
+                continue
+            shape = part.shape
+            if not any(v in vertices for v in shape.vertices):
+                continue
+            new_shape = fix.apply(shape)
+            if not new_shape.is_same(shape):
+                part.set_shape(new_shape)
+                fixed.append(part)
+        self._fix_time = time.time() - t0
+
+        dt = self._fix_time / len(fixed) if fixed else 0.
+        for part in fixed:
+            results = self._results[part]
+            results['fixed'] = True
+            results['fix_time'] = dt
+
+    @property
+    def is_valid(self):
+        """
+        :return: *True* if all parts are valid, *False* if not.
+        :rtype: bool
+        """
+        return not self.invalid_parts
+
+    @property
+    def parts(self):
+        """
+        :return: The parts that were checked sorted by their ID.
+        :rtype: list(afem.structure.entities.Part)
+        """
+        return self._parts
+
+    @property
+    def invalid_parts(self):
+        """
+        :return: The invalid parts sorted by their ID.
+        :rtype: list(afem.structure.entities.Part)
+        """
+        return [part for part in self._parts
+                if not self._results[part]['valid']]
+
+    @property
+    def fixed_parts(self):
+        """
+        :return: The parts that were fixed sorted by their ID.
+        :rtype: list(afem.structure.entities.Part)
+        """
+        return [part for part in self._parts if self._results[part]['fixed']]
+
+    @property
+    def time(self):
+        """
+        :return: Total elapsed time in seconds.
+        :rtype: float
+        """
+        return self._time
+
+    @property
+    def fix_time(self):
+        """
+        :return: Elapsed time in seconds to fix the parts, including applying
+            the shared context to each part. The time of each fixed part in
+            the report is its share of this total.
+        :rtype: float
+        """
+        return self._fix_time
+
+    @property
+    def report(self):
+        """
+        :return: A report for each part sorted by their ID. Each entry is a
+            dictionary with the keys "id", "name", "valid", "errors",
+            "check_time", "fixed", and "fix_time". The "errors" value is a
+            dictionary mapping (sub-shape type, error name) to the number of
+            occurrences after any fixes.
+        :rtype: list(dict)
+        """
+        report = []
+        for part in self._parts:
+            results = self._results[part]
+            entry = {'id': part.id, 'name': part.name}
+            entry.update(results)
+            entry['errors'] = dict(results['errors'])
+            report.append(entry)
+        return report
+
+    def errors(self, part):
+        """
+        Get the errors of a part.
+
+        :param afem.structure.entities.Part part: The part.
+
+        :return: Dictionary mapping (sub-shape type, error name) to the number
+            of occurrences.
+        :rtype: dict
+        """
+        return dict(self._results[part]['errors'])
+
+    def log_report(self):
+        """
+        Log the errors of the invalid parts at the "info" level.
+
+        :return: None.
+        """
+        for part in self.invalid_parts:
+            logger.info(' '.join(['Invalid part:', part.name]))
+            for (type_, error), n in self._results[part]['errors'].items():
+                logger.info('\t{0}: {1} ({2})'.format(type_, error, n))
@@ -23,6 +23,7 @@ from afem.adaptor.entities import WireAdaptorCurve
 from afem.geometry.check import CheckGeom
 from afem.geometry.create import *
 from afem.geometry.entities import *
+from afem.misc.profiler import ProfiledBuilderType
 from afem.structure.entities import *
 from afem.topology.bop import *
 from afem.topology.create import *
@@ -99,7 +100,7 @@ class CreatePartByName(object):
         return self._part
 
 
-class PartBuilder(object):
+class PartBuilder(object, metaclass=ProfiledBuilderType):
     """
     Base class for creating a part.
 
@@ -128,7 +129,7 @@ class PartBuilder(object):
         return self._part
 
 
-class PartsBuilder(object):
+class PartsBuilder(object, metaclass=ProfiledBuilderType):
     """
     Base class for creating multiple parts.
     """
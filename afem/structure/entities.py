@@ -20,17 +20,23 @@ from numpy import mean
 
 from afem.base.entities import ShapeHolder, NamedItem
 from afem.config import logger
+from afem.fem.properties import Property
 from afem.geometry.check import CheckGeom
 from afem.geometry.create import (PlaneByNormal, PlaneFromParameter,
                                   PointFromParameter, PointsAlongCurveByNumber)
-from afem.geometry.entities import Axis1, Plane, TrimmedCurve
+from afem.geometry.entities import (Axis1, Axis3, Direction, Plane, Point,
+                                    TrimmedCurve)
 from afem.geometry.project import (ProjectPointToCurve,
-                                   ProjectPointToSurface)
+                                   ProjectPointToSurface,
+                                   ProjectPointsToCurve,
+                                   ProjectPointsToSurface)
+from afem.misc.profiler import profile_part
 from afem.structure.group import GroupAPI
 from afem.topology.bop import (CutCylindricalHole, CutShapes, FuseShapes,
                                IntersectShapes, LocalSplit, SplitShapes)
 from afem.topology.check import CheckShape, ClassifyPointInSolid
-from afem.topology.create import (CompoundByShapes, HalfspaceBySurface,
+from afem.topology.create import (CompoundByShapes, CylinderByAxis,
+                                  HalfspaceBySurface,
                                   PointAlongShape, PointsAlongShapeByDistance,
                                   PointsAlongShapeByNumber,
                                   ShellByFaces, WiresByShape, FaceByPlane,
@@ -42,6 +48,8 @@ from afem.topology.modify import (RebuildShapeByTool,
                                   RebuildShapeWithShapes, RebuildShapesByTool,
                                   SewShape, UnifyShape)
 from afem.topology.props import LengthOfShapes, LinearProps, SurfaceProps
+from afem.topology.section import SectionBodyAtPlanes
+from afem.topology.transform import mirror_shape
 
 __all__ = ["Part", "CurvePart", "Beam1D", "SurfacePart", "WingPart", "Spar",
            "Rib", "FuselagePart", "Bulkhead", "Floor", "Frame", "Skin",
@@ -106,6 +114,7 @@ class Part(NamedItem, ShapeHolder):
         Part._indx += 1
 
         # Geometry data
+        self._mirror_data = None
         self._cref, self._sref = None, None
         if cref is not None:
             self.set_cref(cref)
@@ -114,6 +123,7 @@ class Part(NamedItem, ShapeHolder):
 
         # Other data
         self._subparts = {}
+        self._prop = None
 
         # Add to group
         GroupAPI.add_parts(group, self)
@@ -122,6 +132,27 @@ class Part(NamedItem, ShapeHolder):
         msg = ' '.join(['Creating part:', name])
         logger.info(msg)
 
+    @property
+    def _sref(self):
+        if self._mirror_data is not None:
+            self._mirror_sref()
+        return self._sref_data
+
+    @_sref.setter
+    def _sref(self, sref):
+        self._mirror_data = None
+        self._sref_data = sref
+
+    def _mirror_sref(self):
+        """
+        Copy and mirror the reference surface of a mirrored instance.
+        """
+        sref, pln = self._mirror_data
+        self._mirror_data = None
+        sref = sref.copy()
+        sref.mirror(pln)
+        self._sref_data = sref
+
     @property
     def type(self):
         """
@@ -138,6 +169,14 @@ class Part(NamedItem, ShapeHolder):
         """
         return self._id
 
+    @property
+    def prop(self):
+        """
+        :return: The FEM property or *None* if not set.
+        :rtype: afem.fem.properties.Property or None
+        """
+        return self._prop
+
     @property
     def is_null(self):
         """
@@ -208,6 +247,8 @@ class Part(NamedItem, ShapeHolder):
         :return: *True* if part has a reference surface, *False* if not.
         :rtype: bool
         """
+        if self._mirror_data is not None:
+            return True
         return CheckGeom.is_surface(self._sref)
 
     @property
@@ -343,6 +384,21 @@ class Part(NamedItem, ShapeHolder):
         ds = self.submesh.ds
         return [n for n in ds.node_iter]
 
+    def set_prop(self, prop):
+        """
+        Set the FEM property of the part.
+
+        :param afem.fem.properties.Property prop: The property.
+
+        :return: None.
+
+        :raise TypeError: If *prop* is not a property.
+        """
+        if not isinstance(prop, Property):
+            msg = 'Invalid property type.'
+            raise TypeError(msg)
+        self._prop = prop
+
     def set_cref(self, cref):
         """
         Set the part reference curve.
@@ -525,6 +581,63 @@ class Part(NamedItem, ShapeHolder):
         """
         return self._subparts[key]
 
+    def unload(self, check_shared=True):
+        """
+        Release the shape from memory. A loaded shape is a new shape, so a
+        part that shares sub-shapes with other loaded parts is not unloaded.
+
+        :param bool check_shared: Option to check for shared sub-shapes. Only
+            disable this if it was already checked.
+
+        :return: *True* if the shape is unloaded, *False* if there is no
+            shape, it is pinned, or it shares sub-shapes with other parts.
+        :rtype: bool
+
+        .. seealso:: :meth:`afem.base.entities.ShapeHolder.unload`
+        """
+        if check_shared and GroupAPI.get_master().find_shared_parts([self]):
+            msg = ('Part {} shares sub-shapes with other parts and was not '
+                   'unloaded.'.format(self.name))
+            logger.warning(msg)
+            return False
+        return super(Part, self).unload()
+
+    def mirrored(self, pln, name, instance=False, group=None):
+        """
+        Create a new part of the same type by mirroring this part using the
+        plane. The reference curve and surface are mirrored copies and the
+        FEM property is shared.
+
+        :param afem.geometry.entities.Plane pln: The plane.
+        :param str name: The name of the new part.
+        :param bool instance: Option to create the mirrored shape as an
+            instance that shares the topology and geometry of this part
+            rather than a full copy. The reference surface is then only
+            copied the first time it is used.
+        :param group: The group to add the new part to. If not provided the
+            part will be added to the active group.
+        :type group: str or afem.structure.group.Group or None
+
+        :return: The mirrored part.
+        :rtype: afem.structure.entities.Part
+        """
+        shape = mirror_shape(self.shape, pln, not instance)
+
+        cref, sref = None, None
+        if self._cref is not None:
+            cref = self._cref.copy()
+            cref.mirror(pln)
+        if self._sref is not None and not instance:
+            sref = self._sref.copy()
+            sref.mirror(pln)
+
+        part = self.__class__(name, shape, cref, sref, group)
+        if self._sref is not None and instance:
+            part._mirror_data = (self._sref, pln)
+        if self._prop is not None:
+            part.set_prop(self._prop)
+        return part
+
     def local_to_global_u(self, u):
         """
         Convert local parameter from 0 <= u <= 1 to u1 <= u <= u2 using the
@@ -706,11 +819,15 @@ class Part(NamedItem, ShapeHolder):
             msg = 'Part does not have a reference curve.'
             raise AttributeError(msg)
 
-        success = []
-        for p in pnts:
-            status = self.point_to_cref(p, direction)
-            success.append(status)
-        return success
+        if direction is not None:
+            success = []
+            for p in pnts:
+                status = self.point_to_cref(p, direction)
+                success.append(status)
+            return success
+
+        proj = ProjectPointsToCurve(pnts, self._cref)
+        return self._update_points(pnts, proj)
 
     def point_to_sref(self, pnt, direction=None):
         """
@@ -754,10 +871,26 @@ class Part(NamedItem, ShapeHolder):
             msg = 'Part does not have a reference surface.'
             raise AttributeError(msg)
 
+        if direction is not None:
+            success = []
+            for p in pnts:
+                status = self.point_to_sref(p, direction)
+                success.append(status)
+            return success
+
+        proj = ProjectPointsToSurface(pnts, self._sref)
+        return self._update_points(pnts, proj)
+
+    @staticmethod
+    def _update_points(pnts, proj):
+        """
+        Update the point locations from a batch projection.
+        """
         success = []
-        for p in pnts:
-            status = self.point_to_sref(p, direction)
-            success.append(status)
+        for p, status, xyz in zip(pnts, proj.status, proj.points):
+            if status:
+                p.set_xyz(xyz)
+            success.append(bool(status))
         return success
 
     def plane_from_parameter(self, ds, u0=None, is_rel=False, ref_pln=None,
@@ -874,6 +1007,7 @@ class Part(NamedItem, ShapeHolder):
                         self.name])
         raise RuntimeError(msg)
 
+    @profile_part
     def fix(self, precision=None, min_tol=None, max_tol=None, context=None,
             include_subgroup=True):
         """
@@ -898,7 +1032,9 @@ class Part(NamedItem, ShapeHolder):
                              context).shape
         self.set_shape(new_shape)
 
-    def cut(self, cutter):
+    @profile_part
+    def cut(self, cutter, fuzzy_val=None, parallel=None, use_obb=None,
+            glue=None):
         """
         Cut the part shape and rebuild this part.
 
@@ -906,12 +1042,20 @@ class Part(NamedItem, ShapeHolder):
             converted to a shape before the Boolean operation.
         :type cutter: afem.topology.entities.Shape or
             afem.structure.entities.Part or afem.geometry.entities.Geometry
+        :param float fuzzy_val: Fuzzy tolerance value.
+        :param parallel: Option for parallel execution.
+        :type parallel: bool or str or None
+        :param use_obb: Option to use oriented bounding boxes.
+        :type use_obb: bool or str or None
+        :param glue: Glue option ('off', 'shift', or 'full').
+        :type glue: str or None
 
         :return: *True* if shape was cut, *False* if not.
         :rtype: bool
         """
         cutter = shape_of_entity(cutter)
-        cut = CutShapes(self._shape, cutter)
+        cut = CutShapes(self._shape, cutter, fuzzy_val, parallel=parallel,
+                        use_obb=use_obb, glue=glue)
         if not cut.is_done:
             return False
 
@@ -919,6 +1063,7 @@ class Part(NamedItem, ShapeHolder):
 
         return True
 
+    @profile_part
     def split(self, splitter, rebuild_both=True):
         """
         Split the part shape and rebuild this part. Optionally rebuild the
@@ -981,6 +1126,7 @@ class Part(NamedItem, ShapeHolder):
         self.set_shape(new_shape)
         return True
 
+    @profile_part
     def discard_by_solid(self, solid, tol=None):
         """
         Discard shapes of the part using a solid. Any shapes of the part that
@@ -1007,18 +1153,20 @@ class Part(NamedItem, ShapeHolder):
         if tol is None:
             tol = self.tol_avg
 
-        rebuild = RebuildShapeWithShapes(self._shape)
-        classifer = ClassifyPointInSolid(solid, tol=tol)
-
-        modified = False
+        cgs = []
         for shape in shapes:
             if isinstance(self, CurvePart):
-                cg = LinearProps(shape).cg
+                cgs.append(LinearProps(shape).cg)
             else:
-                cg = SurfaceProps(shape).cg
+                cgs.append(SurfaceProps(shape).cg)
 
-            classifer.perform(cg, tol)
-            if classifer.is_in:
+        classifer = ClassifyPointInSolid(solid, tol=tol)
+        codes = classifer.classify_points(cgs, tol)
+
+        rebuild = RebuildShapeWithShapes(self._shape)
+        modified = False
+        for shape, code in zip(shapes, codes):
+            if code == ClassifyPointInSolid.IN:
                 rebuild.remove(shape)
                 modified = True
 
@@ -1297,6 +1445,7 @@ class SurfacePart(Part):
         """
         return ShellByFaces(self.faces).shell
 
+    @profile_part
     def fuse(self, *other_parts):
         """
         Fuse with other surface parts and rebuild both.
@@ -1326,6 +1475,7 @@ class SurfacePart(Part):
 
         return True
 
+    @profile_part
     def sew(self, *other_parts):
         """
         Sew with other parts and rebuild all parts.
@@ -1355,6 +1505,7 @@ class SurfacePart(Part):
             part.set_shape(mod_shape)
         return True
 
+    @profile_part
     def merge(self, other, unify=False):
         """
         Merge other surface part or shape with this one.
@@ -1429,6 +1580,7 @@ class SurfacePart(Part):
         nodes2 = set(other.nodes)
         return list(nodes1 & nodes2)
 
+    @profile_part
     def cut_hole(self, d, ds, u0=None, is_rel=False):
         """
         Cut a hole in the part and update its shape.
@@ -1479,15 +1631,20 @@ class SurfacePart(Part):
 
         return bop.is_done
 
-    def cut_holes(self, n, d):
+    def hole_axes(self, n):
         """
-        Cut holes along the reference curve at evenly spaced intervals
-        (experimental).
+        Compute the axes of holes along the reference curve at evenly spaced
+        intervals. Each axis is located at the middle of the part section
+        and is normal to the reference surface. The sections at all the
+        locations are computed together from the current part shape using
+        :class:`.SectionBodyAtPlanes` and all the points are inverted on the
+        reference surface at once.
 
         :param int n: The number of holes.
-        :param float d: The diameter.
 
-        :return: None.
+        :return: The hole axes. Locations where a section could not be found
+            are skipped.
+        :rtype: list(afem.geometry.entities.Axis1)
 
         :raise AttributeError: If the part does not have a reference curve or
             surface.
@@ -1496,9 +1653,105 @@ class SurfacePart(Part):
             msg = 'Part does not have a reference curve.'
             raise AttributeError(msg)
 
+        if not self.has_sref:
+            msg = 'Part does not have a reference surface.'
+            raise AttributeError(msg)
+
+        # Section at all locations at once and use the middle point of the
+        # longest section wire at each one
         pac = PointsAlongCurveByNumber(self.cref, n + 2)
-        for u in pac.parameters[1:-1]:
-            self.cut_hole(d, 0., u)
+        planes = [self.plane_from_parameter(0., u) for u in
+                  pac.parameters[1:-1]]
+        builder = SectionBodyAtPlanes(self._shape, planes)
+        pnts = []
+        for wires in builder.sections:
+            if not wires:
+                continue
+            los = LengthOfShapes(wires)
+            wire = los.longest_shape
+            if not isinstance(wire, Wire):
+                continue
+            p = PointAlongShape(wire, los.max_length / 2.).point
+            pnts.append(p)
+
+        if not pnts:
+            return []
+
+        # Invert all points at once and use the surface normals
+        proj = ProjectPointsToSurface(pnts, self._sref)
+        axes = []
+        for p, status, (u, v) in zip(pnts, proj.status, proj.parameters):
+            if not status:
+                continue
+            vn = CheckGeom.to_direction(self._sref.norm(u, v))
+            axes.append(Axis1(p, vn))
+        return axes
+
+    @staticmethod
+    def hole_cylinders(axes, d, height=None):
+        """
+        Create solid cylinders used to cut holes. Each cylinder is centered
+        at the origin of its axis.
+
+        :param collections.Sequence(afem.geometry.entities.Axis1) axes: The
+            hole axes.
+        :param float d: The diameter.
+        :param float height: The height of the cylinders. If not provided
+            then the diameter is used.
+
+        :return: The cylinders.
+        :rtype: list(afem.topology.entities.Solid)
+        """
+        if height is None:
+            height = d
+        r = d / 2.
+
+        cylinders = []
+        for ax1 in axes:
+            p = ax1.origin
+            vn = Direction(ax1.Direction())
+            p0 = Point(*(p.xyz - 0.5 * height * vn.xyz))
+            ax3 = Axis3(p0, vn)
+            cylinders.append(CylinderByAxis(r, height, ax3).solid)
+        return cylinders
+
+    @profile_part
+    def cut_holes(self, n, d, height=None):
+        """
+        Cut holes along the reference curve at evenly spaced intervals
+        (experimental). All the hole axes are computed first and then the
+        holes are cut from the part using a single Boolean operation.
+
+        :param int n: The number of holes.
+        :param float d: The diameter.
+        :param float height: The height of the cylinders used to cut the
+            holes. If not provided then the diameter is used.
+
+        :return: *True* if the holes were cut, *False* if not.
+        :rtype: bool
+
+        :raise AttributeError: If the part does not have a reference curve or
+            surface.
+
+        .. seealso::
+
+            :class:`afem.structure.modify.CutHoles` to cut holes in many
+            parts at once.
+        """
+        axes = self.hole_axes(n)
+        if not axes:
+            return False
+
+        tools = self.hole_cylinders(axes, d, height)
+        bop = CutShapes()
+        bop.set_args([self._shape])
+        bop.set_tools(tools)
+        bop.build()
+        if not bop.is_done:
+            return False
+
+        self.rebuild(bop)
+        return True
 
 
 class WingPart(SurfacePart):
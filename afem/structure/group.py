@@ -16,8 +16,10 @@
 # You should have received a copy of the GNU Lesser General Public
 # License along with this library; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+from multiprocessing.pool import ThreadPool
+
 from afem.base.entities import NamedItem
-from afem.exchange.xde import XdeDocument
+from afem.config import logger
 from afem.structure.utils import order_parts_by_id
 from afem.topology.create import CompoundByShapes, EdgeByCurve, FaceBySurface
 
@@ -49,6 +51,14 @@ class Group(NamedItem):
         """
         return self._parent
 
+    @property
+    def children(self):
+        """
+        :return: List of the subgroups sorted by name.
+        :rtype: list(afem.structure.group.Group)
+        """
+        return sorted(self._children, key=lambda g: g.name)
+
     @property
     def parts(self):
         """
@@ -134,6 +144,142 @@ class Group(NamedItem):
         part = self.get_part(name)
         self._parts.discard(part)
 
+    def unload(self, include_subgroup=True):
+        """
+        Release the shapes of the parts from memory. Shapes that were not
+        loaded from a file are spilled to disk first. Each shape is loaded
+        again the first time it is needed. A loaded shape is a new shape, so
+        parts that share sub-shapes with other loaded parts are skipped with
+        a warning.
+
+        :param bool include_subgroup: Option to recursively include parts
+            from any subgroups.
+
+        :return: The number of unloaded parts.
+        :rtype: int
+        """
+        parts = [part for part in self.get_parts(include_subgroup) if
+                 part.is_loaded]
+        shared = self.find_shared_parts(parts)
+        if shared:
+            names = [part.name for part in parts if part in shared]
+            msg = ('Parts sharing sub-shapes with other parts were not '
+                   'unloaded: {}.'.format(', '.join(names)))
+            logger.warning(msg)
+
+        n = 0
+        for part in parts:
+            if part not in shared and part.unload(False):
+                n += 1
+        return n
+
+    def find_shared_parts(self, parts=None, include_subgroup=True):
+        """
+        Find the parts that share vertices, and so any edges or faces, with
+        other parts of the model. Only loaded parts are checked and no
+        shapes are loaded.
+
+        :param parts: The parts to check. If *None* then the parts of the
+            group are used.
+        :type parts: collections.Sequence(afem.structure.entities.Part) or
+            None
+        :param bool include_subgroup: Option to recursively include parts
+            from any subgroups if *parts* is not provided.
+
+        :return: The parts sharing sub-shapes.
+        :rtype: set(afem.structure.entities.Part)
+        """
+        if parts is None:
+            parts = self.get_parts(include_subgroup)
+        parts = [part for part in parts if part.loaded_shape is not None]
+        if not parts:
+            return set()
+
+        owners = {}
+        for part in GroupAPI.get_master().get_parts():
+            shape = part.loaded_shape
+            if shape is None:
+                continue
+            for v in shape.vertices:
+                owners.setdefault(v, set()).add(part)
+
+        shared = set()
+        for part in parts:
+            for v in part.loaded_shape.vertices:
+                if len(owners[v]) > 1:
+                    shared.add(part)
+                    break
+        return shared
+
+    def preload(self, include_subgroup=True, nthreads=None):
+        """
+        Load the shapes of any unloaded parts ahead of time.
+
+        :param bool include_subgroup: Option to recursively include parts
+            from any subgroups.
+        :param int nthreads: Number of threads used to read shapes. If
+            *None* then the number of CPUs is used.
+
+        :return: The number of loaded parts.
+        :rtype: int
+        """
+        parts = [part for part in self.get_parts(include_subgroup) if
+                 not part.is_loaded]
+        if not parts:
+            return 0
+
+        pool = ThreadPool(nthreads)
+        try:
+            pool.map(lambda part: part.load_shape(), parts)
+        finally:
+            pool.close()
+            pool.join()
+        return len(parts)
+
+    def set_evictable(self, evictable=True, include_subgroup=True):
+        """
+        Set whether the shapes of the parts can be unloaded automatically by
+        :class:`.ShapeCache`. A part shape loaded again is a new shape, so
+        parts can only be made evictable if they do not share any vertices,
+        edges, or faces with other parts in the model and are not used in a
+        mesh.
+
+        :param bool evictable: The option.
+        :param bool include_subgroup: Option to recursively include parts
+            from any subgroups.
+
+        :return: None.
+
+        :raise ValueError: If a part is pinned (e.g., used in a mesh) or
+            shares sub-shapes with other parts.
+        """
+        parts = self.get_parts(include_subgroup)
+        if evictable:
+            pinned = [part.name for part in parts if part.is_pinned]
+            if pinned:
+                msg = ('Parts used in a mesh cannot be evictable: '
+                       '{}.'.format(', '.join(pinned)))
+                raise ValueError(msg)
+
+            # Shared sub-shapes have shared vertices
+            owners = {}
+            for part in GroupAPI.get_group('_master').get_parts():
+                for v in part.shape.vertices:
+                    owners.setdefault(v, set()).add(part)
+            shared = []
+            for part in parts:
+                for v in part.shape.vertices:
+                    if len(owners[v]) > 1:
+                        shared.append(part.name)
+                        break
+            if shared:
+                msg = ('Parts sharing sub-shapes with other parts cannot be '
+                       'evictable: {}.'.format(', '.join(shared)))
+                raise ValueError(msg)
+
+        for part in parts:
+            part.set_evictable(evictable)
+
     def prepare_shape_to_mesh(self, include_subgroup=True):
         """
         Prepare a shape to mesh using the parts in the group and its
@@ -145,9 +291,31 @@ class Group(NamedItem):
 
         :return: The parts as a compound.
         :rtype: afem.topology.entities.Compound
+
+        .. note::
+
+            The part shapes are pinned in memory since the mesh refers to
+            them, so they are not unloaded or made evictable. Use
+            :meth:`unpin` once the mesh is no longer needed.
         """
+        for part in self.get_parts(include_subgroup):
+            part.pin()
         return self.as_compound(include_subgroup)
 
+    def unpin(self, include_subgroup=True):
+        """
+        Unpin the shapes of the parts (e.g., after
+        :meth:`prepare_shape_to_mesh` once the mesh is no longer needed) so
+        they can be unloaded or made evictable again.
+
+        :param bool include_subgroup: Option to recursively include parts
+            from any subgroups.
+
+        :return: None.
+        """
+        for part in self.get_parts(include_subgroup):
+            part.unpin()
+
     def as_compound(self, include_subgroup=True):
         """
         Build a Compound from all the parts of the group.
@@ -356,7 +524,9 @@ class GroupAPI(object):
         """
         Prepare a shape to mesh using the parts in the group and its
         subgroups. This puts all the parts into a single compound which
-        can be used as the master shape for the meshing process.
+        can be used as the master shape for the meshing process. The part
+        shapes are pinned in memory since the mesh refers to them. Use
+        :meth:`unpin` once the mesh is no longer needed.
 
         :param group: The group. If ``None`` then the active group is
             used. By default the master model is used.
@@ -370,6 +540,23 @@ class GroupAPI(object):
         group = cls.get_group(group)
         return group.prepare_shape_to_mesh(include_subgroup)
 
+    @classmethod
+    def unpin(cls, group='_master', include_subgroup=True):
+        """
+        Unpin the shapes of the parts so they can be unloaded or made
+        evictable again.
+
+        :param group: The group. If ``None`` then the active group is
+            used. By default the master model is used.
+        :type group: str or afem.structure.group.Group or None
+        :param bool include_subgroup: Option to recursively include parts
+            from any subgroups.
+
+        :return: None.
+        """
+        group = cls.get_group(group)
+        group.unpin(include_subgroup)
+
     @classmethod
     def as_compound(cls, group='_master', include_subgroup=True):
         """
@@ -399,6 +586,8 @@ class GroupAPI(object):
         :return: *True* if saved, *False* otherwise.
         :rtype: bool
         """
+        from afem.exchange.xde import XdeDocument
+
         group = cls.get_master()
 
         # Create document and application
@@ -441,6 +630,7 @@ class GroupAPI(object):
 
         :raise TypeError: If the file extension type is not supported.
         """
+        from afem.exchange.xde import XdeDocument
         from afem.structure.create import CreatePartByName
 
         if fn.endswith('.xbf'):
@@ -16,13 +16,16 @@
 # You should have received a copy of the GNU Lesser General Public
 # License along with this library; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
-from numpy import mean
+from OCCT.TopTools import TopTools_IndexedMapOfShape
+from numpy import array, mean, nonzero
 
+from afem.config import logger
 from afem.structure.entities import SurfacePart
 from afem.topology.bop import FuseShapes, IntersectShapes, SplitShapes
 from afem.topology.create import CompoundByShapes, EdgeByCurve
-from afem.topology.entities import Shape
-from afem.topology.modify import RebuildShapesByTool, SewShape
+from afem.topology.entities import BBox, Shape
+from afem.topology.modify import (RebuildShapesByTool, RebuildShapeWithShapes,
+                                  SewShape)
 
 __all__ = ["FuseSurfaceParts", "FuseSurfacePartsByCref", "CutParts",
            "SewSurfaceParts", "SplitParts", "FuseGroups"]
@@ -37,10 +40,25 @@ class FuseSurfaceParts(object):
     :param parts: The other surface parts.
     :type tools: collections.Sequence(afem.structure.entities.SurfacePart)
     :param float fuzzy_val: Fuzzy tolerance value.
+    :param parallel: Option for parallel execution of the Boolean
+        operation. If *None* then the global setting is used.
+    :type parallel: bool or str or None
+    :param use_obb: Option to use oriented bounding boxes.
+    :type use_obb: bool or str or None
+    :param glue: Glue option ('off', 'shift', or 'full').
+    :type glue: str or None
+
+    .. note::
+
+        The *parallel*, *use_obb*, and *glue* options are passed to the
+        Boolean operation. Use 'auto' to select them from the part shapes.
+        See :class:`.BopAlgo`.
     """
 
-    def __init__(self, parts, tools, fuzzy_val=None):
-        bop = FuseShapes(fuzzy_val=fuzzy_val)
+    def __init__(self, parts, tools, fuzzy_val=None, parallel=None,
+                 use_obb=None, glue=None):
+        bop = FuseShapes(fuzzy_val=fuzzy_val, parallel=parallel,
+                         use_obb=use_obb, glue=glue)
 
         parts = list(parts)
         other_parts = list(tools)
@@ -148,9 +166,24 @@ class CutParts(object):
     :type parts: collections.Sequence(afem.structure.entities.Part)
     :param shape: The shape to cut with.
     :type shape: afem.topology.entities.Shape or afem.geometry.entities.Surface
+    :param float fuzzy_val: Fuzzy tolerance value.
+    :param parallel: Option for parallel execution of the Boolean
+        operation. If *None* then the global setting is used.
+    :type parallel: bool or str or None
+    :param use_obb: Option to use oriented bounding boxes.
+    :type use_obb: bool or str or None
+    :param glue: Glue option ('off', 'shift', or 'full').
+    :type glue: str or None
+
+    .. note::
+
+        The *parallel*, *use_obb*, and *glue* options are passed to the
+        Boolean operation. Use 'auto' to select them from the part shapes.
+        See :class:`.BopAlgo`.
     """
 
-    def __init__(self, parts, shape):
+    def __init__(self, parts, shape, fuzzy_val=None, parallel=None,
+                 use_obb=None, glue=None):
         parts = list(parts)
 
         shape2 = Shape.to_shape(shape)
@@ -158,7 +191,7 @@ class CutParts(object):
         # Loop through each since since that seems to be more robust
         self._status = {}
         for part in parts:
-            status = part.cut(shape2)
+            status = part.cut(shape2, fuzzy_val, parallel, use_obb, glue)
             self._status[part] = status
 
         # shapes = [part.shape for part in parts]
@@ -230,10 +263,25 @@ class SplitParts(object):
         modified.
     :type tools: collection.Sequence(afem.structure.entities.Part)
     :param float fuzzy_val: Fuzzy tolerance value.
+    :param parallel: Option for parallel execution of the Boolean
+        operation. If *None* then the global setting is used.
+    :type parallel: bool or str or None
+    :param use_obb: Option to use oriented bounding boxes.
+    :type use_obb: bool or str or None
+    :param glue: Glue option ('off', 'shift', or 'full').
+    :type glue: str or None
+
+    .. note::
+
+        The *parallel*, *use_obb*, and *glue* options are passed to the
+        Boolean operation. Use 'auto' to select them from the part shapes.
+        See :class:`.BopAlgo`.
     """
 
-    def __init__(self, parts, tools=None, fuzzy_val=None):
-        bop = SplitShapes(fuzzy_val=fuzzy_val)
+    def __init__(self, parts, tools=None, fuzzy_val=None, parallel=None,
+                 use_obb=None, glue=None):
+        bop = SplitShapes(fuzzy_val=fuzzy_val, parallel=parallel,
+                          use_obb=use_obb, glue=glue)
 
         args = [part.shape for part in parts]
         bop.set_args(args)
@@ -279,18 +327,70 @@ class FuseGroups(object):
     :param float fuzzy_val: Fuzzy tolerance value.
     :param bool include_subgroup: Option to recursively include parts
             from all subgroups.
+    :param parallel: Option for parallel execution of the Boolean
+        operation. If *None* then the global setting is used.
+    :type parallel: bool or str or None
+    :param use_obb: Option to use oriented bounding boxes.
+    :type use_obb: bool or str or None
+    :param glue: Glue option ('off', 'shift', or 'full').
+    :type glue: str or None
+    :param bool hierarchical: Option to fuse the groups hierarchically
+        using only the sub-shapes near their interfaces. See the note below.
+    :param float gap: Extra distance added to bounding boxes when detecting
+        interfaces in hierarchical mode.
 
     :raise ValueError: If less than two groups are provided.
+
+    .. note::
+
+        The *parallel*, *use_obb*, and *glue* options are passed to the
+        Boolean operation. Use 'auto' to select them from the part shapes.
+        See :class:`.BopAlgo`.
+
+    .. note::
+
+        In hierarchical mode the subgroups of each group are fused to each
+        other first (if *include_subgroup* is *True*), starting at the
+        deepest level, with the parts that belong directly to a group
+        treated as one more subgroup. The groups are then fused to each
+        other. At each level, interfaces are detected using the bounding
+        boxes of the parts and then of their faces (or edges for curve
+        parts), and only the overlapping faces and their neighbors are
+        given to the Boolean operation. Part shapes are rebuilt by
+        substituting only those faces, so time and memory scale with the
+        size of the interfaces rather than the size of the model. As with
+        the default mode, parts within the same (sub)group are not fused to
+        each other.
     """
 
-    def __init__(self, groups, fuzzy_val=None, include_subgroup=True):
+    def __init__(self, groups, fuzzy_val=None, include_subgroup=True,
+                 parallel=None, use_obb=None, glue=None, hierarchical=False,
+                 gap=0.):
         if len(groups) < 2:
             raise ValueError('Not enough groups to fuse. Need at least '
                              'two.')
 
-        bop = FuseShapes(fuzzy_val=fuzzy_val)
-
         groups = list(groups)
+        self._bop = None
+        self._all_parts = []
+        for group in groups:
+            self._all_parts += group.get_parts(include_subgroup)
+
+        if hierarchical:
+            fuse = _InterfaceFuse(fuzzy_val, gap, parallel, use_obb, glue)
+            if include_subgroup:
+                for group in groups:
+                    fuse.fuse_subgroups(group)
+            fuse.fuse_units([group.get_parts(include_subgroup) for
+                             group in groups])
+            self._is_done = fuse.is_done
+            self._nbops = fuse.nbops
+            self._ninterface = fuse.ninterface
+            return
+
+        bop = FuseShapes(fuzzy_val=fuzzy_val, parallel=parallel,
+                         use_obb=use_obb, glue=glue)
+
         parts1 = groups[0].get_parts(include_subgroup)
         shapes1 = [part.shape for part in parts1]
         shape1 = CompoundByShapes(shapes1).compound
@@ -316,19 +416,218 @@ class FuseGroups(object):
             part.set_shape(new_shape)
 
         self._bop = bop
+        self._is_done = bop.is_done
+        self._nbops = 1
+        self._ninterface = None
 
     @property
     def is_done(self):
         """
-        :return: *True* if operation is done, *False* if not.
+        :return: *True* if operation is done, *False* if not. In
+            hierarchical mode this is *True* only if every Boolean operation
+            is done.
         :rtype: bool
         """
-        return self._bop.is_done
+        return self._is_done
 
     @property
     def shape(self):
         """
-        :return: The fused shape.
+        :return: The fused shape. In hierarchical mode this is a compound of
+            the rebuilt part shapes.
         :rtype: afem.topology.entities.Shape
         """
-        return self._bop.shape
+        if self._bop is not None:
+            return self._bop.shape
+        shapes = [part.shape for part in self._all_parts]
+        return CompoundByShapes(shapes).compound
+
+    @property
+    def nbops(self):
+        """
+        :return: The number of Boolean operations performed.
+        :rtype: int
+        """
+        return self._nbops
+
+    @property
+    def ninterface(self):
+        """
+        :return: The total number of faces (or edges) given to the Boolean
+            operations in hierarchical mode. *None* in the default mode.
+        :rtype: int or None
+        """
+        return self._ninterface
+
+
+def _boxes(shapes):
+    """
+    Bounding boxes of shapes as an array of [xmin, ymin, zmin, xmax, ymax,
+    zmax].
+    """
+    boxes = []
+    for shape in shapes:
+        bbox = BBox()
+        bbox.add_shape(shape)
+        if bbox.is_void:
+            # Box that does not overlap anything
+            boxes.append([1., 1., 1., -1., -1., -1.])
+            continue
+        boxes.append([bbox.xmin, bbox.ymin, bbox.zmin,
+                      bbox.xmax, bbox.ymax, bbox.zmax])
+    return array(boxes, dtype=float).reshape(-1, 6)
+
+
+def _overlap(boxes1, boxes2, tol):
+    """
+    Matrix of overlapping boxes.
+    """
+    lo = (boxes1[:, None, :3] <= boxes2[None, :, 3:] + tol).all(axis=2)
+    hi = (boxes1[:, None, 3:] >= boxes2[None, :, :3] - tol).all(axis=2)
+    return lo & hi
+
+
+def _elements(shape):
+    """
+    The faces of a shape, or its edges if it has no faces.
+    """
+    faces = shape.faces
+    if faces:
+        return faces, [f.edges for f in faces]
+    edges = shape.edges
+    return edges, [e.vertices for e in edges]
+
+
+def _one_ring(subshapes, indices):
+    """
+    Add the elements that share a sub-shape with the given elements.
+    """
+    adjacent = {}
+    for i, subs in enumerate(subshapes):
+        for sub in subs:
+            adjacent.setdefault(sub, []).append(i)
+
+    ring = set(indices)
+    for i in indices:
+        for sub in subshapes[i]:
+            ring.update(adjacent[sub])
+    return ring
+
+
+class _InterfaceFuse(object):
+    """
+    Fuse units of parts using only the sub-shapes near their interfaces.
+    """
+
+    def __init__(self, fuzzy_val, gap, parallel, use_obb, glue):
+        self._fuzzy_val = fuzzy_val
+        self._tol = gap
+        if fuzzy_val is not None:
+            self._tol += fuzzy_val
+        self._options = {'parallel': parallel, 'use_obb': use_obb,
+                         'glue': glue}
+        self.is_done = True
+        self.nbops = 0
+        self.ninterface = 0
+
+    def fuse_subgroups(self, group):
+        children = group.children
+        if not children:
+            return
+
+        # Deepest level first
+        for child in children:
+            self.fuse_subgroups(child)
+
+        units = [child.get_parts(True) for child in children]
+        units.append(group.get_parts(False))
+        self.fuse_units(units)
+
+    def fuse_units(self, units):
+        units = [list(unit) for unit in units if unit]
+        if len(units) < 2:
+            return
+
+        parts, owners = [], []
+        for i, unit in enumerate(units):
+            parts += unit
+            owners += [i] * len(unit)
+        owners = array(owners, dtype=int)
+
+        # Pairs of parts in different units with overlapping boxes
+        tol = self._tol
+        boxes = _boxes([part.shape for part in parts])
+        pairs = _overlap(boxes, boxes, tol)
+        pairs &= owners[:, None] < owners[None, :]
+        ii, jj = nonzero(pairs)
+        if ii.size == 0:
+            return
+
+        # Elements of each part near the interfaces
+        elements = {}
+        selected = {}
+        for i, j in zip(ii, jj):
+            for k in (i, j):
+                if k not in elements:
+                    elms, subs = _elements(parts[k].shape)
+                    elements[k] = (elms, subs, _boxes(elms))
+            bi = elements[i][2]
+            bj = elements[j][2]
+            mi = nonzero(_overlap(bi, boxes[j:j + 1], tol)[:, 0])[0]
+            mj = nonzero(_overlap(bj, boxes[i:i + 1], tol)[:, 0])[0]
+            if mi.size == 0 or mj.size == 0:
+                continue
+            overlap = _overlap(bi[mi], bj[mj], tol)
+            ki = mi[overlap.any(axis=1)]
+            kj = mj[overlap.any(axis=0)]
+            if ki.size == 0:
+                continue
+            selected.setdefault(i, set()).update(ki.tolist())
+            selected.setdefault(j, set()).update(kj.tolist())
+
+        if not selected:
+            return
+
+        # Include neighbors so split boundaries stay shared within a part
+        unit_elms = {}
+        for i in selected:
+            elms, subs, _ = elements[i]
+            selected[i] = sorted(_one_ring(subs, selected[i]))
+            unit_elms.setdefault(owners[i], []).extend(
+                [elms[k] for k in selected[i]])
+            self.ninterface += len(selected[i])
+
+        compounds = [CompoundByShapes(unit_elms[k]).compound for k in
+                     sorted(unit_elms)]
+        bop = FuseShapes(fuzzy_val=self._fuzzy_val, **self._options)
+        bop.set_args(compounds[:1])
+        bop.set_tools(compounds[1:])
+        bop.build()
+        self.nbops += 1
+
+        if not bop.is_done:
+            self.is_done = False
+            logger.warning('Hierarchical fuse failed for an interface of '
+                           '{} parts.'.format(len(selected)))
+            return
+
+        # Rebuild only the interface elements of each part
+        index_map = TopTools_IndexedMapOfShape()
+        for i in sorted(selected):
+            part = parts[i]
+            elms = elements[i][0]
+            rebuild = RebuildShapeWithShapes(part.shape)
+            for k in selected[i]:
+                old_shape = elms[k]
+                if bop.is_deleted(old_shape):
+                    rebuild.remove(old_shape)
+                    continue
+                new_shapes = []
+                for mod_shape in bop.modified(old_shape):
+                    if index_map.Contains(mod_shape.object):
+                        continue
+                    new_shapes.append(mod_shape)
+                    index_map.Add(mod_shape.object)
+                if new_shapes:
+                    rebuild.replace(old_shape, new_shapes)
+            part.set_shape(rebuild.apply())
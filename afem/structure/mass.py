@@ -0,0 +1,243 @@
+# This file is part of AFEM which provides an engineering toolkit for airframe
+# finite element modeling during conceptual design.
+#
+# Copyright (C) 2016-2018  Laughlin Research, LLC (info@laughlinresearch.com)
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+import weakref
+from multiprocessing.pool import ThreadPool
+
+from numpy import array, dot, eye, float64, outer, zeros
+
+from afem.config import logger
+from afem.fem.properties import Shell
+from afem.structure.group import Group, GroupAPI
+from afem.structure.utils import order_parts_by_id
+from afem.topology.props import SurfaceProps
+
+__all__ = ["MassProps"]
+
+# Cached face properties for each part
+_face_cache = weakref.WeakKeyDictionary()
+
+
+def _face_props(face):
+    """
+    Compute the area, centroid, and matrix of inertia about the centroid of
+    a face with unit density.
+    """
+    props = SurfaceProps(face)
+    return face, props.area, array(props.cg.xyz, dtype=float64), \
+        props.matrix_of_inertia
+
+
+def _combine(data):
+    """
+    Combine a list of (mass, cg, inertia) tuples. The inertia of each item is
+    about its own cg and the result is about the combined cg.
+    """
+    mass = 0.
+    moment = zeros(3, dtype=float64)
+    for m, cg, _ in data:
+        mass += m
+        moment += m * cg
+
+    if mass <= 0.:
+        return 0., zeros(3, dtype=float64), zeros((3, 3), dtype=float64)
+
+    cg = moment / mass
+    inertia = zeros((3, 3), dtype=float64)
+    for m, cgi, ii in data:
+        d = cgi - cg
+        inertia += ii + m * (dot(d, d) * eye(3) - outer(d, d))
+    return mass, cg, inertia
+
+
+class MassProps(object):
+    """
+    Compute the mass properties of the parts in a group using the thickness
+    and density of their shell properties. The area, centroid, and inertia
+    of each face are computed concurrently in a thread pool and cached for
+    each part. Faces of a part that have not changed since a previous
+    calculation are not computed again. The results are rolled up for each
+    part, for any group, and for the whole group.
+
+    The cache of a part is checked against its
+    :attr:`~afem.base.entities.ShapeHolder.shape_revision`. If the shape
+    has been set since the last calculation, faces no longer in the shape
+    are dropped and new faces are computed. If the same shape was set again
+    (i.e., it was modified in place) all of its faces are computed again.
+    Face properties are stored for unit density so changing the shell
+    property of a part only changes the roll-up.
+
+    :param group: The group. If ``None`` then the master group is used so
+        that the whole model is included.
+    :type group: str or afem.structure.group.Group or None
+    :param bool include_subgroup: Option to recursively include parts
+        from any subgroups.
+    :param afem.fem.properties.Shell default_prop: The property to use for
+        parts that do not have a shell property assigned. If not provided
+        these parts are skipped.
+    :param int nthreads: Number of threads. If not provided then the number
+        of CPUs is used.
+
+    :raise TypeError: If an :class:`.Group` instance is not found.
+
+    .. note::
+
+        The inertia matrices are about the center of gravity and follow the
+        OpenCASCADE convention where the products of inertia are negative.
+    """
+
+    def __init__(self, group=None, include_subgroup=True, default_prop=None,
+                 nthreads=None):
+        if group is None:
+            group = GroupAPI.get_master()
+        else:
+            group = GroupAPI.get_group(group)
+        if not isinstance(group, Group):
+            raise TypeError('Could not find group.')
+
+        parts = order_parts_by_id(group.get_parts(include_subgroup))
+
+        # Find the faces that need to be computed
+        todo = []
+        for part in parts:
+            rev, ref, cache = _face_cache.get(part, (None, None, {}))
+            if rev == part.shape_revision:
+                continue
+            # The same shape set again was modified in place. A weak
+            # reference is kept so the cache does not prevent unloading.
+            shape = part.shape
+            if ref is not None and ref() is shape:
+                cache = {}
+            faces = shape.faces
+            _face_cache[part] = (part.shape_revision, weakref.ref(shape),
+                                 dict((f, cache[f]) for f in faces
+                                      if f in cache))
+            todo += [(part, f) for f in faces if f not in cache]
+
+        if todo:
+            pool = ThreadPool(nthreads)
+            try:
+                results = pool.map(_face_props, [f for _, f in todo])
+            finally:
+                pool.close()
+                pool.join()
+            for (part, _), (face, area, cg, inertia) in zip(todo, results):
+                _face_cache[part][2][face] = (area, cg, inertia)
+
+        msg = ' '.join(['Computed properties for', str(len(todo)),
+                        'face(s) in', str(len(parts)), 'part(s).'])
+        logger.info(msg)
+
+        # Roll up each part
+        self._group = group
+        self._include_subgroup = include_subgroup
+        self._part_props = {}
+        self._skipped = []
+        for part in parts:
+            prop = part.prop
+            if not isinstance(prop, Shell):
+                prop = default_prop
+            if not isinstance(prop, Shell):
+                self._skipped.append(part)
+                continue
+
+            rho_t = prop.mass_per_area
+            data = [(rho_t * area, cg, rho_t * inertia)
+                    for area, cg, inertia in _face_cache[part][2].values()]
+            self._part_props[part] = _combine(data)
+
+        self._props = _combine(list(self._part_props.values()))
+
+    @property
+    def mass(self):
+        """
+        :return: The total mass.
+        :rtype: float
+        """
+        return self._props[0]
+
+    @property
+    def cg(self):
+        """
+        :return: The center of gravity.
+        :rtype: numpy.ndarray
+        """
+        return self._props[1]
+
+    @property
+    def inertia(self):
+        """
+        :return: The 3 x 3 matrix of inertia about the center of gravity.
+        :rtype: numpy.ndarray
+        """
+        return self._props[2]
+
+    @property
+    def skipped_parts(self):
+        """
+        :return: Parts without a shell property that were skipped.
+        :rtype: list(afem.structure.entities.Part)
+        """
+        return self._skipped
+
+    def part_props(self, part):
+        """
+        Get the mass properties of a part.
+
+        :param afem.structure.entities.Part part: The part.
+
+        :return: The mass, center of gravity, and matrix of inertia about the
+            center of gravity.
+        :rtype: tuple(float, numpy.ndarray, numpy.ndarray)
+
+        :raise KeyError: If the part was not included or was skipped.
+        """
+        return self._part_props[part]
+
+    def group_props(self, group, include_subgroup=True):
+        """
+        Get the mass properties of a group. Only parts that were included in
+        the original calculation are used.
+
+        :param group: The group.
+        :type group: str or afem.structure.group.Group
+        :param bool include_subgroup: Option to recursively include parts
+            from any subgroups.
+
+        :return: The mass, center of gravity, and matrix of inertia about the
+            center of gravity.
+        :rtype: tuple(float, numpy.ndarray, numpy.ndarray)
+
+        :raise TypeError: If an :class:`.Group` instance is not found.
+        """
+        group = GroupAPI.get_group(group)
+        if not isinstance(group, Group):
+            raise TypeError('Could not find group.')
+
+        data = [self._part_props[part] for part in
+                group.get_parts(include_subgroup) if part in self._part_props]
+        return _combine(data)
+
+    @staticmethod
+    def clear_cache():
+        """
+        Clear the cached face properties of all parts.
+
+        :return: None.
+        """
+        _face_cache.clear()
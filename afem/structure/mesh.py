@@ -0,0 +1,488 @@
+# This file is part of AFEM which provides an engineering toolkit for airframe
+# finite element modeling during conceptual design.
+#
+# Copyright (C) 2016-2018  Laughlin Research, LLC (info@laughlinresearch.com)
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
+
+from afem.config import logger
+from afem.smesh.utils import MeshHelper
+from afem.structure.entities import Part
+from afem.structure.group import GroupAPI
+from afem.topology.create import CompoundByShapes
+from afem.topology.entities import Shape
+
+__all__ = ["IncrementalMesh", "MeshRules"]
+
+
+class IncrementalMesh(object):
+    """
+    Compute the mesh of the parts in a group and then re-mesh only the parts
+    whose shapes have changed since the last computation.
+
+    Modifying a part (e.g., cutting a hole or splitting it) gives it new
+    faces and edges, so each computation after the first prepares a new
+    shape to mesh from the current part shapes and creates a new mesh for
+    it. The nodes and elements of the faces of unchanged parts, along with
+    their edges and vertices, are copied from the previous mesh onto the
+    same sub-shapes of the new mesh and marked as computed. Only the faces
+    of the changed parts are then meshed, using the copied nodes on any
+    edges they share with unchanged parts so the mesh stays conformal. A
+    part has changed if its shape was set since the last computation (see
+    :attr:`afem.base.entities.ShapeHolder.shape_revision`), including
+    setting the same shape again after modifying it in place.
+
+    :param afem.smesh.meshes.MeshGen gen: The mesh generator.
+    :param assign_hypotheses: A callable that adds the hypotheses to a new
+        mesh. It is called with the mesh as its only argument each time a
+        mesh is created (e.g., :meth:`MeshRules.apply`).
+    :type assign_hypotheses: collections.Callable
+    :param group: The group of parts. If *None* then the active group is
+        used.
+    :type group: str or afem.structure.group.Group or None
+    :param bool include_subgroup: Option to include parts from any
+        subgroups.
+
+    .. note::
+
+        Only linear edges, triangles, and quadrilaterals are copied. Faces of
+        unchanged parts with other elements are meshed again.
+
+    Usage:
+
+    >>> from afem.smesh import *
+    >>> from afem.structure import *
+    >>> gen = MeshGen()
+    >>> def assign(mesh):
+    ...     mesh.add_hypotheses([NetgenAlgo2D(gen), NetgenSimple2D(gen, 1.)])
+    >>> tool = IncrementalMesh(gen, assign, '_master')
+    >>> status = tool.compute()
+    >>> # Modify a part and set its shape...
+    >>> status = tool.compute()
+    >>> mesh = tool.mesh
+    """
+
+    def __init__(self, gen, assign_hypotheses, group=None,
+                 include_subgroup=True):
+        self._gen = gen
+        self._assign = assign_hypotheses
+        self._group = GroupAPI.get_group(group)
+        self._include_subgroup = include_subgroup
+        self._mesh = None
+        self._revs = None
+        self._nkept = 0
+        self._nmeshed = 0
+
+    @property
+    def mesh(self):
+        """
+        :return: The current mesh or *None* if not computed yet. A new mesh
+            is created for each computation.
+        :rtype: afem.smesh.meshes.Mesh or None
+        """
+        return self._mesh
+
+    @property
+    def is_computed(self):
+        """
+        :return: *True* if the mesh has been computed by this tool, *False*
+            if not.
+        :rtype: bool
+        """
+        return self._revs is not None
+
+    @property
+    def changed_parts(self):
+        """
+        :return: The parts that are new or whose shapes have changed since
+            the last computation.
+        :rtype: list(afem.structure.entities.Part)
+        """
+        parts = self._group.get_parts(self._include_subgroup)
+        if self._revs is None:
+            return parts
+        return [part for part in parts if
+                self._revs.get(part) != part.shape_revision]
+
+    @property
+    def nkept(self):
+        """
+        :return: Number of faces (or edges of parts without faces) whose
+            mesh was copied during the last computation.
+        :rtype: int
+        """
+        return self._nkept
+
+    @property
+    def nmeshed(self):
+        """
+        :return: Number of faces (or edges of parts without faces) meshed
+            during the last computation.
+        :rtype: int
+        """
+        return self._nmeshed
+
+    def compute(self, incremental=True):
+        """
+        Compute the mesh.
+
+        :param bool incremental: Option to copy the mesh of the unchanged
+            parts. If *False* or if the mesh has not been computed by this
+            tool yet, then all the parts are meshed.
+
+        :return: *True* if computed, *False* if not.
+        :rtype: bool
+        """
+        parts = self._group.get_parts(self._include_subgroup)
+        old_mesh = self._mesh
+        if old_mesh is not None and incremental and \
+                set(parts) == set(self._revs) and not self.changed_parts:
+            self._nkept, self._nmeshed = 0, 0
+            return True
+
+        # New mesh for the current part shapes
+        shape = self._group.prepare_shape_to_mesh(self._include_subgroup)
+        mesh = self._gen.create_mesh(shape)
+        self._assign(mesh)
+
+        # Copy the mesh of the unchanged parts
+        kept = []
+        if incremental and old_mesh is not None:
+            changed = set(self.changed_parts)
+            unchanged = [part for part in parts if part not in changed]
+            kept = _MeshCopier(old_mesh, mesh).copy(unchanged)
+
+        nshapes = 0
+        for part in parts:
+            nshapes += len(part.faces) or len(part.edges)
+        self._nkept = len(kept)
+        self._nmeshed = nshapes - len(kept)
+
+        msg = ' '.join(['Meshing', str(self._nmeshed), 'sub-shape(s) and',
+                        'keeping', str(self._nkept)])
+        logger.info(msg)
+
+        status = self._gen.compute(mesh)
+
+        # Parts use the active mesh for their sub-meshes
+        if old_mesh is not None and Part._mesh is old_mesh:
+            Part.set_mesh(mesh)
+        self._mesh = mesh
+        if status:
+            self._revs = {part: part.shape_revision for part in parts}
+        return status
+
+
+class _MeshCopier(object):
+    """
+    Copy the nodes and elements of faces (or edges) from one mesh to the
+    same sub-shapes of another mesh.
+    """
+
+    def __init__(self, old_mesh, new_mesh):
+        self._old = old_mesh
+        self._new = new_mesh
+        self._old_helper = MeshHelper(old_mesh)
+        self._new_helper = MeshHelper(new_mesh)
+        self._nodes = {}
+        self._done = set()
+
+    def copy(self, parts):
+        """
+        Copy the mesh of the faces of the parts, or their edges if a part
+        has no faces, and return the copied shapes.
+        """
+        shapes = []
+        for part in parts:
+            shapes += part.faces or part.edges
+
+        copied = []
+        for shape in shapes:
+            if self._can_copy(shape):
+                self._copy(shape)
+                copied.append(shape)
+        return copied
+
+    def _can_copy(self, shape):
+        """
+        Check the shape is in both meshes, is computed, and only has
+        supported elements.
+        """
+        old_ds, new_ds = self._old.ds, self._new.ds
+        if old_ds.shape_to_index(shape) == 0 or \
+                new_ds.shape_to_index(shape) == 0:
+            return False
+        if not self._old.get_submesh(shape).is_computed:
+            return False
+
+        for sub_shape in [shape] + shape.edges:
+            if not old_ds.has_elements(sub_shape):
+                continue
+            nmax = 4 if sub_shape.shape_type == Shape.FACE else 2
+            for elm in old_ds.mesh_elements(sub_shape).elm_iter:
+                if elm.is_quadratic or not 2 <= elm.num_nodes <= nmax:
+                    return False
+        return True
+
+    def _copy(self, shape):
+        """
+        Copy the nodes and elements of the vertices, edges, and the shape.
+        """
+        sub_shapes = shape.vertices + shape.edges
+        if shape.shape_type == Shape.FACE:
+            sub_shapes.append(shape)
+        for sub_shape in sub_shapes:
+            if sub_shape in self._done:
+                continue
+            self._done.add(sub_shape)
+            self._copy_sub_shape(sub_shape)
+
+    def _copy_sub_shape(self, shape):
+        """
+        Copy the nodes and elements of a single vertex, edge, or face.
+        """
+        old_ds = self._old.ds
+        if not old_ds.has_elements(shape):
+            return None
+
+        smds = old_ds.mesh_elements(shape)
+        old_helper, helper = self._old_helper, self._new_helper
+        helper.set_subshape(shape)
+        shape_type = shape.shape_type
+
+        for node in smds.node_iter:
+            u, v = 0., 0.
+            if shape_type == Shape.EDGE:
+                u = old_helper.node_u(shape, node)
+            elif shape_type == Shape.FACE:
+                u, v = old_helper.node_uv(shape, node)
+            x, y, z = node.xyz
+            self._nodes[node.id] = helper.add_node(x, y, z, 0, u, v)
+
+        for elm in smds.elm_iter:
+            nodes = [self._nodes[n.id] for n in elm.node_iter]
+            if len(nodes) == 2:
+                helper.add_edge(*nodes, force3d=False)
+            else:
+                helper.add_face(*nodes)
+
+        self._new.get_submesh(shape).check_compute_state()
+
+
+class MeshRules(object):
+    """
+    Rules for assigning hypotheses to the faces (or edges) of parts in bulk.
+    Each rule selects parts by type, group, and an optional predicate and
+    the hypotheses are added to a compound of all the selected faces using a
+    single call for each hypothesis rather than one face at a time.
+
+    For each hypothesis dimension, a face is only assigned by the first rule
+    that selects it, so specific rules should be added before general ones.
+    If a rule contains an algorithm with an *is_applicable()* method (e.g.,
+    :class:`.QuadrangleAlgo2D`), only the faces it can mesh are selected.
+    The results of the applicability checks and predicates are cached for
+    each face so that applying the rules again (e.g., to a new mesh) does
+    not analyze the same faces again. Cached results for faces that are no
+    longer in the applied parts are dropped at the end of each application.
+
+    Usage:
+
+    >>> from afem.smesh import *
+    >>> from afem.structure import *
+    >>> shape_to_mesh = GroupAPI.prepare_shape_to_mesh()
+    >>> gen = MeshGen()
+    >>> mesh = gen.create_mesh(shape_to_mesh)
+    >>> mapped_hyp = QuadrangleHypo2D(gen)
+    >>> mapped_algo = QuadrangleAlgo2D(gen)
+    >>> rules = MeshRules()
+    >>> rules.add_rule([mapped_algo, mapped_hyp], rtype=(Spar, Rib))
+    >>> nshapes = rules.apply(mesh, nthreads=4)
+    """
+
+    def __init__(self):
+        self._rules = []
+        self._cache = {}
+
+    @property
+    def nrules(self):
+        """
+        :return: Number of rules.
+        :rtype: int
+        """
+        return len(self._rules)
+
+    @property
+    def ncached(self):
+        """
+        :return: Number of cached applicability checks.
+        :rtype: int
+        """
+        return len(self._cache)
+
+    def add_rule(self, hypotheses, rtype=None, group=None, predicate=None,
+                 shape_type='face'):
+        """
+        Add a rule.
+
+        :param hypotheses: The hypotheses.
+        :type hypotheses:
+            collections.Sequence(afem.smesh.hypotheses.Hypothesis)
+        :param rtype: Select only parts of this type (or types) using
+            *isinstance()*. If *None* then parts of any type are selected.
+        :type rtype: Type[afem.structure.entities.Part] or
+            tuple(Type[afem.structure.entities.Part]) or None
+        :param group: Select only parts in this group or its subgroups. If
+            *None* then parts from any group are selected.
+        :type group: str or afem.structure.group.Group or None
+        :param predicate: Select only the faces (or edges) where this
+            callable returns *True*. It is called with the face (or edge) as
+            its only argument and its results are cached.
+        :type predicate: collections.Callable or None
+        :param str shape_type: Assign the hypotheses to the faces of the
+            parts ('face') or to their edges ('edge').
+
+        :return: None.
+
+        :raise ValueError: If the shape type is not supported.
+        """
+        if shape_type not in ['face', 'edge']:
+            raise ValueError('Unsupported shape type.')
+
+        checks = []
+        for hyp in hypotheses:
+            check = getattr(hyp, 'is_applicable', None)
+            if check is not None:
+                checks.append(check)
+        if predicate is not None:
+            checks.append(predicate)
+
+        if group is not None:
+            group = GroupAPI.get_group(group)
+
+        self._rules.append((list(hypotheses), rtype, group, checks,
+                            shape_type))
+
+    def clear_cache(self):
+        """
+        Clear the cached applicability checks.
+
+        :return: None.
+        """
+        self._cache.clear()
+
+    def apply(self, mesh, group=None, include_subgroup=True, nthreads=1):
+        """
+        Apply the rules to the parts and add the hypotheses to the mesh.
+
+        :param afem.smesh.meshes.Mesh mesh: The mesh.
+        :param group: The group of parts. If *None* then the active group is
+            used.
+        :type group: str or afem.structure.group.Group or None
+        :param bool include_subgroup: Option to include parts from any
+            subgroups.
+        :param int nthreads: Number of threads used to evaluate the
+            applicability checks that are not cached. If *None* then the
+            number of CPUs is used.
+
+        :return: The number of faces (or edges) selected by each rule.
+        :rtype: list(int)
+        """
+        parts = GroupAPI.get_parts(group, include_subgroup)
+
+        # Select the shapes of each rule
+        selected = []
+        todo = set()
+        for _, rtype, rule_group, checks, shape_type in self._rules:
+            rule_parts = parts
+            if rtype is not None:
+                rule_parts = [p for p in rule_parts if isinstance(p, rtype)]
+            if rule_group is not None:
+                members = set(rule_group.get_parts())
+                rule_parts = [p for p in rule_parts if p in members]
+
+            shapes = []
+            for part in rule_parts:
+                if shape_type == 'face':
+                    shapes += part.faces
+                else:
+                    shapes += part.edges
+            selected.append(shapes)
+
+            for check in checks:
+                for shape in shapes:
+                    if (check, shape) not in self._cache:
+                        todo.add((check, shape))
+
+        # Evaluate the checks that are not cached
+        self._evaluate(list(todo), nthreads)
+
+        # Add the hypotheses to a compound of the applicable shapes for each
+        # dimension not already assigned by a previous rule
+        assigned = set()
+        nshapes = []
+        for (hyps, _, _, checks, _), shapes in zip(self._rules, selected):
+            shapes = [s for s in shapes if
+                      all(self._cache[(check, s)] for check in checks)]
+            nshapes.append(len(shapes))
+
+            by_dim = {}
+            for hyp in hyps:
+                by_dim.setdefault(hyp.dim, []).append(hyp)
+            for dim, dim_hyps in by_dim.items():
+                dim_shapes = [s for s in shapes if (s, dim) not in assigned]
+                if not dim_shapes:
+                    continue
+                assigned.update([(s, dim) for s in dim_shapes])
+                compound = CompoundByShapes(dim_shapes).compound
+                mesh.add_hypotheses(dim_hyps, compound)
+
+        # Drop cached checks of shapes no longer in the applied parts
+        live = set()
+        for shapes in selected:
+            live.update(shapes)
+        for key in [k for k in self._cache if k[1] not in live]:
+            del self._cache[key]
+
+        msg = ' '.join(['Applied', str(len(self._rules)), 'mesh rule(s) and',
+                        'evaluated', str(len(todo)), 'applicability',
+                        'check(s)'])
+        logger.info(msg)
+
+        return nshapes
+
+    def _evaluate(self, todo, nthreads):
+        """
+        Evaluate and cache the applicability checks.
+        """
+        if not todo:
+            return
+
+        if nthreads is None:
+            nthreads = cpu_count()
+        nthreads = min(nthreads, len(todo))
+
+        if nthreads <= 1:
+            results = [bool(check(shape)) for check, shape in todo]
+        else:
+            pool = ThreadPool(nthreads)
+            try:
+                results = pool.map(lambda arg: bool(arg[0](arg[1])), todo)
+            finally:
+                pool.close()
+                pool.join()
+
+        self._cache.update(zip(todo, results))
@@ -16,7 +16,10 @@
 # You should have received a copy of the GNU Lesser General Public
 # License along with this library; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
-__all__ = ["DiscardByCref"]
+from afem.config import logger
+from afem.topology.bop import CutShapes
+
+__all__ = ["DiscardByCref", "CutHoles"]
 
 
 class DiscardByCref(object):
@@ -54,3 +57,74 @@ class DiscardByCref(object):
             return self._status[part]
         except KeyError:
             return False
+
+
+class CutHoles(object):
+    """
+    Cut holes along the reference curve of each part at evenly spaced
+    intervals. The hole axes of all the parts are computed first using their
+    current shapes and then each part is cut by only the cylinders of its own
+    holes using a single multi-tool cut, so a part lying within the cylinder
+    of a hole in another part (e.g., a spar next to a rib lightening hole) is
+    not cut.
+
+    :param list(afem.structure.entities.SurfacePart) parts: The parts.
+    :param int n: The number of holes in each part.
+    :param float d: The diameter.
+    :param float height: The height of the cylinders used to cut the holes.
+        If not provided then the diameter is used.
+    :param float fuzzy_val: Fuzzy tolerance value.
+
+    .. seealso::
+
+        :meth:`afem.structure.entities.SurfacePart.cut_holes`
+    """
+
+    def __init__(self, parts, n, d, height=None, fuzzy_val=None):
+        self._nholes = {}
+
+        jobs = []
+        for part in parts:
+            axes = part.hole_axes(n)
+            self._nholes[part] = len(axes)
+            if not axes:
+                continue
+            jobs.append((part, part.hole_cylinders(axes, d, height)))
+
+        self._is_done = False
+        if not jobs:
+            return
+
+        self._is_done = True
+        for part, tools in jobs:
+            bop = CutShapes(fuzzy_val=fuzzy_val)
+            bop.set_args([part.shape])
+            bop.set_tools(tools)
+            bop.build()
+            if not bop.is_done:
+                self._is_done = False
+                self._nholes[part] = 0
+                logger.info('Failed to cut holes in part {}.'.format(
+                    part.name))
+                continue
+            part.rebuild(bop)
+
+    @property
+    def is_done(self):
+        """
+        :return: *True* if the holes were cut in all the parts, *False* if
+            not.
+        :rtype: bool
+        """
+        return self._is_done
+
+    def nholes(self, part):
+        """
+        Get the number of holes cut in the part.
+
+        :param afem.structure.entities.SurfacePart part: The part.
+
+        :return: The number of holes.
+        :rtype: int
+        """
+        return self._nholes.get(part, 0)
@@ -16,13 +16,9 @@
 # You should have received a copy of the GNU Lesser General Public
 # License along with this library; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
-from afem.topology.bop import *
-from afem.topology.check import *
-from afem.topology.create import *
-from afem.topology.distance import *
-from afem.topology.entities import *
-from afem.topology.explore import *
-from afem.topology.fix import *
-from afem.topology.modify import *
-from afem.topology.offset import *
-from afem.topology.props import *
+from afem.misc.lazy import lazy_package
+
+_SUBMODULES = ['bop', 'check', 'create', 'distance', 'entities', 'explore',
+               'fix', 'modify', 'offset', 'props', 'section', 'tessellate']
+
+__getattr__, __dir__ = lazy_package(globals(), _SUBMODULES)
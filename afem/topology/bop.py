@@ -18,7 +18,10 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
 from datetime import datetime
 
-from OCCT.BOPAlgo import BOPAlgo_MakerVolume, BOPAlgo_Options
+from numpy import array, maximum, minimum
+
+from OCCT.BOPAlgo import (BOPAlgo_GlueEnum, BOPAlgo_MakerVolume,
+                          BOPAlgo_Options)
 from OCCT.BRepAlgoAPI import (BRepAlgoAPI_Common, BRepAlgoAPI_Cut,
                               BRepAlgoAPI_Fuse, BRepAlgoAPI_Section,
                               BRepAlgoAPI_Splitter)
@@ -27,10 +30,12 @@ from OCCT.Message import Message_Gravity
 from OCCT.TopTools import TopTools_SequenceOfShape
 from OCCT.TopoDS import TopoDS_Face
 
+from afem.base.cache import PropertyCache
 from afem.config import logger
 from afem.geometry.entities import Surface
+from afem.misc.profiler import Profiler
 from afem.occ.utils import to_topods_list
-from afem.topology.entities import Shape, Face, Solid, Compound
+from afem.topology.entities import BBox, Shape, Face, Solid, Compound
 from afem.topology.explore import ExploreWire
 from afem.topology.modify import RebuildShapeByTool
 
@@ -48,6 +53,109 @@ _gravities = [Message_Gravity.Message_Trace, Message_Gravity.Message_Info,
               Message_Gravity.Message_Fail]
 
 
+# Glue options
+_glue_options = {'off': BOPAlgo_GlueEnum.BOPAlgo_GlueOff,
+                 'shift': BOPAlgo_GlueEnum.BOPAlgo_GlueShift,
+                 'full': BOPAlgo_GlueEnum.BOPAlgo_GlueFull}
+
+# Thresholds for automatic options
+_AUTO_PARALLEL_NFACES = 16
+_AUTO_OBB_RATIO = 2.
+
+
+def _face_boxes(shapes):
+    """
+    Get the bounding boxes of all faces in the shapes as an array of
+    [xmin, ymin, zmin, xmax, ymax, zmax] along with the index of the owning
+    shape.
+    """
+    boxes, owners = [], []
+    for i, shape in enumerate(shapes):
+        for face in shape.faces:
+            bbox = BBox()
+            bbox.add_shape(face)
+            if bbox.is_void:
+                continue
+            boxes.append([bbox.xmin, bbox.ymin, bbox.zmin,
+                          bbox.xmax, bbox.ymax, bbox.zmax])
+            owners.append(i)
+    return array(boxes, dtype=float).reshape(-1, 6), array(owners, dtype=int)
+
+
+def _on_box(boxes, lo, hi, tol):
+    """
+    Check if a flat overlap lies on the box boundary in each direction.
+    """
+    bmin, bmax = boxes[:, :, :3], boxes[:, :, 3:]
+    flat = (bmax - bmin) <= tol
+    return flat | (abs(hi - bmin) <= tol) | (abs(lo - bmax) <= tol)
+
+
+def _box_stats(args, tools=None, fuzzy_val=None, chunk=256):
+    """
+    Count the faces, the pairs of faces with overlapping bounding boxes,
+    and the pairs that can only coincide or touch.
+    """
+    args = list(args)
+    if tools:
+        boxes1, _ = _face_boxes(args)
+        boxes2, _ = _face_boxes(list(tools))
+        owners1 = owners2 = None
+        nfaces = boxes1.shape[0] + boxes2.shape[0]
+    else:
+        boxes1, owners1 = _face_boxes(args)
+        boxes2, owners2 = boxes1, owners1
+        nfaces = boxes1.shape[0]
+
+    stats = {'nfaces': nfaces, 'npairs': 0, 'ntouching': 0}
+    if boxes1.shape[0] == 0 or boxes2.shape[0] == 0:
+        return stats
+
+    # Flat tolerance relative to the bounding box gap and fuzzy value
+    size = (boxes2[:, 3:] - boxes2[:, :3]).max()
+    tol = 1.0e-6 * max(size, 1.)
+    if fuzzy_val is not None:
+        tol += 2. * fuzzy_val
+
+    npairs, ntouching = 0, 0
+    for i in range(0, boxes1.shape[0], chunk):
+        b1 = boxes1[i:i + chunk, None, :]
+        lo = maximum(b1[:, :, :3], boxes2[None, :, :3])
+        hi = minimum(b1[:, :, 3:], boxes2[None, :, 3:])
+        ext = hi - lo
+        overlap = (ext >= -tol).all(axis=2)
+        if owners1 is not None:
+            # Only compare faces of different arguments once
+            o1 = owners1[i:i + chunk, None]
+            overlap &= o1 < owners2[None, :]
+        # Touching if the overlap is flat in a direction where it lies on
+        # each box, either because the box is flat (coplanar) or the overlap
+        # is at its boundary. A face crossing another passes through the
+        # interior of the other box in every direction.
+        b2 = boxes2[None, :, :]
+        on1 = _on_box(b1, lo, hi, tol)
+        on2 = _on_box(b2, lo, hi, tol)
+        touching = overlap & ((ext <= tol) & on1 & on2).any(axis=2)
+        npairs += int(overlap.sum())
+        ntouching += int(touching.sum())
+
+    stats['npairs'] = npairs
+    stats['ntouching'] = ntouching
+    return stats
+
+
+def _count_shapes(prefix, shapes):
+    """
+    Count the faces and edges in the shapes for profiling.
+    """
+    nfaces, nedges = 0, 0
+    for shape in shapes:
+        nfaces += len(shape.faces)
+        nedges += len(shape.edges)
+    return {prefix + '_nshapes': len(shapes), prefix + '_nfaces': nfaces,
+            prefix + '_nedges': nedges}
+
+
 class BopCore(object):
     """
     Core class for Boolean operations and enabling attributes and methods for
@@ -56,6 +164,7 @@ class BopCore(object):
 
     def __init__(self):
         self._bop = None
+        self._inputs = []
 
     def build(self):
         """
@@ -63,10 +172,27 @@ class BopCore(object):
 
         :return: None.
         """
-        if isinstance(self._bop, BOPAlgo_MakerVolume):
-            self._bop.Perform()
-        else:
-            self._bop.Build()
+        with Profiler.record(self.__class__.__name__, 'bop') as info:
+            if isinstance(self._bop, BOPAlgo_MakerVolume):
+                self._bop.Perform()
+            else:
+                self._bop.Build()
+
+        # Inputs may have their tolerances increased in place
+        PropertyCache.tolerance_changed(*self._inputs)
+
+        # Gather profiling information outside of the timed block
+        if info is not None:
+            info.update(self._profile_args())
+            if self.is_done:
+                info.update(_count_shapes('result', [self.shape]))
+
+    def _profile_args(self):
+        """
+        :return: Information about the operation for profiling.
+        :rtype: dict
+        """
+        return {}
 
     @property
     def is_done(self):
@@ -132,17 +258,36 @@ class BopAlgo(BopCore):
     :param float fuzzy_val: Fuzzy tolerance value.
     :param bool nondestructive: Option to not modify the input shapes.
     :param bop: The OpenCASCADE class for the Boolean operation.
+    :param parallel: Option for parallel execution of this operation. If
+        *None* then the global setting is used.
+    :type parallel: bool or str or None
+    :param use_obb: Option to use oriented bounding boxes to filter
+        interfering sub-shapes.
+    :type use_obb: bool or str or None
+    :param glue: Glue option ('off', 'shift', or 'full'). Gluing speeds up
+        the operation when the arguments only share coinciding or touching
+        sub-shapes.
+    :type glue: str or None
 
     .. note::
 
         If *shape1* or *shape2* is *None* then the user is expected to manually
         set the arguments and tools and build the result.
+
+    .. note::
+
+        Any of *parallel*, *use_obb*, or *glue* may be 'auto' in which case
+        the option is selected by :meth:`auto_options` using the arguments
+        and tools when the operation is built.
     """
 
-    def __init__(self, shape1, shape2, fuzzy_val, nondestructive, bop):
+    def __init__(self, shape1, shape2, fuzzy_val, nondestructive, bop,
+                 parallel=None, use_obb=None, glue=None):
         super(BopAlgo, self).__init__()
 
         self._bop = bop()
+        self._fuzzy_val = fuzzy_val
+        self._auto = []
 
         if fuzzy_val is not None:
             self._bop.SetFuzzyValue(fuzzy_val)
@@ -152,6 +297,16 @@ class BopAlgo(BopCore):
         else:
             self._bop.SetNonDestructive(False)
 
+        for name, value, setter in [('parallel', parallel, self.set_parallel),
+                                    ('use_obb', use_obb, self.set_use_obb),
+                                    ('glue', glue, self.set_glue)]:
+            if value is None:
+                continue
+            if value == 'auto':
+                self._auto.append(name)
+            else:
+                setter(value)
+
         if isinstance(shape1, Shape) and isinstance(shape2, Shape):
             self.set_args([shape1])
             self.set_tools([shape2])
@@ -169,6 +324,120 @@ class BopAlgo(BopCore):
         """
         BOPAlgo_Options.SetParallelMode_(flag)
 
+    def set_parallel(self, flag):
+        """
+        Set parallel execution for this operation only.
+
+        :param bool flag: Option for parallel execution.
+
+        :return: None.
+        """
+        self._bop.SetRunParallel(bool(flag))
+
+    def set_use_obb(self, flag):
+        """
+        Set the option to use oriented bounding boxes to filter interfering
+        sub-shapes. This can remove many false interferences of thin or
+        skewed faces whose axis-aligned boxes overlap.
+
+        :param bool flag: Option to use oriented bounding boxes.
+
+        :return: None.
+        """
+        if not hasattr(self._bop, 'SetUseOBB'):
+            logger.warning('Oriented bounding boxes not available in this '
+                           'version of OpenCASCADE. Doing nothing.')
+            return None
+        self._bop.SetUseOBB(bool(flag))
+
+    def set_glue(self, glue):
+        """
+        Set the glue option. Use 'shift' when the arguments only have
+        coinciding or touching sub-shapes and 'full' when they only have
+        coinciding sub-shapes. Results are not reliable if the arguments
+        intersect in other ways.
+
+        :param glue: The glue option ('off', 'shift', or 'full'). A boolean
+            value is treated as 'shift' or 'off'.
+        :type glue: str or bool
+
+        :return: None.
+
+        :raise ValueError: If the option is not supported.
+        """
+        if glue is True:
+            glue = 'shift'
+        elif glue is False:
+            glue = 'off'
+
+        try:
+            mode = _glue_options[glue.lower()]
+        except (AttributeError, KeyError):
+            msg = 'Unsupported glue option: {}.'.format(glue)
+            raise ValueError(msg)
+        self._bop.SetGlue(mode)
+
+    @staticmethod
+    def auto_options(args, tools=None, fuzzy_val=None):
+        """
+        Select the parallel, oriented bounding box, and glue options from
+        the number of faces and the overlap of their axis-aligned bounding
+        boxes.
+
+        * Parallel execution is used if there are enough faces to make it
+          worth the overhead.
+        * Oriented bounding boxes are used if there are many overlapping
+          boxes per face since the axis-aligned boxes are then a poor
+          filter.
+        * Shift gluing is used if every pair of overlapping boxes only
+          meets on a plane that is on the boundary of both boxes, so the
+          faces can only coincide or touch and never cross.
+
+        :param collections.Sequence(afem.topology.entities.Shape) args: The
+            arguments.
+        :param collections.Sequence(afem.topology.entities.Shape) tools: The
+            tools. If not provided, the faces of different arguments are
+            compared to each other.
+        :param float fuzzy_val: Fuzzy tolerance value.
+
+        :return: Dictionary with keys 'parallel', 'use_obb', and 'glue' and
+            the statistics used to select them.
+        :rtype: dict
+        """
+        stats = _box_stats(args, tools, fuzzy_val)
+        nfaces, npairs = stats['nfaces'], stats['npairs']
+
+        parallel = nfaces >= _AUTO_PARALLEL_NFACES
+        use_obb = npairs > _AUTO_OBB_RATIO * max(nfaces, 1)
+        if npairs > 0 and stats['ntouching'] == npairs:
+            glue = 'shift'
+        else:
+            glue = 'off'
+
+        options = {'parallel': parallel, 'use_obb': use_obb, 'glue': glue}
+        options.update(stats)
+        return options
+
+    def build(self):
+        """
+        Build the results.
+
+        :return: None.
+        """
+        if self._auto:
+            args = self.arguments
+            tools = self.tools if hasattr(self._bop, 'Tools') else None
+            options = self.auto_options(args, tools, self._fuzzy_val)
+            logger.info('Automatic options for {}: {}'.format(
+                self.__class__.__name__, options))
+            if 'parallel' in self._auto:
+                self.set_parallel(options['parallel'])
+            if 'use_obb' in self._auto:
+                self.set_use_obb(options['use_obb'])
+            if 'glue' in self._auto:
+                self.set_glue(options['glue'])
+        super(BopAlgo, self).build()
+
     def debug(self, path='.'):
         """
         Export files for debugging Boolean operations.
@@ -222,6 +491,18 @@ class BopAlgo(BopCore):
             fn = ''.join([path, '/', op, '.shape2.', timestamp, '.brep'])
             write_brep(shape2, fn)
 
+    def _profile_args(self):
+        """
+        :return: Information about the operation for profiling.
+        :rtype: dict
+        """
+        info = {'fuzzy_val': self._bop.FuzzyValue(),
+                'parallel': self._bop.RunParallel()}
+        info.update(_count_shapes('args', self.arguments))
+        if hasattr(self._bop, 'Tools'):
+            info.update(_count_shapes('tools', self.tools))
+        return info
+
     @property
     def arguments(self):
         """
@@ -246,6 +527,7 @@ class BopAlgo(BopCore):
 
         :return: None.
         """
+        self._inputs += list(shapes)
         if isinstance(self._bop, BOPAlgo_MakerVolume):
             for shape in shapes:
                 self._bop.AddArgument(shape.object)
@@ -268,6 +550,7 @@ class BopAlgo(BopCore):
             logger.warning(msg)
             return None
 
+        self._inputs += list(shapes)
         tools = to_topods_list(shapes)
         self._bop.SetTools(tools)
 
@@ -366,6 +649,13 @@ class FuseShapes(BopAlgo):
     :type shape2: afem.topology.entities.Shape or None
     :param float fuzzy_val: Fuzzy tolerance value.
     :param bool nondestructive: Option to not modify the input shapes.
+    :param parallel: Option for parallel execution of this operation. If
+        *None* then the global setting is used.
+    :type parallel: bool or str or None
+    :param use_obb: Option to use oriented bounding boxes.
+    :type use_obb: bool or str or None
+    :param glue: Glue option ('off', 'shift', or 'full').
+    :type glue: str or None
 
     .. note::
 
@@ -389,9 +679,11 @@ class FuseShapes(BopAlgo):
     """
 
     def __init__(self, shape1=None, shape2=None, fuzzy_val=None,
-                 nondestructive=False):
+                 nondestructive=False, parallel=None, use_obb=None,
+                 glue=None):
         super(FuseShapes, self).__init__(shape1, shape2, fuzzy_val,
-                                         nondestructive, BRepAlgoAPI_Fuse)
+                                         nondestructive, BRepAlgoAPI_Fuse,
+                                         parallel, use_obb, glue)
 
 
 class CutShapes(BopAlgo):
@@ -404,6 +696,13 @@ class CutShapes(BopAlgo):
     :type shape2: afem.topology.entities.Shape or None
     :param float fuzzy_val: Fuzzy tolerance value.
     :param bool nondestructive: Option to not modify the input shapes.
+    :param parallel: Option for parallel execution of this operation. If
+        *None* then the global setting is used.
+    :type parallel: bool or str or None
+    :param use_obb: Option to use oriented bounding boxes.
+    :type use_obb: bool or str or None
+    :param glue: Glue option ('off', 'shift', or 'full').
+    :type glue: str or None
 
     .. note::
 
@@ -427,9 +726,11 @@ class CutShapes(BopAlgo):
     """
 
     def __init__(self, shape1=None, shape2=None, fuzzy_val=None,
-                 nondestructive=False):
+                 nondestructive=False, parallel=None, use_obb=None,
+                 glue=None):
         super(CutShapes, self).__init__(shape1, shape2, fuzzy_val,
-                                        nondestructive, BRepAlgoAPI_Cut)
+                                        nondestructive, BRepAlgoAPI_Cut,
+                                        parallel, use_obb, glue)
 
 
 class CommonShapes(BopAlgo):
@@ -442,6 +743,13 @@ class CommonShapes(BopAlgo):
     :type shape2: afem.topology.entities.Shape or None
     :param float fuzzy_val: Fuzzy tolerance value.
     :param bool nondestructive: Option to not modify the input shapes.
+    :param parallel: Option for parallel execution of this operation. If
+        *None* then the global setting is used.
+    :type parallel: bool or str or None
+    :param use_obb: Option to use oriented bounding boxes.
+    :type use_obb: bool or str or None
+    :param glue: Glue option ('off', 'shift', or 'full').
+    :type glue: str or None
 
     .. note::
 
@@ -465,9 +773,11 @@ class CommonShapes(BopAlgo):
     """
 
     def __init__(self, shape1=None, shape2=None, fuzzy_val=None,
-                 nondestructive=False):
+                 nondestructive=False, parallel=None, use_obb=None,
+                 glue=None):
         super(CommonShapes, self).__init__(shape1, shape2, fuzzy_val,
-                                           nondestructive, BRepAlgoAPI_Common)
+                                           nondestructive, BRepAlgoAPI_Common,
+                                           parallel, use_obb, glue)
 
 
 class IntersectShapes(BopAlgo):
@@ -485,6 +795,13 @@ class IntersectShapes(BopAlgo):
     :param bool approximate: Option to approximate intersection curves.
     :param float fuzzy_val: Fuzzy tolerance value.
     :param bool nondestructive: Option to not modify the input shapes.
+    :param parallel: Option for parallel execution of this operation. If
+        *None* then the global setting is used.
+    :type parallel: bool or str or None
+    :param use_obb: Option to use oriented bounding boxes.
+    :type use_obb: bool or str or None
+    :param glue: Glue option ('off', 'shift', or 'full').
+    :type glue: str or None
 
     .. note::
 
@@ -509,10 +826,12 @@ class IntersectShapes(BopAlgo):
 
     def __init__(self, shape1=None, shape2=None, compute_pcurve1=False,
                  compute_pcurve2=False, approximate=False, fuzzy_val=None,
-                 nondestructive=False):
+                 nondestructive=False, parallel=None, use_obb=None,
+                 glue=None):
         super(IntersectShapes, self).__init__(None, None, fuzzy_val,
                                               nondestructive,
-                                              BRepAlgoAPI_Section)
+                                              BRepAlgoAPI_Section,
+                                              parallel, use_obb, glue)
 
         self._bop.ComputePCurveOn1(compute_pcurve1)
         self._bop.ComputePCurveOn2(compute_pcurve2)
@@ -528,7 +847,7 @@ class IntersectShapes(BopAlgo):
             build2 = True
 
         if build1 and build2:
-            self._bop.Build()
+            self.build()
 
     def has_ancestor_face1(self, edge):
         """
@@ -572,6 +891,13 @@ class SplitShapes(BopAlgo):
     :type shape2: afem.topology.entities.Shape or None
     :param float fuzzy_val: Fuzzy tolerance value.
     :param bool nondestructive: Option to not modify the input shapes.
+    :param parallel: Option for parallel execution of this operation. If
+        *None* then the global setting is used.
+    :type parallel: bool or str or None
+    :param use_obb: Option to use oriented bounding boxes.
+    :type use_obb: bool or str or None
+    :param glue: Glue option ('off', 'shift', or 'full').
+    :type glue: str or None
 
     .. note::
 
@@ -595,9 +921,11 @@ class SplitShapes(BopAlgo):
     """
 
     def __init__(self, shape1=None, shape2=None, fuzzy_val=None,
-                 nondestructive=False):
+                 nondestructive=False, parallel=None, use_obb=None,
+                 glue=None):
         super(SplitShapes, self).__init__(shape1, shape2, fuzzy_val,
-                                          nondestructive, BRepAlgoAPI_Splitter)
+                                          nondestructive, BRepAlgoAPI_Splitter,
+                                          parallel, use_obb, glue)
 
 
 class VolumesFromShapes(BopAlgo):
@@ -609,13 +937,22 @@ class VolumesFromShapes(BopAlgo):
         solids.
     :param float fuzzy_val: Fuzzy tolerance value.
     :param bool nondestructive: Option to not modify the input shapes.
+    :param parallel: Option for parallel execution of this operation. If
+        *None* then the global setting is used.
+    :type parallel: bool or str or None
+    :param use_obb: Option to use oriented bounding boxes.
+    :type use_obb: bool or str or None
+    :param glue: Glue option ('off', 'shift', or 'full').
+    :type glue: str or None
     """
 
     def __init__(self, shapes, intersect=False, fuzzy_val=None,
-                 nondestructive=False):
+                 nondestructive=False, parallel=None, use_obb=None,
+                 glue=None):
         super(VolumesFromShapes, self).__init__(None, None, fuzzy_val,
                                                 nondestructive,
-                                                BOPAlgo_MakerVolume)
+                                                BOPAlgo_MakerVolume,
+                                                parallel, use_obb, glue)
 
         self.set_args(shapes)
 
@@ -724,6 +1061,7 @@ class LocalSplit(BopCore):
 
         # Split
         self._bop = BRepFeat_SplitShape(basis_shape.object)
+        self._inputs = [basis_shape]
         for e in sec_edges:
             status, f = section.has_ancestor_face1(e)
             if status:
@@ -747,6 +1085,7 @@ class SplitShapeByEdges(BopCore):
         super(SplitShapeByEdges, self).__init__()
 
         self._bop = BRepFeat_SplitShape(shape.object)
+        self._inputs = [shape]
 
         if not check_interior:
             self._bop.SetCheckInterior(False)
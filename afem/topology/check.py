@@ -16,13 +16,18 @@
 # You should have received a copy of the GNU Lesser General Public
 # License along with this library; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
+
 from OCCT.BRepCheck import BRepCheck_Analyzer, BRepCheck_NoError
 from OCCT.BRepClass3d import BRepClass3d_SolidClassifier
 from OCCT.TopAbs import TopAbs_IN, TopAbs_ON, TopAbs_OUT, TopAbs_UNKNOWN
+from OCCT.gp import gp_Pnt
+from numpy import array, empty, full, int8, logical_and, nonzero
 
 from afem.config import logger
 from afem.geometry.check import CheckGeom
-from afem.topology.entities import Face
+from afem.topology.entities import BBox, Face
 
 __all__ = ["CheckShape", "ClassifyPointInSolid"]
 
@@ -39,8 +44,7 @@ def _invalid_subshapes(shape, check, errors):
             if status != BRepCheck_NoError:
                 type_ = sub_shape.__class__.__name__
                 error = str(status).split('.')[-1]
-                msg = '\t{0}: {1}'.format(type_, error)
-                errors.append(msg)
+                errors.append((type_, error))
                 invalid.append(sub_shape)
         invalid += _invalid_subshapes(sub_shape, check, errors)
 
@@ -80,14 +84,24 @@ class CheckShape(object):
         """
         return self._invalid
 
+    @property
+    def errors(self):
+        """
+        :return: List of errors for each invalid sub-shape. Each error is a
+            tuple containing the sub-shape type and the error name (e.g.,
+            ('Face', 'BRepCheck_UnorientableShape')).
+        :rtype: list(tuple(str, str))
+        """
+        return self._errors
+
     def print_errors(self):
         """
         Print the errors.
 
         :return: None.
         """
-        for msg in self._errors:
-            print(msg)
+        for type_, error in self._errors:
+            print('\t{0}: {1}'.format(type_, error))
 
     def log_errors(self):
         """
@@ -95,8 +109,8 @@ class CheckShape(object):
 
         :return: None.
         """
-        for msg in self._errors:
-            logger.info(msg)
+        for type_, error in self._errors:
+            logger.info('\t{0}: {1}'.format(type_, error))
 
     def is_subshape_valid(self, shape):
         """
@@ -117,11 +131,35 @@ class ClassifyPointInSolid(object):
     :param point_like pnt: The point. If not provided the *perform()* method
         will need to be used.
     :param float tol: The tolerance.
+
+    For many points use :meth:`classify_points`, which reuses the classifier
+    built for the solid and returns one code per point:
+
+    >>> from afem.topology import *
+    >>> box = BoxBySize(10., 10., 10.).solid
+    >>> tool = ClassifyPointInSolid(box)
+    >>> tool.classify_points([(5., 5., 5.), (20., 5., 5.), (0., 5., 5.)])
+    array([0, 1, 2], dtype=int8)
     """
 
+    #: Code for a point inside the solid.
+    IN = 0
+    #: Code for a point outside the solid.
+    OUT = 1
+    #: Code for a point on the boundary of the solid.
+    ON = 2
+    #: Code for a point that could not be classified.
+    UNKNOWN = 3
+
+    _CODES = {TopAbs_IN: IN, TopAbs_OUT: OUT, TopAbs_ON: ON,
+              TopAbs_UNKNOWN: UNKNOWN}
+
     def __init__(self, solid, pnt=None, tol=1.0e-7):
         pnt = CheckGeom.to_point(pnt)
 
+        self._solid = solid
+        self._bbox = None
+        self._tools = []
         if not CheckGeom.is_point(pnt):
             self._tool = BRepClass3d_SolidClassifier(solid.object)
         else:
@@ -187,3 +225,83 @@ class ClassifyPointInSolid(object):
         :rtype: afem.topology.entities.Face
         """
         return Face(self._tool.Face())
+
+    def classify_points(self, pnts, tol=1.0e-7, nthreads=1, chunk_size=1000):
+        """
+        Classify many points in the solid. Points outside the bounding box of
+        the solid are classified as outside without calling the classifier.
+        The classifier for the solid (including its face bounding boxes) is
+        built once and reused for every point and every call.
+
+        :param pnts: The points as an array with shape (N, 3).
+        :type pnts: numpy.ndarray or collections.Sequence(point_like)
+        :param float tol: The tolerance.
+        :param int nthreads: Number of threads used to classify points. If
+            greater than one, the remaining points are split into chunks and
+            each thread uses its own classifier. If *None* then the number of
+            CPUs is used.
+        :param int chunk_size: The minimum number of points in each chunk
+            when using threads.
+
+        :return: Array of codes with shape (N,). Each code is one of
+            :attr:`IN`, :attr:`OUT`, :attr:`ON`, or :attr:`UNKNOWN`.
+        :rtype: numpy.ndarray
+
+        :raise ValueError: If the points are not an array with shape (N, 3).
+        """
+        pnts = array(pnts, dtype=float)
+        if pnts.size == 0:
+            return empty(0, dtype=int8)
+        if pnts.ndim != 2 or pnts.shape[1] != 3:
+            raise ValueError('Points must be an array with shape (N, 3).')
+
+        # Bounding box prefilter
+        if self._bbox is None:
+            bbox = BBox()
+            bbox.add_shape(self._solid)
+            self._bbox = bbox
+        codes = full(pnts.shape[0], self.OUT, dtype=int8)
+        if self._bbox.is_void:
+            return codes
+        bmin = array([self._bbox.xmin, self._bbox.ymin, self._bbox.zmin])
+        bmax = array([self._bbox.xmax, self._bbox.ymax, self._bbox.zmax])
+        inside = logical_and(pnts >= bmin - tol, pnts <= bmax + tol).all(1)
+        indx = nonzero(inside)[0]
+        if indx.size == 0:
+            return codes
+
+        # Split into chunks for each thread
+        if nthreads is None:
+            nthreads = cpu_count()
+        nchunks = min(nthreads, -(-indx.size // chunk_size))
+        if nchunks <= 1:
+            self._classify(self._tool, pnts, indx, tol, codes)
+            return codes
+
+        while len(self._tools) < nchunks:
+            tool = BRepClass3d_SolidClassifier(self._solid.object)
+            self._tools.append(tool)
+
+        n = -(-indx.size // nchunks)
+        args = [(self._tools[i], indx[i * n:(i + 1) * n]) for i in
+                range(nchunks)]
+        pool = ThreadPool(nchunks)
+        try:
+            pool.map(lambda arg: self._classify(arg[0], pnts, arg[1], tol,
+                                                codes), args)
+        finally:
+            pool.close()
+            pool.join()
+
+        return codes
+
+    @classmethod
+    def _classify(cls, tool, pnts, indx, tol, codes):
+        """
+        Classify the points at the given indices using the tool.
+        """
+        code_map = cls._CODES
+        for i in indx:
+            x, y, z = pnts[i]
+            tool.Perform(gp_Pnt(x, y, z), tol)
+            codes[i] = code_map.get(tool.State(), cls.UNKNOWN)
@@ -34,6 +34,7 @@ from OCCT.ShapeAnalysis import ShapeAnalysis_FreeBounds
 from OCCT.TopLoc import TopLoc_Location
 from OCCT.TopTools import TopTools_HSequenceOfShape
 from OCCT.TopoDS import TopoDS_Compound, TopoDS_Shell
+from OCCT.gp import gp_Ax3
 
 from afem.adaptor.entities import AdaptorCurve
 from afem.geometry.check import CheckGeom
@@ -1356,16 +1357,19 @@ class CylinderByAxis(object):
 
     :param float radius: The radius.
     :param float height: The height.
-    :param axis2: Not yet implemented. Solid will be constructed in xy-plane.
-
-    :raise NotImplementedError: If an axis is provided.
+    :param axis2: The local coordinate system of the cylinder. Its main
+        direction is the cylinder axis and its origin is the center of the
+        base. If not provided the solid will be constructed in xy-plane.
+    :type axis2: OCCT.gp.gp_Ax2 or afem.geometry.entities.Axis3
     """
 
     def __init__(self, radius, height, axis2=None):
         if axis2 is None:
             self._builder = BRepPrimAPI_MakeCylinder(radius, height)
         else:
-            raise NotImplementedError('Providing Axis2 not yet implemented.')
+            if isinstance(axis2, gp_Ax3):
+                axis2 = axis2.Ax2()
+            self._builder = BRepPrimAPI_MakeCylinder(axis2, radius, height)
 
     @property
     def face(self):
@@ -43,6 +43,7 @@ from OCCT.TopoDS import (TopoDS, TopoDS_Vertex, TopoDS_Edge, TopoDS_Wire,
                          TopoDS_Compound, TopoDS_CompSolid, TopoDS_Shape,
                          TopoDS_Iterator)
 
+from afem.base.cache import memoized_property
 from afem.base.entities import ViewableItem
 from afem.geometry.check import CheckGeom
 from afem.geometry.entities import Point, Curve, Surface
@@ -70,6 +71,13 @@ class Shape(ViewableItem):
     :cvar OCCT.TopAbs.TopAbs_ShapeEnum.TopAbs_COMPOUND COMPOUND: Compound type.
 
     :raise TypeError: If ``shape`` is not a ``TopoDS_Shape``.
+
+    .. note::
+
+        Data derived from the shape (e.g., adaptors) may be cached on this
+        instance. Methods that modify the shape clear the cache. If the
+        underlying OpenCASCADE shape is modified directly then
+        :meth:`invalidate` should be called.
     """
 
     SHAPE = TopAbs_ShapeEnum.TopAbs_SHAPE
@@ -89,6 +97,7 @@ class Shape(ViewableItem):
 
         # The underlying OCCT shape
         self._shape = shape
+        self._cache = {}
 
     def __hash__(self):
         """
@@ -120,6 +129,14 @@ class Shape(ViewableItem):
         """
         return self._shape
 
+    def invalidate(self):
+        """
+        Clear any data cached on the shape.
+
+        :return: None.
+        """
+        self._cache.clear()
+
     @property
     def hash_code(self):
         """
@@ -289,7 +306,7 @@ class Shape(ViewableItem):
         """
         return self._get_shapes(self.COMPSOLID)
 
-    @property
+    @memoized_property(tolerance=True)
     def tol_avg(self):
         """
         :return: The average global tolerance.
@@ -299,7 +316,7 @@ class Shape(ViewableItem):
         tol.AddTolerance(self.object)
         return tol.GlobalTolerance(0)
 
-    @property
+    @memoized_property(tolerance=True)
     def tol_min(self):
         """
         :return: The minimum global tolerance.
@@ -309,7 +326,7 @@ class Shape(ViewableItem):
         tol.AddTolerance(self.object)
         return tol.GlobalTolerance(-1)
 
-    @property
+    @memoized_property(tolerance=True)
     def tol_max(self):
         """
         :return: The minimum global tolerance.
@@ -330,7 +347,7 @@ class Shape(ViewableItem):
             yield Shape.wrap(it.Value())
             it.Next()
 
-    @property
+    @memoized_property
     def length(self):
         """
         :return: The length of all edges of the shape.
@@ -340,7 +357,7 @@ class Shape(ViewableItem):
         BRepGProp.LinearProperties_(self.object, props, True)
         return props.Mass()
 
-    @property
+    @memoized_property
     def area(self):
         """
         :return: The area of all faces of the shape.
@@ -350,7 +367,7 @@ class Shape(ViewableItem):
         BRepGProp.SurfaceProperties_(self.object, props, True)
         return props.Mass()
 
-    @property
+    @memoized_property
     def volume(self):
         """
         :return: The voume of all solids of the shape.
@@ -409,6 +426,7 @@ class Shape(ViewableItem):
         :return: None.
         """
         self.object.Nullify()
+        self.invalidate()
 
     def reverse(self):
         """
@@ -417,6 +435,7 @@ class Shape(ViewableItem):
         :return: None.
         """
         self.object.Reverse()
+        self.invalidate()
 
     def reversed(self):
         """
@@ -20,6 +20,8 @@ from OCCT.BRepCheck import BRepCheck_Analyzer
 from OCCT.ShapeBuild import ShapeBuild_ReShape
 from OCCT.ShapeFix import ShapeFix_Shape, ShapeFix_ShapeTolerance
 
+from afem.base.cache import PropertyCache
+from afem.misc.profiler import Profiler
 from afem.topology.entities import Shape
 
 __all__ = ["FixShape"]
@@ -61,7 +63,15 @@ class FixShape(object):
             self._tool.SetContext(reshape)
 
         self._tool.Init(shape.object)
-        self._tool.Perform()
+        with Profiler.record('FixShape', 'fix') as info:
+            self._tool.Perform()
+        if context is not None:
+            PropertyCache.tolerance_changed(shape, context)
+        else:
+            PropertyCache.tolerance_changed(shape)
+        if info is not None:
+            info['nfaces'] = len(shape.faces)
+            info['precision'] = self._tool.Precision()
 
     @property
     def shape(self):
@@ -107,6 +117,7 @@ class FixShape(object):
         # Limit tolerance then fix in case of invalid tolerances
         _fix_tol.LimitTolerance(shape.object, tol, tol, styp)
         ShapeFix_Shape(shape.object).Perform()
+        PropertyCache.tolerance_changed(shape)
         return BRepCheck_Analyzer(shape.object, False).IsValid()
 
     @staticmethod
@@ -121,4 +132,5 @@ class FixShape(object):
 
         :return: None.
         """
-        return _fix_tol.SetTolerance(shape.object, tol, styp)
+        _fix_tol.SetTolerance(shape.object, tol, styp)
+        PropertyCache.tolerance_changed(shape)
@@ -27,6 +27,7 @@ from OCCT.TopTools import (TopTools_DataMapOfShapeShape,
                            TopTools_IndexedMapOfShape)
 
 from afem.geometry.entities import Geometry
+from afem.misc.profiler import Profiler
 from afem.topology.entities import Shape, Edge, Compound
 
 __all__ = ["DivideClosedShape", "DivideContinuityShape", "DivideC0Shape",
@@ -220,7 +221,7 @@ class SewShape(object):
 
         if shape is not None:
             self._tool.Load(shape.object)
-            self._tool.Perform()
+            self.perform()
 
     def load(self, shape):
         """
@@ -248,7 +249,12 @@ class SewShape(object):
 
         :return: None.
         """
-        self._tool.Perform()
+        with Profiler.record('SewShape', 'sew') as info:
+            self._tool.Perform()
+        if info is not None:
+            info['tol'] = self._tool.Tolerance()
+            info['n_free_edges'] = self.n_free_edges
+            info['n_multiple_edges'] = self.n_multiple_edges
 
     @property
     def sewed_shape(self):
@@ -0,0 +1,300 @@
+# This file is part of AFEM which provides an engineering toolkit for airframe
+# finite element modeling during conceptual design.
+#
+# Copyright (C) 2016-2018  Laughlin Research, LLC (info@laughlinresearch.com)
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
+
+from numpy import abs as np_abs
+from numpy import argmin, array, dot, nonzero, unique
+from numpy.linalg import norm
+
+from afem.base.entities import ShapeHolder
+from afem.geometry.entities import Plane
+from afem.topology.bop import IntersectShapes
+from afem.topology.create import FaceByPlane, WiresByConnectedEdges
+from afem.topology.entities import BBox, Compound, Shape
+
+__all__ = ["SectionBodyAtPlanes"]
+
+
+def _plane_data(pln):
+    """
+    Get the origin, normal, x-direction, and y-direction of a plane as arrays.
+    """
+    gp_pln = pln.gp_pln
+    p = gp_pln.Location()
+    n = gp_pln.Axis().Direction()
+    dx = gp_pln.XAxis().Direction()
+    dy = gp_pln.YAxis().Direction()
+    return [[p.X(), p.Y(), p.Z()], [n.X(), n.Y(), n.Z()],
+            [dx.X(), dx.Y(), dx.Z()], [dy.X(), dy.Y(), dy.Z()]]
+
+
+class SectionBodyAtPlanes(object):
+    """
+    Section a body or shape with many planes. The bounding boxes of the faces
+    are computed once and used to select only the faces that cross each
+    plane. If all the planes are parallel then every station is computed in a
+    single sectioning operation and the resulting edges are sorted by the
+    plane they came from. Otherwise, each station is sectioned with only its
+    candidate faces and the stations may be processed in parallel. The
+    edges at each station are then connected into wires.
+
+    :param shape: The body or shape.
+    :type shape: afem.oml.entities.Body or afem.topology.entities.Shape
+    :param planes: The planes.
+    :type planes: collections.Sequence(afem.geometry.entities.Plane)
+    :param bool approximate: Option to approximate intersection curves.
+    :param float tol: Tolerance used when selecting faces near each plane. If
+        *None* then the maximum tolerance of the shape is used.
+    :param int nthreads: Number of threads used to section the stations when
+        the planes are not parallel. If *None* then the number of CPUs is used.
+    :param bool force_stations: Option to section each station separately
+        even if the planes are parallel.
+    :param float fuzzy_val: Fuzzy tolerance value.
+    :param parallel: Option for parallel execution of each sectioning
+        operation. If *None* then the global setting is used.
+    :type parallel: bool or str or None
+
+    :raise TypeError: If the shape or the planes are not supported.
+    :raise RuntimeError: If a sectioning operation fails.
+
+    Usage:
+
+    >>> from afem.geometry import PlaneByAxes
+    >>> from afem.topology import BoxBySize, SectionBodyAtPlanes
+    >>> box = BoxBySize(10., 10., 10.).solid
+    >>> planes = [PlaneByAxes((x, 0., 0.), 'yz').plane for x in (2., 5., 8.)]
+    >>> builder = SectionBodyAtPlanes(box, planes)
+    >>> builder.nstations
+    3
+    >>> builder.nwires(0)
+    1
+    """
+
+    def __init__(self, shape, planes, approximate=True, tol=None,
+                 nthreads=1, force_stations=False, fuzzy_val=None,
+                 parallel=None):
+        if isinstance(shape, ShapeHolder):
+            shape = shape.shape
+        shape = Shape.to_shape(shape)
+        if shape is None:
+            raise TypeError('Shape type not supported.')
+
+        planes = list(planes)
+        for pln in planes:
+            if not isinstance(pln, Plane):
+                raise TypeError('Only planes are supported.')
+
+        if tol is None:
+            tol = shape.tol_max
+
+        self._planes = planes
+        self._approx = approximate
+        self._fuzzy_val = fuzzy_val
+        self._parallel = parallel
+        self._edges = [[] for _ in planes]
+        self._wires = [[] for _ in planes]
+        self._single = False
+
+        # Face bounding boxes as centers and half sizes
+        faces, boxes = [], []
+        for face in shape.faces:
+            bbox = BBox()
+            bbox.add_shape(face)
+            if bbox.is_void:
+                continue
+            faces.append(face)
+            boxes.append([bbox.xmin, bbox.ymin, bbox.zmin,
+                          bbox.xmax, bbox.ymax, bbox.zmax])
+        if not faces or not planes:
+            return
+        boxes = array(boxes, dtype=float)
+        centers = 0.5 * (boxes[:, :3] + boxes[:, 3:])
+        half = 0.5 * (boxes[:, 3:] - boxes[:, :3])
+
+        # A box crosses a plane if the distance of its center is within the
+        # projection of its half size onto the normal
+        data = array([_plane_data(pln) for pln in planes], dtype=float)
+        origins, normals = data[:, 0], data[:, 1]
+        candidates = []
+        for p0, pn in zip(origins, normals):
+            dc = dot(centers - p0, pn)
+            r = dot(half, np_abs(pn))
+            candidates.append(nonzero(np_abs(dc) <= r + tol)[0])
+
+        # Finite plane faces sized to the candidate faces at each station
+        tools = []
+        for i, indx in enumerate(candidates):
+            if indx.size == 0:
+                tools.append(None)
+                continue
+            lo = boxes[indx, :3].min(axis=0)
+            hi = boxes[indx, 3:].max(axis=0)
+            c = 0.5 * (lo + hi) - origins[i]
+            h = norm(hi - lo) + tol
+            u, v = dot(c, data[i, 2]), dot(c, data[i, 3])
+            f = FaceByPlane(planes[i], u - h, u + h, v - h, v + h).face
+            tools.append(f)
+
+        stations = [i for i, indx in enumerate(candidates) if indx.size > 0]
+        if not stations:
+            return
+
+        parallel_planes = (np_abs(dot(normals, normals[0])) >=
+                           1. - 1.0e-12).all()
+        if parallel_planes and not force_stations:
+            self._single = True
+            indx = unique(array([j for i in stations for j in candidates[i]],
+                                dtype=int))
+            args = Compound.by_shapes([faces[j] for j in indx])
+            self._section_all(args, tools, stations, origins, normals)
+        else:
+            args = [(i, Compound.by_shapes([faces[j] for j in candidates[i]]),
+                     tools[i]) for i in stations]
+            if nthreads is None:
+                nthreads = cpu_count()
+            nthreads = min(nthreads, len(args))
+            if nthreads <= 1:
+                for arg in args:
+                    self._section_station(arg, False)
+            else:
+                # Do not modify the shared input shapes while in threads
+                pool = ThreadPool(nthreads)
+                try:
+                    pool.map(lambda arg: self._section_station(arg, True),
+                             args)
+                finally:
+                    pool.close()
+                    pool.join()
+
+        # Connect edges into wires at each station
+        for i in stations:
+            edges = self._edges[i]
+            if edges:
+                self._wires[i] = WiresByConnectedEdges(edges).wires
+
+    def _section_all(self, args, tools, stations, origins, normals):
+        """
+        Section all the stations in one operation and sort the edges by the
+        plane face they were generated from.
+        """
+        plane_faces = Compound.by_shapes([tools[i] for i in stations])
+        bop = IntersectShapes(args, plane_faces,
+                              approximate=self._approx,
+                              fuzzy_val=self._fuzzy_val,
+                              parallel=self._parallel)
+        if not bop.is_done:
+            raise RuntimeError('Failed to section the shape.')
+
+        station_map = {tools[i]: i for i in stations}
+        stations = array(stations, dtype=int)
+        for e in bop.shape.edges:
+            status, f = bop.has_ancestor_face2(e)
+            if status and f in station_map:
+                i = station_map[f]
+            else:
+                # Use the nearest plane
+                bbox = BBox()
+                bbox.add_shape(e)
+                c = array([0.5 * (bbox.xmin + bbox.xmax),
+                           0.5 * (bbox.ymin + bbox.ymax),
+                           0.5 * (bbox.zmin + bbox.zmax)])
+                d = np_abs(((c - origins[stations]) *
+                            normals[stations]).sum(axis=1))
+                i = stations[argmin(d)]
+            self._edges[i].append(e)
+
+    def _section_station(self, arg, nondestructive):
+        """
+        Section a single station with its candidate faces.
+        """
+        i, faces, face = arg
+        bop = IntersectShapes(faces, face, approximate=self._approx,
+                              fuzzy_val=self._fuzzy_val,
+                              nondestructive=nondestructive,
+                              parallel=self._parallel)
+        if not bop.is_done:
+            raise RuntimeError('Failed to section the shape.')
+        self._edges[i] = bop.shape.edges
+
+    @property
+    def nstations(self):
+        """
+        :return: Number of stations.
+        :rtype: int
+        """
+        return len(self._planes)
+
+    @property
+    def planes(self):
+        """
+        :return: The planes.
+        :rtype: list(afem.geometry.entities.Plane)
+        """
+        return self._planes
+
+    @property
+    def is_single_pass(self):
+        """
+        :return: *True* if all stations were sectioned in one operation,
+            *False* if each station was sectioned separately.
+        :rtype: bool
+        """
+        return self._single
+
+    @property
+    def sections(self):
+        """
+        :return: The wires at each station in the order of the planes.
+        :rtype: list(list(afem.topology.entities.Wire))
+        """
+        return self._wires
+
+    def edges(self, indx):
+        """
+        Get the section edges at a station.
+
+        :param int indx: The station index.
+
+        :return: The edges.
+        :rtype: list(afem.topology.entities.Edge)
+        """
+        return self._edges[indx]
+
+    def wires(self, indx):
+        """
+        Get the section wires at a station.
+
+        :param int indx: The station index.
+
+        :return: The wires.
+        :rtype: list(afem.topology.entities.Wire)
+        """
+        return self._wires[indx]
+
+    def nwires(self, indx):
+        """
+        Get the number of section wires at a station.
+
+        :param int indx: The station index.
+
+        :return: Number of wires.
+        :rtype: int
+        """
+        return len(self._wires[indx])
@@ -0,0 +1,179 @@
+# This file is part of AFEM which provides an engineering toolkit for airframe
+# finite element modeling during conceptual design.
+#
+# Copyright (C) 2016-2018  Laughlin Research, LLC (info@laughlinresearch.com)
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+from math import radians
+
+from OCCT.BRepMesh import BRepMesh_IncrementalMesh
+from OCCT.BRepTools import BRepTools
+from OCCT.TopLoc import TopLoc_Location
+
+from afem.config import logger
+from afem.topology.entities import BBox, Compound, Shape
+
+__all__ = ["TessellateShapes"]
+
+
+class TessellateShapes(object):
+    """
+    Tessellate shapes in a single parallel pass using BRepMesh. The
+    triangulation is stored on the faces of each shape so that it can be
+    reused by any tool that needs it (e.g., the viewer or the STL writer).
+    Shapes that already have a triangulation at least as fine as the
+    requested deflection are skipped, as are instances of shapes that are
+    already being tessellated.
+
+    :param shapes: The shapes.
+    :type shapes: afem.topology.entities.Shape or
+        collections.Sequence(afem.topology.entities.Shape)
+    :param float deflection: The linear deflection. If not provided then a
+        value is computed as *rel_deflection* times the largest dimension of
+        the bounding box of all the shapes.
+    :param float angle: The angular deflection (in degrees).
+    :param float rel_deflection: The relative deflection used if
+        *deflection* is not provided.
+    :param bool parallel: Option to tessellate the faces in parallel.
+
+    Usage:
+
+    >>> from afem.topology import *
+    >>> box = BoxBySize(10., 10., 10.).solid
+    >>> tool = TessellateShapes(box, 0.1)
+    >>> tool.is_done
+    True
+    >>> tool.ntessellated
+    1
+    >>> TessellateShapes(box, 0.1).nskipped
+    1
+    """
+
+    def __init__(self, shapes, deflection=None, angle=20.,
+                 rel_deflection=0.001, parallel=True):
+        if isinstance(shapes, Shape):
+            shapes = [shapes]
+
+        if deflection is None:
+            deflection = self.default_deflection(shapes, rel_deflection)
+        deflection = float(deflection)
+
+        # Only tessellate the shapes without a fine enough triangulation.
+        # Instances share the faces of their partner shape and so its
+        # triangulation, so only one of them is tessellated.
+        todo = []
+        partners = set()
+        for shape in shapes:
+            if self.is_tessellated(shape, deflection):
+                continue
+            partner = Shape.wrap(shape.object.Located(TopLoc_Location()))
+            if partner in partners:
+                continue
+            partners.add(partner)
+            todo.append(shape)
+
+        self._deflection = deflection
+        self._ntessellated = len(todo)
+        self._nskipped = len(shapes) - len(todo)
+
+        if not todo:
+            self._is_done = True
+            return
+
+        # Single pass on a compound of all the shapes so that the faces are
+        # meshed in parallel. The triangulation is stored on the faces so it
+        # is shared by the original shapes.
+        if len(todo) == 1:
+            shape = todo[0]
+        else:
+            shape = Compound.by_shapes(todo)
+        tool = BRepMesh_IncrementalMesh(shape.object, deflection, False,
+                                        radians(angle), parallel)
+        self._is_done = tool.IsDone()
+
+        msg = ' '.join(['Tessellated', str(self._ntessellated), 'shape(s)',
+                        'and skipped', str(self._nskipped),
+                        'with deflection', str(deflection)])
+        logger.info(msg)
+
+    @property
+    def is_done(self):
+        """
+        :return: *True* if done, *False* if not.
+        :rtype: bool
+        """
+        return self._is_done
+
+    @property
+    def deflection(self):
+        """
+        :return: The linear deflection used.
+        :rtype: float
+        """
+        return self._deflection
+
+    @property
+    def ntessellated(self):
+        """
+        :return: Number of shapes that were tessellated.
+        :rtype: int
+        """
+        return self._ntessellated
+
+    @property
+    def nskipped(self):
+        """
+        :return: Number of shapes skipped since they already had a fine
+            enough triangulation or were instances of other shapes.
+        :rtype: int
+        """
+        return self._nskipped
+
+    @staticmethod
+    def is_tessellated(shape, deflection):
+        """
+        Check if each face of the shape has a triangulation with a deflection
+        less than or equal to the given value.
+
+        :param afem.topology.entities.Shape shape: The shape.
+        :param float deflection: The linear deflection.
+
+        :return: *True* if tessellated, *False* if not.
+        :rtype: bool
+        """
+        return BRepTools.Triangulation_(shape.object, deflection)
+
+    @staticmethod
+    def default_deflection(shapes, rel_deflection=0.001):
+        """
+        Compute a linear deflection relative to the size of the shapes.
+
+        :param collections.Sequence(afem.topology.entities.Shape) shapes: The
+            shapes.
+        :param float rel_deflection: The relative deflection.
+
+        :return: The linear deflection.
+        :rtype: float
+        """
+        bbox = BBox()
+        for shape in shapes:
+            bbox.add_shape(shape)
+        if bbox.is_void:
+            return rel_deflection
+        size = max(bbox.xmax - bbox.xmin, bbox.ymax - bbox.ymin,
+                   bbox.zmax - bbox.zmin)
+        if size <= 0.:
+            return rel_deflection
+        return rel_deflection * size
@@ -17,17 +17,24 @@
 # License along with this library; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
 from OCCT.BRepBuilderAPI import BRepBuilderAPI_Transform
+from OCCT.TopLoc import TopLoc_Location
 from OCCT.gce import gce_MakeMirror
+from OCCT.gp import gp_Ax2, gp_Dir, gp_Pnt, gp_Trsf
 
 from afem.topology.entities import Shape
 
+__all__ = ["mirror_shape", "transform_shape", "rigid_instance"]
 
-def mirror_shape(shape, pln):
+
+def mirror_shape(shape, pln, copy=True):
     """
     Mirror a shape about a plane.
 
     :param afem.topology.entities.Shape shape: The shape.
     :param afem.geometry.entities.Plane pln: The plane.
+    :param bool copy: Option to copy the geometry. If *False* then the
+        mirrored shape is an instance that shares the underlying topology and
+        geometry of the original shape (see :func:`.transform_shape`).
 
     :return: The mirrored shape.
     :rtype: afem.topology.entities.Shape
@@ -35,7 +42,85 @@ def mirror_shape(shape, pln):
     :raise RuntimeError: If the transformation fails or is not done.
     """
     trsf = gce_MakeMirror(pln.gp_pln).Value()
-    builder = BRepBuilderAPI_Transform(shape.object, trsf, True)
-    if not builder.IsDone():
-        raise RuntimeError('Failed to mirror the shape.')
-    return Shape.wrap(builder.Shape())
+    return transform_shape(shape, trsf, copy)
+
+
+def transform_shape(shape, trsf, copy=True):
+    """
+    Transform a shape.
+
+    :param afem.topology.entities.Shape shape: The shape.
+    :param OCCT.gp.gp_Trsf trsf: The transformation.
+    :param bool copy: Option to copy the geometry. If *False* then the new
+        shape is an instance of the original shape. It shares the same
+        underlying topology and geometry (i.e., it is a partner of the
+        original shape) and only stores the transformation in its location.
+        If the transformation is a reflection then the orientation of a shape
+        with faces is reversed so that its face normals still point outward.
+
+    :return: The transformed shape.
+    :rtype: afem.topology.entities.Shape
+
+    :raise ValueError: If an instance is requested for a transformation with
+        scaling.
+    :raise RuntimeError: If the transformation fails or is not done.
+    """
+    if copy:
+        builder = BRepBuilderAPI_Transform(shape.object, trsf, True)
+        if not builder.IsDone():
+            raise RuntimeError('Failed to transform the shape.')
+        return Shape.wrap(builder.Shape())
+
+    if abs(abs(trsf.ScaleFactor()) - 1.) > 1.0e-14:
+        raise ValueError('Instances do not support scaling.')
+
+    topods_shape = shape.object.Moved(TopLoc_Location(trsf))
+    if trsf.IsNegative() and shape.faces:
+        topods_shape.Reverse()
+    return Shape.wrap(topods_shape)
+
+
+def rigid_instance(shape, prototypes=None):
+    """
+    Convert an instance whose location is a reflection into a rigid
+    placement of a mirrored prototype. This is useful for exchange formats
+    like STEP that can only store rigid transformations for instances. The
+    mirrored prototype is a copy of the underlying shape mirrored about the
+    xz-plane. It is placed using the rigid transformation that results from
+    combining the reflection of the instance with that mirror.
+
+    :param afem.topology.entities.Shape shape: The shape.
+    :param dict prototypes: The mirrored prototypes by underlying shape. If
+        provided, it is used and updated so that all the reflected instances
+        of a shape share one mirrored prototype. Otherwise a new prototype is
+        created.
+
+    :return: The instance of the mirrored prototype if the location of the
+        shape is a reflection, otherwise the original shape.
+    :rtype: afem.topology.entities.Shape
+
+    :raise RuntimeError: If the transformation fails or is not done.
+    """
+    trsf = shape.object.Location().Transformation()
+    if not trsf.IsNegative():
+        return shape
+
+    # Undo the orientation change made when the instance was created
+    topods_shape = shape.object.Located(TopLoc_Location())
+    if shape.faces:
+        topods_shape.Reverse()
+    base = Shape.wrap(topods_shape)
+
+    mirror = gp_Trsf()
+    mirror.SetMirror(gp_Ax2(gp_Pnt(), gp_Dir(0., 1., 0.)))
+    prototype = None
+    if prototypes is not None:
+        prototype = prototypes.get(base)
+    if prototype is None:
+        prototype = transform_shape(base, mirror, True)
+        if prototypes is not None:
+            prototypes[base] = prototype
+
+    # The mirror is its own inverse
+    rigid = trsf.Multiplied(mirror)
+    return Shape.wrap(prototype.object.Moved(TopLoc_Location(rigid)))
@@ -0,0 +1,374 @@
+# This file is part of AFEM which provides an engineering toolkit for airframe
+# finite element modeling during conceptual design.
+#
+# Copyright (C) 2016-2018  Laughlin Research, LLC (info@laughlinresearch.com)
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+import ctypes
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+
+    has_resource = True
+except ImportError:
+    has_resource = False
+
+__all__ = ["MemorySampler", "PhaseTimer", "BenchmarkHistory"]
+
+_STATM = '/proc/self/statm'
+
+
+class _ProcessMemoryCounters(ctypes.Structure):
+    """
+    The PROCESS_MEMORY_COUNTERS structure of the Windows API.
+    """
+    _fields_ = [('cb', ctypes.c_ulong),
+                ('PageFaultCount', ctypes.c_ulong),
+                ('PeakWorkingSetSize', ctypes.c_size_t),
+                ('WorkingSetSize', ctypes.c_size_t),
+                ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                ('PagefileUsage', ctypes.c_size_t),
+                ('PeakPagefileUsage', ctypes.c_size_t)]
+
+
+def _win_memory_counters():
+    """
+    Memory counters of the process on Windows.
+
+    :return: The memory counters or *None* if not available.
+    :rtype: _ProcessMemoryCounters or None
+    """
+    if sys.platform != 'win32':
+        return None
+    try:
+        kernel32 = ctypes.WinDLL('kernel32')
+        psapi = ctypes.WinDLL('psapi')
+        kernel32.GetCurrentProcess.restype = ctypes.c_void_p
+        psapi.GetProcessMemoryInfo.argtypes = [
+            ctypes.c_void_p, ctypes.POINTER(_ProcessMemoryCounters),
+            ctypes.c_ulong]
+        counters = _ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        ok = psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(),
+                                        ctypes.byref(counters), counters.cb)
+    except (AttributeError, OSError):
+        return None
+    if not ok:
+        return None
+    return counters
+
+
+def _current_rss():
+    """
+    Current resident set size (working set on Windows) of the process in
+    bytes.
+
+    :return: The resident set size or *None* if not available.
+    :rtype: int or None
+    """
+    counters = _win_memory_counters()
+    if counters is not None:
+        return counters.WorkingSetSize
+    try:
+        with open(_STATM, 'r') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE')
+    except (IOError, OSError, ValueError, IndexError):
+        return None
+
+
+def _max_rss():
+    """
+    Peak resident set size (peak working set on Windows) of the process in
+    bytes since it started.
+
+    :return: The peak resident set size or *None* if not available.
+    :rtype: int or None
+    """
+    counters = _win_memory_counters()
+    if counters is not None:
+        return counters.PeakWorkingSetSize
+    if not has_resource:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    if sys.platform == 'darwin':
+        return rss
+    return rss * 1024
+
+
+class MemorySampler(object):
+    """
+    Sample the resident set size of the process in a background thread to
+    find the peak memory of a block of work. Most of the memory in AFEM is
+    allocated by OpenCASCADE and SMESH so Python level tracing (i.e.,
+    tracemalloc) would miss it.
+
+    :param float interval: The sampling interval in seconds.
+    """
+
+    def __init__(self, interval=0.01):
+        self._interval = float(interval)
+        self._peak = 0
+        self._start = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.is_set():
+            rss = _current_rss()
+            if rss is not None and rss > self._peak:
+                self._peak = rss
+            self._stop.wait(self._interval)
+
+    def start(self):
+        """
+        Start sampling.
+
+        :return: None.
+        """
+        self._stop.clear()
+        rss = _current_rss()
+        if rss is None:
+            rss = _max_rss() or 0
+        self._start = rss
+        self._peak = rss
+        self._thread = threading.Thread(target=self._sample)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop sampling.
+
+        :return: None.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        rss = _current_rss()
+        if rss is None:
+            # No /proc available so fall back to the process high water mark
+            rss = _max_rss() or 0
+        self._peak = max(self._peak, rss)
+
+    @property
+    def start_rss(self):
+        """
+        :return: The resident set size in bytes when sampling started.
+        :rtype: int
+        """
+        return self._start
+
+    @property
+    def peak_rss(self):
+        """
+        :return: The peak resident set size in bytes while sampling.
+        :rtype: int
+        """
+        return self._peak
+
+
+class PhaseTimer(object):
+    """
+    Record the wall time and peak memory of named phases.
+
+    Usage:
+
+    >>> timer = PhaseTimer()
+    >>> with timer.phase('create'):
+    ...     build_model()
+    >>> timer.results['create']['time']
+    """
+
+    def __init__(self, interval=0.01):
+        self._interval = interval
+        self._results = {}
+        self._order = []
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Context manager that records a phase.
+
+        :param str name: The phase name.
+        """
+        sampler = MemorySampler(self._interval)
+        sampler.start()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            dt = time.perf_counter() - t0
+            sampler.stop()
+            mb = 1024. * 1024.
+            self._results[name] = {
+                'time': dt,
+                'peak_rss_mb': sampler.peak_rss / mb,
+                'delta_rss_mb': (sampler.peak_rss - sampler.start_rss) / mb
+            }
+            if name not in self._order:
+                self._order.append(name)
+
+    @property
+    def phases(self):
+        """
+        :return: The phase names in the order they were recorded.
+        :rtype: list(str)
+        """
+        return list(self._order)
+
+    @property
+    def results(self):
+        """
+        :return: The results of each phase.
+        :rtype: dict
+        """
+        return dict(self._results)
+
+    @property
+    def total_time(self):
+        """
+        :return: The total time of all phases.
+        :rtype: float
+        """
+        return sum([r['time'] for r in self._results.values()])
+
+
+def _git_revision():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        out = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                      cwd=root, stderr=subprocess.STDOUT)
+        return out.decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _afem_version():
+    try:
+        import pkg_resources
+        return pkg_resources.get_distribution('afem').version
+    except Exception:
+        return None
+
+
+class BenchmarkHistory(object):
+    """
+    A JSON file of benchmark runs. Each run is appended as a record with
+    enough environment information to compare runs across versions.
+
+    :param str fn: The filename.
+    """
+
+    def __init__(self, fn):
+        self._fn = fn
+        self._records = []
+        if os.path.isfile(fn):
+            with open(fn, 'r') as f:
+                self._records = json.load(f)
+
+    @property
+    def records(self):
+        """
+        :return: The records.
+        :rtype: list(dict)
+        """
+        return list(self._records)
+
+    @staticmethod
+    def environment():
+        """
+        :return: Information about the current environment.
+        :rtype: dict
+        """
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'git_rev': _git_revision(),
+            'afem_version': _afem_version(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()
+        }
+
+    def append(self, model, size, timer, info=None):
+        """
+        Append a record.
+
+        :param str model: The model name.
+        :param dict size: The model size parameters.
+        :param PhaseTimer timer: The phase timer.
+        :param dict info: Other information to record (e.g., number of parts
+            or mesh nodes).
+
+        :return: The new record.
+        :rtype: dict
+        """
+        record = self.environment()
+        record['model'] = model
+        record['size'] = dict(size)
+        record['phases'] = [dict(name=name, **timer.results[name]) for
+                            name in timer.phases]
+        record['total_time'] = timer.total_time
+        record['info'] = dict(info) if info else {}
+        self._records.append(record)
+        return record
+
+    def save(self):
+        """
+        Write the history file.
+
+        :return: None.
+        """
+        with open(self._fn, 'w') as f:
+            json.dump(self._records, f, indent=2)
+
+    def scaling(self, model, phase, git_rev=None):
+        """
+        Get the scaling curve of a phase for a model.
+
+        :param str model: The model name.
+        :param str phase: The phase name.
+        :param str git_rev: Only use records of this revision. If not
+            provided the latest record of each size is used.
+
+        :return: List of (size, time, peak_rss_mb) sorted by size.
+        :rtype: list(tuple)
+        """
+        latest = {}
+        for record in self._records:
+            if record['model'] != model:
+                continue
+            if git_rev is not None and record['git_rev'] != git_rev:
+                continue
+            key = tuple(sorted(record['size'].items()))
+            for p in record['phases']:
+                if p['name'] == phase:
+                    latest[key] = (record['size'], p['time'],
+                                   p['peak_rss_mb'])
+        return [latest[k] for k in sorted(latest)]
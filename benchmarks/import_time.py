@@ -0,0 +1,177 @@
+# This file is part of AFEM which provides an engineering toolkit for airframe
+# finite element modeling during conceptual design.
+#
+# Copyright (C) 2016-2018  Laughlin Research, LLC (info@laughlinresearch.com)
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""
+Measure the time to import AFEM and check that importing has no side
+effects.
+
+Usage::
+
+    python -m benchmarks.import_time --max-time 0.5
+
+Each statement is run in a fresh process several times and the fastest time
+is reported along with the slowest modules it imported. The process exits
+with a non-zero status if a statement takes longer than *--max-time*
+seconds, writes a file, or changes the warning filters.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+__all__ = ["STATEMENTS", "time_import", "main"]
+
+#: The import statements to time.
+STATEMENTS = [
+    'import afem',
+    'import afem.config',
+    'import afem.structure',
+    'from afem.structure import Part',
+    'from afem.topology import *',
+    'from afem.structure import *'
+]
+
+# Run in the child process. Prints the time, the number of new warning
+# filters, and the names of the new modules as JSON on the last line.
+_CHILD = """
+import sys, time, warnings
+nfilters = len(warnings.filters)
+before = set(sys.modules)
+t0 = time.perf_counter()
+exec({0!r})
+dt = time.perf_counter() - t0
+new = sorted(set(sys.modules) - before)
+import json
+print(json.dumps([dt, len(warnings.filters) - nfilters, new]))
+"""
+
+
+def _parse_importtime(stderr):
+    """
+    Parse the output of ``-X importtime`` into a list of (cumulative time in
+    seconds, module name).
+    """
+    mods = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3:
+            continue
+        try:
+            cumulative = float(parts[1]) * 1.e-6
+        except ValueError:
+            continue
+        mods.append((cumulative, parts[2].strip()))
+    return mods
+
+
+def time_import(stmt, repeat=5, path=None):
+    """
+    Time an import statement in fresh processes.
+
+    :param str stmt: The statement.
+    :param int repeat: The number of processes to run.
+    :param str path: The working directory. If *None* then a temporary
+        directory is used.
+
+    :return: Dictionary with the fastest time ('time'), the number of
+        modules loaded ('nmodules'), the number of warning filters added
+        ('nfilters'), the files written to the working directory ('files'),
+        and the slowest modules as (time, name) pairs ('modules').
+    :rtype: dict
+    """
+    tmp = None
+    if path is None:
+        tmp = tempfile.mkdtemp(prefix='afem_import_')
+        path = tmp
+
+    env = dict(os.environ)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env['PYTHONPATH'] = os.pathsep.join(
+        [root] + [p for p in [env.get('PYTHONPATH')] if p])
+
+    cmd = [sys.executable, '-X', 'importtime', '-c', _CHILD.format(stmt)]
+    times = []
+    result = {}
+    try:
+        for _ in range(repeat):
+            proc = subprocess.run(cmd, cwd=path, env=env,
+                                  stdout=subprocess.PIPE,
+                                  stderr=subprocess.PIPE,
+                                  universal_newlines=True)
+            if proc.returncode != 0:
+                raise RuntimeError('Statement failed: {}\n{}'.format(
+                    stmt, proc.stderr))
+            dt, nfilters, new = json.loads(
+                proc.stdout.strip().splitlines()[-1])
+            times.append(dt)
+            if dt <= min(times):
+                new = set(new)
+                result['nfilters'] = nfilters
+                result['nmodules'] = len(new)
+                result['modules'] = [(t, name) for t, name in
+                                     _parse_importtime(proc.stderr) if
+                                     name in new]
+        result['time'] = min(times)
+        result['files'] = sorted(os.listdir(path))
+    finally:
+        if tmp is not None:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    result['modules'] = sorted(result['modules'], reverse=True)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--statements', nargs='+', default=STATEMENTS)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=5,
+                        help='Number of slowest modules to show.')
+    parser.add_argument('--max-time', type=float, default=None,
+                        help='Maximum import time in seconds.')
+    args = parser.parse_args(argv)
+
+    failed = False
+    for stmt in args.statements:
+        result = time_import(stmt, args.repeat)
+        print('{:<34s}{:>10.3f} s{:>8d} modules'.format(
+            stmt, result['time'], result['nmodules']))
+        for dt, name in result['modules'][:args.top]:
+            print('    {:<30s}{:>10.3f} s'.format(name, dt))
+
+        if args.max_time is not None and result['time'] > args.max_time:
+            print('    FAILED: slower than {} s'.format(args.max_time))
+            failed = True
+        if result['files']:
+            print('    FAILED: wrote {}'.format(', '.join(result['files'])))
+            failed = True
+        if result['nfilters']:
+            print('    FAILED: changed the warning filters')
+            failed = True
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+# This file is part of AFEM which provides an engineering toolkit for airframe
+# finite element modeling during conceptual design.
+#
+# Copyright (C) 2016-2018  Laughlin Research, LLC (info@laughlinresearch.com)
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+from math import cos, pi, sin
+
+from afem.geometry import (NurbsCurveByPoints, NurbsSurfaceByInterp,
+                           PlaneByAxes)
+from afem.oml import Body
+from afem.structure import (FloorByShape, FramesBetweenPlanesByNumber,
+                            GroupAPI, RibsAlongCurveByNumber, SkinByBody,
+                            SparByParameters, StringerByShape)
+from afem.topology import (CylinderByAxis, EdgeByPoints, FaceByDrag,
+                           FaceBySurface, SolidByDrag, SolidByPlane)
+
+__all__ = ["MODELS", "build_wingbox", "build_fuselage"]
+
+
+def build_wingbox(nribs=10, span=1000., root_chord=200., tip_chord=80.,
+                  sweep=150., thickness=20.):
+    """
+    Build a synthetic wing box. The wing is a straight tapered slab with a
+    planform reference surface at mid-thickness, a front and rear spar, and
+    ribs between the spars. The skin and internal structure are put in
+    separate groups named "skin" and "internal".
+
+    :param int nribs: The number of ribs.
+    :param float span: The semi-span.
+    :param float root_chord: The root chord.
+    :param float tip_chord: The tip chord.
+    :param float sweep: The leading edge offset of the tip.
+    :param float thickness: The wing thickness.
+
+    :return: Dictionary with the body and parts by type.
+    :rtype: dict
+    """
+    GroupAPI.reset()
+
+    def _planform(z):
+        c1 = NurbsCurveByPoints([(0., 0., z), (root_chord, 0., z)]).curve
+        c2 = NurbsCurveByPoints([(sweep, span, z),
+                                 (sweep + tip_chord, span, z)]).curve
+        srf = NurbsSurfaceByInterp([c1, c2], 1).surface
+        srf.set_udomain(0., 1.)
+        srf.set_vdomain(0., 1.)
+        return srf
+
+    # Solid slab and planform reference surface
+    face = FaceBySurface(_planform(-thickness / 2.)).face
+    solid = SolidByDrag(face, (0., 0., thickness)).solid
+    wing = Body(solid, 'Wing')
+    wing.set_sref(_planform(0.))
+
+    # Skin
+    GroupAPI.create_group('skin')
+    skin = SkinByBody('skin', wing).part
+
+    # Spars and ribs
+    GroupAPI.create_group('internal')
+    fspar = SparByParameters('front spar', 0.15, 0.02, 0.15, 0.98, wing).part
+    rspar = SparByParameters('rear spar', 0.65, 0.02, 0.65, 0.98, wing).part
+    ribs = RibsAlongCurveByNumber('rib', rspar.cref, nribs, fspar.shape,
+                                  rspar.shape, wing, d1=1., d2=-1.).parts
+
+    return {'body': wing, 'skin': [skin], 'spars': [fspar, rspar],
+            'ribs': ribs}
+
+
+def build_fuselage(nframes=10, nstringers=8, diameter=240., length=600.,
+                   frame_height=4., stringer_height=2., floor_yloc=-20.):
+    """
+    Build a synthetic constant section fuselage barrel with frames, a floor,
+    and stringers equally spaced around the circumference. The skin and
+    internal structure are put in separate groups named "skin" and
+    "internal".
+
+    :param int nframes: The number of frames.
+    :param int nstringers: The number of stringers.
+    :param float diameter: The fuselage diameter.
+    :param float length: The barrel length.
+    :param float frame_height: The frame height.
+    :param float stringer_height: The stringer height.
+    :param float floor_yloc: The y-location of the floor.
+
+    :return: Dictionary with the body and parts by type.
+    :rtype: dict
+    """
+    GroupAPI.reset()
+
+    radius = diameter / 2.
+    cylinder = CylinderByAxis(radius, length).solid
+    fuselage = Body(cylinder, 'Fuselage')
+
+    # Skin with open ends
+    GroupAPI.create_group('skin')
+    skin = SkinByBody('skin', fuselage).part
+    pln1 = PlaneByAxes(axes='xy').plane
+    skin.cut(SolidByPlane(pln1, 1e6, 1e6, -1e6).solid)
+    pln2 = PlaneByAxes((0., 0., length), 'xy').plane
+    skin.cut(SolidByPlane(pln2, 1e6, 1e6, 1e6).solid)
+
+    # Frames and floor
+    GroupAPI.create_group('internal')
+    frames = FramesBetweenPlanesByNumber('frame', pln1, pln2, nframes,
+                                         fuselage, frame_height).parts
+    pln = PlaneByAxes((0., floor_yloc, 0.), 'xz').plane
+    floor = FloorByShape('floor', pln, fuselage).part
+
+    # Stringers along half planes through the fuselage axis so each one
+    # intersects the skin along a single line
+    stringers = []
+    for i in range(nstringers):
+        angle = 2. * pi * (i + 0.5) / nstringers
+        p = (2. * radius * cos(angle), 2. * radius * sin(angle), 0.)
+        edge = EdgeByPoints((0., 0., 0.), p).edge
+        basis = FaceByDrag(edge, (0., 0., length)).face
+        name = ' '.join(['stringer', str(i + 1)])
+        stringer = StringerByShape(name, basis, skin.shape,
+                                   -stringer_height).part
+        stringers.append(stringer)
+
+    return {'body': fuselage, 'skin': [skin], 'frames': frames,
+            'floors': [floor], 'stringers': stringers}
+
+
+#: Available models by name. Each value is a tuple of the builder and the
+#: name of the size parameters used to scale it.
+MODELS = {
+    'wingbox': (build_wingbox, ('nribs',)),
+    'fuselage': (build_fuselage, ('nframes', 'nstringers'))
+}
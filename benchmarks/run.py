@@ -0,0 +1,178 @@
+# This file is part of AFEM which provides an engineering toolkit for airframe
+# finite element modeling during conceptual design.
+#
+# Copyright (C) 2016-2018  Laughlin Research, LLC (info@laughlinresearch.com)
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""
+Run the structure benchmarks and append the results to a JSON history.
+
+Usage::
+
+    python -m benchmarks.run --models wingbox fuselage --scales 1 2 4
+
+Each model and scale is run in a fresh process by default so the peak
+memory of one run does not leak into the next.
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from afem.exchange import StepWrite
+from afem.smesh import (MaxLength1D, MeshGen, NetgenAlgo2D, NetgenSimple2D,
+                        Regular1D)
+from afem.structure import (DiscardByCref, FuseGroups, FuseSurfacePartsByCref,
+                            GroupAPI, SurfacePart)
+
+from benchmarks.harness import BenchmarkHistory, PhaseTimer
+from benchmarks.models import MODELS
+
+__all__ = ["BASE_SIZES", "PHASES", "run_model", "main"]
+
+#: Model sizes at a scale of one. Each size parameter is multiplied by the
+#: scale.
+BASE_SIZES = {
+    'wingbox': {'nribs': 10},
+    'fuselage': {'nframes': 5, 'nstringers': 8}
+}
+
+#: The recorded phases in order.
+PHASES = ['create', 'fuse_cref', 'discard_cref', 'fuse_groups', 'mesh',
+          'export']
+
+
+def run_model(model, size, mesh_size=4., path=None, timer=None):
+    """
+    Build, join, mesh, and export a synthetic model while recording each
+    phase.
+
+    :param str model: The model name.
+    :param dict size: The size parameters passed to the model builder.
+    :param float mesh_size: The maximum element size.
+    :param str path: Directory for the exported files. If not provided a
+        temporary directory is used and removed afterwards.
+    :param benchmarks.harness.PhaseTimer timer: The phase timer. A new one
+        is created if not provided.
+
+    :return: The phase timer and a dictionary of model information.
+    :rtype: tuple(benchmarks.harness.PhaseTimer, dict)
+    """
+    builder = MODELS[model][0]
+    if timer is None:
+        timer = PhaseTimer()
+
+    with timer.phase('create'):
+        builder(**size)
+
+    skin_group = GroupAPI.get_group('skin')
+    internal_group = GroupAPI.get_group('internal')
+    internal = internal_group.get_parts(order=True)
+    cref_parts = [p for p in internal if
+                  isinstance(p, SurfacePart) and p.has_cref]
+
+    with timer.phase('fuse_cref'):
+        FuseSurfacePartsByCref(cref_parts)
+
+    with timer.phase('discard_cref'):
+        DiscardByCref(internal)
+
+    with timer.phase('fuse_groups'):
+        FuseGroups([skin_group, internal_group])
+
+    with timer.phase('mesh'):
+        shape = GroupAPI.prepare_shape_to_mesh()
+        gen = MeshGen()
+        mesh = gen.create_mesh(shape)
+        mesh.add_hypotheses([NetgenSimple2D(gen, mesh_size),
+                             NetgenAlgo2D(gen)])
+        mesh.add_hypotheses([MaxLength1D(gen, mesh_size), Regular1D(gen)])
+        is_meshed = gen.compute(mesh)
+
+    tmp = path is None
+    if tmp:
+        path = tempfile.mkdtemp(prefix='afem_bench_')
+    try:
+        with timer.phase('export'):
+            step = StepWrite()
+            step.transfer(GroupAPI.as_compound())
+            step.write(os.path.join(path, model + '.stp'))
+            mesh.export_unv(os.path.join(path, model + '.unv'))
+    finally:
+        if tmp:
+            shutil.rmtree(path, ignore_errors=True)
+
+    info = {
+        'nparts': len(GroupAPI.get_parts()),
+        'nfaces': len(shape.faces),
+        'is_meshed': bool(is_meshed),
+        'nnodes': mesh.num_nodes,
+        'nelements': mesh.num_faces
+    }
+    return timer, info
+
+
+def _scaled(model, scale):
+    return {k: int(v * scale) for k, v in BASE_SIZES[model].items()}
+
+
+def _print_record(record):
+    size = ', '.join(['{}={}'.format(k, v) for k, v in
+                      sorted(record['size'].items())])
+    print('{} ({})'.format(record['model'], size))
+    for p in record['phases']:
+        print('  {:<14s}{:>10.3f} s{:>10.1f} MB'.format(p['name'], p['time'],
+                                                     p['peak_rss_mb']))
+    print('  {:<14s}{:>10.3f} s'.format('total', record['total_time']))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--models', nargs='+', default=sorted(MODELS),
+                        choices=sorted(MODELS))
+    parser.add_argument('--scales', nargs='+', type=float,
+                        default=[1., 2., 4.])
+    parser.add_argument('--mesh-size', type=float, default=4.)
+    parser.add_argument('--history', default='bench_history.json',
+                        help='JSON file the results are appended to.')
+    parser.add_argument('--in-process', action='store_true',
+                        help='Run all cases in this process.')
+    args = parser.parse_args(argv)
+
+    for model in args.models:
+        for scale in args.scales:
+            if not args.in_process and len(args.models) * len(
+                    args.scales) > 1:
+                cmd = [sys.executable, '-m', 'benchmarks.run', '--models',
+                       model, '--scales', str(scale), '--mesh-size',
+                       str(args.mesh_size), '--history', args.history,
+                       '--in-process']
+                subprocess.check_call(cmd)
+                continue
+
+            size = _scaled(model, scale)
+            timer, info = run_model(model, size, args.mesh_size)
+
+            # Re-read the history in case another process wrote to it
+            history = BenchmarkHistory(args.history)
+            record = history.append(model, size, timer, info)
+            history.save()
+            _print_record(record)
+
+
+if __name__ == '__main__':
+    main()
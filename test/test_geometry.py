@@ -16,9 +16,15 @@
 # You should have received a copy of the GNU Lesser General Public
 # License along with this library; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+import random
 import unittest
 
+from numpy import array, full, isnan, linspace, zeros
+from numpy.linalg import solve
+
+from afem.adaptor import AdaptorCurve
 from afem.geometry import *
+from afem.geometry import utils as geom_utils
 
 
 class TestGeometryCreate(unittest.TestCase):
@@ -355,5 +361,303 @@ class TestGeometryCreate(unittest.TestCase):
         self.assertAlmostEqual(p.z, 5.)
 
 
+class TestGeometryArcLength(unittest.TestCase):
+    """
+    Test cases for arc-length tables.
+    """
+
+    def test_arc_length_table(self):
+        qp = [(0, 0, 0), (5, 5, 0), (10, 0, 0), (15, 2, 0)]
+        c = NurbsCurveByInterp(qp).curve
+        table = c.arc_length_table()
+        self.assertIs(table, c.arc_length_table())
+        self.assertAlmostEqual(table.length, c.length, places=6)
+
+        u = table.parameter_from(c.u1, 5.)
+        self.assertAlmostEqual(c.arc_length(c.u1, u), 5., places=6)
+        builder = PointFromParameter(c, c.u1, 5.)
+        self.assertAlmostEqual(builder.parameter, u)
+
+        prms = table.uniform_parameters(5)
+        for u1, u2 in zip(prms[:-1], prms[1:]):
+            self.assertAlmostEqual(c.arc_length(u1, u2), c.length / 4.,
+                                   places=6)
+
+        # Modifying the curve clears the table
+        c.segment(c.u1, u)
+        self.assertIsNot(table, c.arc_length_table())
+        self.assertAlmostEqual(c.arc_length_table().length, 5., places=6)
+
+    def test_array_queries(self):
+        circle = CircleByNormal((0., 0., 0.), (0., 0., 1.), 2.).circle
+        curves = [circle] + [srf.v_iso(0.3) for srf in
+                             TestGeometryUtils.surfaces()]
+        for c in curves:
+            table = c.arc_length_table()
+            u = linspace(c.u1, c.u2, 7)
+            d = table.distance(u)
+            for ui, di in zip(u, d):
+                self.assertAlmostEqual(di, c.arc_length(c.u1, ui), places=6)
+            prms = table.parameter(d)
+            for ui, uj in zip(u, prms):
+                self.assertAlmostEqual(ui, uj, places=6)
+
+            # Values outside the bounds
+            self.assertTrue(all(isnan(table.distance([c.u1 - 1., c.u2 + 1.]))))
+            self.assertTrue(isnan(table.parameter(2. * table.length)))
+
+    def test_unbounded(self):
+        line = LineByPoints((0., 0., 0.), (10., 0., 0.)).line
+        self.assertIsNone(line.arc_length_table())
+
+    def test_shared_wrappers(self):
+        qp = [(0, 0, 0), (5, 5, 0), (10, 0, 0)]
+        c = NurbsCurveByInterp(qp).curve
+        table = c.arc_length_table()
+        c2 = Curve.wrap(c.object)
+        self.assertIs(table, c2.arc_length_table())
+
+        # Modifying the curve through another wrapper clears the table
+        length = c.length
+        c2.scale(Point(), 2.)
+        self.assertIsNot(table, c.arc_length_table())
+        self.assertAlmostEqual(c.length, 2. * length, places=6)
+
+    def test_trimmed_basis(self):
+        qp = [(0, 0, 0), (5, 5, 0), (10, 0, 0)]
+        c = NurbsCurveByInterp(qp).curve
+        t = TrimmedCurve.by_parameters(c)
+        length = t.length
+        table = t.arc_length_table()
+        adp_crv = AdaptorCurve.to_adaptor(t)
+
+        # Modifying the basis curve clears the data of the trimmed curve
+        t.basis_curve.scale(Point(), 2.)
+        self.assertAlmostEqual(t.length, 2. * length, places=6)
+        self.assertIsNot(table, t.arc_length_table())
+        self.assertAlmostEqual(t.arc_length_table().length, 2. * length,
+                               places=6)
+        self.assertIsNot(adp_crv, AdaptorCurve.to_adaptor(t))
+        self.assertAlmostEqual(Curve.wrap(t.object).length, 2. * length,
+                               places=6)
+
+
+class TestGeometryAdaptor(unittest.TestCase):
+    """
+    Test cases for adaptors.
+    """
+
+    def test_adaptor_cache(self):
+        qp = [(0, 0, 0), (5, 5, 0), (10, 0, 0)]
+        c = NurbsCurveByInterp(qp).curve
+        adp_crv = AdaptorCurve.to_adaptor(c)
+        self.assertIs(adp_crv, AdaptorCurve.to_adaptor(c))
+
+        # Modifying the curve clears the adaptor
+        c.translate((0., 0., 1.))
+        adp_crv2 = AdaptorCurve.to_adaptor(c)
+        self.assertIsNot(adp_crv, adp_crv2)
+        self.assertAlmostEqual(adp_crv2.eval(c.u1).z, 1.)
+
+
+class TestGeometryProject(unittest.TestCase):
+    """
+    Test cases for geometry projections.
+    """
+
+    def test_project_points_to_curve(self):
+        line = LineByVector(Point(), Direction(1., 0., 0.)).line
+        pnts = [(float(i), 1., 0.) for i in range(10)]
+        proj = ProjectPointsToCurve(pnts, line)
+        self.assertTrue(proj.success)
+        self.assertEqual(proj.npts, 10)
+        for i in range(10):
+            self.assertAlmostEqual(proj.parameters[i], float(i))
+            self.assertAlmostEqual(proj.distances[i], 1.)
+            self.assertAlmostEqual(proj.points[i][1], 0.)
+
+    def test_project_points_to_surface(self):
+        c1 = NurbsCurveByPoints([(0., 0., 0.), (10., 0., 0.)]).curve
+        c2 = NurbsCurveByPoints([(0., 5., 5.), (10., 5., 5.)]).curve
+        c3 = NurbsCurveByPoints([(0., 10., 0.), (10., 10., 0.)]).curve
+        s = NurbsSurfaceByApprox([c1, c2, c3]).surface
+        pnts = [(float(i), 5., 6.) for i in range(11)]
+        proj = ProjectPointsToSurface(pnts, s)
+        self.assertTrue(proj.success)
+        for i in range(11):
+            p = ProjectPointToSurface(pnts[i], s).nearest_point
+            self.assertAlmostEqual(proj.points[i][0], p.x)
+            self.assertAlmostEqual(proj.points[i][1], p.y)
+            self.assertAlmostEqual(proj.points[i][2], p.z)
+
+    def test_project_shuffled_points(self):
+        c1 = NurbsCurveByPoints([(0., 0., 0.), (10., 0., 0.)]).curve
+        c2 = NurbsCurveByPoints([(0., 5., 5.), (10., 5., 5.)]).curve
+        c3 = NurbsCurveByPoints([(0., 10., 0.), (10., 10., 0.)]).curve
+        s = NurbsSurfaceByApprox([c1, c2, c3]).surface
+        rng = random.Random(0)
+        pnts = []
+        for _ in range(25):
+            u = s.u1 + rng.uniform(0.1, 0.9) * (s.u2 - s.u1)
+            v = s.v1 + rng.uniform(0.1, 0.9) * (s.v2 - s.v1)
+            p = s.eval(u, v)
+            pnts.append((p.x, p.y, p.z + rng.uniform(-2., 2.)))
+
+        for warm_start in [False, True]:
+            proj = ProjectPointsToSurface(pnts, s, warm_start)
+            self.assertTrue(proj.success)
+            for i in range(len(pnts)):
+                d = ProjectPointToSurface(pnts[i], s).dmin
+                self.assertAlmostEqual(proj.distances[i], d)
+
+        crv = NurbsCurveByInterp([(0., 0., 0.), (5., 5., 0.), (10., 0., 0.),
+                                  (5., -5., 0.), (1., -1., 0.)]).curve
+        pnts = []
+        for _ in range(25):
+            u = crv.u1 + rng.uniform(0.1, 0.9) * (crv.u2 - crv.u1)
+            p = crv.eval(u)
+            pnts.append((p.x, p.y, rng.uniform(-2., 2.)))
+
+        for warm_start in [False, True]:
+            proj = ProjectPointsToCurve(pnts, crv, warm_start)
+            self.assertTrue(proj.success)
+            for i in range(len(pnts)):
+                d = ProjectPointToCurve(pnts[i], crv).dmin
+                self.assertAlmostEqual(proj.distances[i], d)
+
+
+class TestGeometryUtils(unittest.TestCase):
+
+    @staticmethod
+    def surfaces():
+        cp = [[(0., 0., 0.), (0., 5., 1.), (0., 10., 0.), (0., 15., 2.)],
+              [(5., 0., 1.), (5., 5., 3.), (5., 10., 2.), (5., 15., 1.)],
+              [(10., 0., 0.), (10., 5., 2.), (10., 10., 4.), (10., 15., 0.)],
+              [(15., 0., 2.), (15., 5., 1.), (15., 10., 0.), (15., 15., 1.)],
+              [(20., 0., 0.), (20., 5., 0.), (20., 10., 1.), (20., 15., 0.)]]
+        uknots = [0., 0.4, 1.]
+        umult = [4, 1, 4]
+        vknots = [0., 1.]
+        vmult = [3, 3]
+        s1 = NurbsSurface.by_data(cp, uknots, vknots, umult, vmult, 3, 2)
+
+        w = [[1., 2., 0.5, 1.],
+             [1.5, 1., 1., 0.8],
+             [1., 3., 1., 1.],
+             [0.7, 1., 2., 1.],
+             [1., 1., 1.2, 1.]]
+        s2 = NurbsSurface.by_data(cp, uknots, vknots, umult, vmult, 3, 2, w)
+
+        # Rational surface modified in place
+        s3 = s1.copy()
+        s3.set_cp(3, 2, Point(10., 5., 5.), 2.5)
+        return s1, s2, s3
+
+    @staticmethod
+    def params(s):
+        u = [s.u1, 0.1, 0.4, 0.75, s.u2]
+        v = [s.v1, 0.3, 0.5, 0.9, s.v2]
+        uu, vv = [], []
+        for ui in u:
+            for vi in v:
+                uu.append(ui)
+                vv.append(vi)
+        return array(uu), array(vv)
+
+    def test_basis_funs_array(self):
+        s = self.surfaces()[0]
+        u = array([s.u1, 0.2, 0.4, 0.6, s.u2])
+        spans = geom_utils.find_spans(s.n - 1, s.p, u, s.uk)
+        self.assertTrue(all(s.p <= spans) and all(spans <= s.n - 1))
+        bf = geom_utils.basis_funs_array(spans, u, s.p, s.uk)
+        self.assertEqual(bf.shape, (5, s.p + 1))
+        for row in bf:
+            self.assertAlmostEqual(row.sum(), 1.)
+        ders = geom_utils.basis_ders_array(spans, u, s.p, s.uk)
+        self.assertEqual(ders.shape, (5, s.p + 1))
+        for row in ders:
+            self.assertAlmostEqual(row.sum(), 0.)
+
+    def test_surface_points_array(self):
+        for s in self.surfaces():
+            u, v = self.params(s)
+            pnts, su, sv = geom_utils.surface_points_array(
+                s.p, s.q, s.uk, s.vk, s.cpw, u, v, True)
+            self.assertEqual(pnts.shape, (u.size, 3))
+            for i in range(u.size):
+                p = s.eval(u[i], v[i])
+                du = s.deriv(u[i], v[i], 1, 0)
+                dv = s.deriv(u[i], v[i], 0, 1)
+                for j in range(3):
+                    self.assertAlmostEqual(pnts[i, j], p.xyz[j])
+                    self.assertAlmostEqual(su[i, j], du.xyz[j])
+                    self.assertAlmostEqual(sv[i, j], dv.xyz[j])
+
+    def test_curve_points_array(self):
+        for s in self.surfaces():
+            c = s.v_iso(0.3)
+            u = array([c.u1, 0.1, 0.4, 0.75, c.u2])
+            pnts, cu = geom_utils.curve_points_array(c.p, c.uk, c.cpw, u,
+                                                     True)
+            self.assertEqual(pnts.shape, (u.size, 3))
+            for i in range(u.size):
+                p = c.eval(u[i])
+                du = c.deriv(u[i], 1)
+                for j in range(3):
+                    self.assertAlmostEqual(pnts[i, j], p.xyz[j])
+                    self.assertAlmostEqual(cu[i, j], du.xyz[j])
+
+    def test_iso_curve_points(self):
+        for s in self.surfaces():
+            v = linspace(s.v1, s.v2, 7)
+            for u in [s.u1, 0.25, 0.4, 0.7, s.u2]:
+                c0 = s.u_iso(u)
+                pnts = geom_utils.surface_points_array(
+                    s.p, s.q, s.uk, s.vk, s.cpw, full(v.size, u), v)
+                for i in range(v.size):
+                    p = c0.eval(v[i])
+                    for j in range(3):
+                        self.assertAlmostEqual(pnts[i, j], p.xyz[j])
+
+    def test_global_interp_array(self):
+        rng = random.Random(0)
+        q = 3
+        u = array([0., 0.1, 0.35, 0.5, 0.8, 1.])
+        m = u.size - 1
+        uk = array([0.] * (q + 1) + [0.3, 0.55] + [1.] * (q + 1))
+        qp = array([[[rng.uniform(-5., 5.) for _ in range(4)]
+                     for _ in range(3)] for _ in range(m + 1)])
+        cp = geom_utils.global_interp_array(qp, u, q, uk)
+        self.assertEqual(cp.shape, qp.shape)
+
+        # Solve each set of points independently
+        a = zeros((m + 1, m + 1))
+        for i in range(m + 1):
+            span = geom_utils.find_span(m, q, u[i], uk)
+            a[i, span - q:span + 1] = geom_utils.basis_funs(span, u[i], q, uk)
+        for k in range(qp.shape[1]):
+            cp_k = solve(a, qp[:, k, :])
+            for i in range(m + 1):
+                for j in range(4):
+                    self.assertAlmostEqual(cp[i, k, j], cp_k[i, j])
+
+    def test_surface_by_interp_rational(self):
+        crvs = []
+        for i, z in enumerate([0., 2., 5., 6., 9.]):
+            cp = [(0., 0., z), (2., 3. + i, z), (6., 2., z), (9., -i, z)]
+            w = [1., 1.5 + 0.2 * i, 0.7, 1.]
+            c = NurbsCurve.by_data(cp, [0., 1.], [4, 4], 3, w)
+            crvs.append(c)
+        s = NurbsSurfaceByInterp(crvs, 3).surface
+
+        # Each section lies on the surface
+        for c in crvs:
+            for u in linspace(c.u1, c.u2, 7):
+                p = c.eval(u)
+                proj = ProjectPointToSurface(p, s)
+                self.assertTrue(proj.success)
+                self.assertAlmostEqual(proj.dmin, 0., places=6)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,137 @@
+# This file is part of AFEM which provides an engineering toolkit for airframe
+# finite element modeling during conceptual design.
+#
+# Copyright (C) 2016-2018  Laughlin Research, LLC (info@laughlinresearch.com)
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+import os
+import shutil
+import tempfile
+import unittest
+
+from afem.geometry import *
+from afem.graphics.display import Viewer
+from afem.graphics.render import OffscreenRenderer, _submesh_ids
+from afem.smesh import *
+from afem.structure import *
+from afem.topology import *
+
+
+class TestGraphicsRender(unittest.TestCase):
+    """
+    Test cases for offscreen rendering.
+    """
+
+    def setUp(self):
+        pln1 = PlaneByAxes((0., 0., 0.), 'xy').plane
+        f1 = FaceByPlane(pln1, -1., 1., -1., 1.).face
+        self.part1 = SurfacePart('plate1', f1)
+        pln2 = PlaneByAxes((0., 0., 0.), 'xz').plane
+        f2 = FaceByPlane(pln2, -1., 1., -1., 1.).face
+        self.part2 = SurfacePart('plate2', f2)
+        self.part1.fuse(self.part2)
+
+        shape = GroupAPI.prepare_shape_to_mesh()
+        self.gen = MeshGen()
+        self.mesh = self.gen.create_mesh(shape)
+        self.mesh.add_hypotheses([NetgenAlgo2D(self.gen),
+                                  NetgenSimple2D(self.gen, 0.25)])
+        self.assertTrue(self.gen.compute(self.mesh))
+
+    def tearDown(self):
+        GroupAPI.reset()
+
+    def test_submesh_ids(self):
+        face = self.part1.faces[0]
+        sub_mesh = self.mesh.get_submesh(face)
+        nids, eids = _submesh_ids(sub_mesh.object)
+
+        elms = list(self.mesh.ds.mesh_elements(face).elm_iter)
+        self.assertEqual(eids, set(elm.id for elm in elms))
+        for elm in elms:
+            self.assertTrue(set(elm.nids) <= nids)
+
+        # Elements of other faces are excluded
+        for other in self.part1.faces[1:] + self.part2.faces:
+            for elm in self.mesh.ds.mesh_elements(other).elm_iter:
+                self.assertNotIn(elm.id, eids)
+        self.assertLess(len(nids), self.mesh.num_nodes)
+
+    @unittest.skipUnless(os.environ.get('DISPLAY'), 'requires a display')
+    def test_render_submesh(self):
+        try:
+            r = OffscreenRenderer(200, 150)
+        except NotImplementedError:
+            self.skipTest('offscreen rendering not available')
+
+        tmp = tempfile.mkdtemp()
+        try:
+            fn1 = os.path.join(tmp, 'mesh.png')
+            fn2 = os.path.join(tmp, 'submesh.png')
+            self.assertTrue(r.render(self.mesh, fn1))
+            sub_mesh = self.mesh.get_submesh(self.part1.faces[0])
+            self.assertTrue(r.render(sub_mesh, fn2))
+            with open(fn1, 'rb') as f1, open(fn2, 'rb') as f2:
+                self.assertNotEqual(f1.read(), f2.read())
+        finally:
+            shutil.rmtree(tmp)
+
+
+@unittest.skipUnless(os.environ.get('DISPLAY'), 'requires a display')
+class TestGraphicsDisplay(unittest.TestCase):
+    """
+    Test cases for displaying parts in the viewer.
+    """
+
+    def setUp(self):
+        pln = PlaneByAxes((0., 0., 0.), 'xy').plane
+        f1 = FaceByPlane(pln, 0., 1., 0., 1.).face
+        self.part1 = SurfacePart('plate1', f1)
+        f2 = FaceByPlane(pln, 2., 3., 0., 1.).face
+        self.part2 = SurfacePart('plate2', f2)
+        self.part2.set_transparency(0.5)
+        f3 = FaceByPlane(pln, 4., 5., 0., 1.).face
+        self.part3 = SurfacePart('plate3', f3)
+
+    def tearDown(self):
+        GroupAPI.reset()
+
+    def test_display_parts_merged(self):
+        v = Viewer()
+        parts = [self.part1, self.part2, self.part3]
+        ais_shapes = v.display_parts_merged(parts)
+        # One presentation per transparency
+        self.assertEqual(len(ais_shapes), 2)
+        for part in parts:
+            self.assertIs(v.part_by_id(part.id), part)
+        self.assertIsNone(v.part_by_id(-1))
+        self.assertEqual(v.selected_parts, [])
+
+    def test_find_parts(self):
+        v = Viewer()
+        v.display_parts_merged([self.part3, self.part1])
+        faces = self.part3.faces + self.part1.faces + self.part2.faces
+        self.assertEqual(v.find_parts(faces), [self.part1, self.part3])
+
+    def test_clear(self):
+        v = Viewer()
+        v.display_parts_merged([self.part1, self.part2])
+        v.clear()
+        self.assertIsNone(v.part_by_id(self.part1.id))
+        self.assertEqual(v.find_parts(self.part1.faces), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
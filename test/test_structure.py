@@ -16,11 +16,24 @@
 # You should have received a copy of the GNU Lesser General Public
 # License along with this library; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+import os
+import shutil
+import tempfile
 import unittest
+from math import pi
 
+from OCCT.BRep import BRep_Builder
+from numpy import linspace
+
+from afem.base.cache import ShapeCache
 from afem.exchange import brep
+from afem.exchange.nastran import export_bdf
+from afem.fem.materials import Isotropic
+from afem.fem.properties import Shell
+from afem.misc.profiler import Profiler
 from afem.geometry import *
 from afem.oml import *
+from afem.smesh import *
 from afem.structure import *
 from afem.topology import *
 
@@ -70,6 +83,11 @@ class TestStructureEntities(unittest.TestCase):
         f = FaceByPlane(pln, -100, 100, -100, 100).face
         self.assertIsNone(self.null_rib.set_shape(f))
 
+    def test_part_shape_revision(self):
+        rev = self.fspar.shape_revision
+        self.fspar.set_shape(self.fspar.shape)
+        self.assertEqual(self.fspar.shape_revision, rev + 1)
+
     def test_part_is_null(self):
         self.assertFalse(self.fspar.is_null)
         self.assertTrue(self.null_rib.is_null)
@@ -116,6 +134,108 @@ class TestStructureEntities(unittest.TestCase):
             self.assertIsInstance(f, Face)
         self.assertIsInstance(self.fspar.face_compound, Compound)
 
+    def test_hole_axes(self):
+        axes = self.rspar.hole_axes(3)
+        self.assertEqual(len(axes), 3)
+        pln = self.rspar.sref
+        for ax1 in axes:
+            self.assertTrue(ax1.IsParallel(pln.axis, 1.0e-6))
+            self.assertLess(pln.distance(ax1.origin), 1.0e-3)
+
+    def test_part_mirrored(self):
+        pln = PlaneByAxes((0., 0., 0.), 'xz').plane
+        part = self.fspar.mirrored(pln, 'fspar copy')
+        self.assertIsInstance(part, Spar)
+        self.assertFalse(part.shape.is_partner(self.fspar.shape))
+
+        part = self.fspar.mirrored(pln, 'fspar instance', True)
+        self.assertIsInstance(part, Spar)
+        self.assertTrue(part.shape.is_partner(self.fspar.shape))
+        self.assertAlmostEqual(part.p1.y, -self.fspar.p1.y, places=3)
+        self.assertTrue(part.has_sref)
+        self.assertIsNot(part.sref, self.fspar.sref)
+        p1 = self.fspar.sref.eval(0., 0.)
+        p2 = part.sref.eval(0., 0.)
+        self.assertAlmostEqual(p2.y, -p1.y, places=6)
+
+    def test_body_mirrored(self):
+        pln = PlaneByAxes((0., 0., 0.), 'xz').plane
+        body = self.wing.mirrored(pln, 'lhs wing', True)
+        self.assertTrue(body.shape.is_partner(self.wing.shape))
+        self.assertTrue(body.sref_shape.is_partner(self.wing.sref_shape))
+        p1 = self.wing.eval(0.5, 0.5)
+        p2 = body.eval(0.5, 0.5)
+        self.assertAlmostEqual(p2.x, p1.x, places=6)
+        self.assertAlmostEqual(p2.y, -p1.y, places=6)
+
+        body = self.wing.mirrored(pln, 'lhs wing copy')
+        self.assertFalse(body.shape.is_partner(self.wing.shape))
+        self.assertAlmostEqual(body.eval(0.5, 0.5).y, -p1.y, places=6)
+
+    def test_body_norm_array(self):
+        sref = self.wing.sref
+        u = linspace(sref.u1, sref.u2, 5)
+        v = linspace(sref.v1, sref.v2, 5)
+        vecs = self.wing.norm_array(u, v)
+        for i in range(5):
+            n = self.wing.norm(u[i], v[i]).xyz
+            delta = 1.0e-8 * max(1., max(abs(x) for x in n))
+            for j in range(3):
+                self.assertAlmostEqual(vecs[i, j], n[j], delta=delta)
+
+    def test_body_invert_array(self):
+        sref = self.wing.sref
+        u = linspace(sref.u1, sref.u2, 7)[1:-1]
+        v = linspace(sref.v1, sref.v2, 7)[1:-1][::-1]
+
+        # Points on the surface and off the surface along the normal
+        pnts = self.wing.eval_array(u, v)
+        vecs = self.wing.norm_array(u, v)
+        for i in range(vecs.shape[0]):
+            vecs[i] /= sum(vecs[i] ** 2) ** 0.5
+        for offset in [0., 1.]:
+            uv = self.wing.invert_array(pnts + offset * vecs)
+            for i in range(u.size):
+                p = pnts[i] + offset * vecs[i]
+                proj = ProjectPointToSurface(p, sref)
+                self.assertTrue(proj.success)
+                ui, vi = proj.nearest_param
+                self.assertAlmostEqual(uv[i, 0], ui, places=5)
+                self.assertAlmostEqual(uv[i, 1], vi, places=5)
+                self.assertAlmostEqual(uv[i, 0], u[i], places=5)
+                self.assertAlmostEqual(uv[i, 1], v[i], places=5)
+
+        # Points beyond the boundary are clamped to it
+        vm = 0.5 * (sref.v1 + sref.v2)
+        p = sref.eval(sref.u2, vm).xyz
+        d = sref.deriv(sref.u2, vm, 1, 0)
+        p = [p[j] + 0.1 * d.xyz[j] for j in range(3)]
+        uv = self.wing.invert_array([p])
+        self.assertAlmostEqual(uv[0, 0], sref.u2, places=10)
+        self.assertTrue(sref.v1 <= uv[0, 1] <= sref.v2)
+
+    def test_body_sref_cache(self):
+        body = Body(self.wing.shape, 'wing copy')
+        sref = self.wing.sref.copy()
+        self.assertIsInstance(sref, NurbsSurface)
+        body.set_sref(sref)
+
+        def check():
+            u = [sref.u1, 0.5 * (sref.u1 + sref.u2), sref.u2]
+            v = [sref.v1, 0.5 * (sref.v1 + sref.v2), sref.v2]
+            pnts = body.eval_array(u, v)
+            for i in range(3):
+                p = sref.eval(u[i], v[i])
+                for j in range(3):
+                    self.assertAlmostEqual(pnts[i, j], p.xyz[j], places=6)
+
+        check()
+        cp = sref.cp[1, 1]
+        sref.set_cp(2, 2, Point(cp[0], cp[1], cp[2] + 10.), 2.)
+        check()
+        sref.set_udomain(0., 2.)
+        check()
+
 
 class TestStructureCreate(unittest.TestCase):
 
@@ -132,6 +252,31 @@ class TestStructureCreate(unittest.TestCase):
     def tearDown(self):
         GroupAPI.reset()
 
+    def test_profile_builders(self):
+        Profiler.enable()
+        try:
+            fspar = SparByParameters('fspar', 0.15, 0.15, 0.15, 0.5,
+                                     self.wing).part
+            rspar = SparByParameters('rspar', 0.65, 0.15, 0.65, 0.5,
+                                     self.wing).part
+            root = RibByPoints('root', fspar.p1, rspar.p1, self.wing).part
+            tip = RibByPoints('tip', fspar.p2, rspar.p2, self.wing).part
+            p1 = root.point_on_cref(0.5 * (root.cref.u1 + root.cref.u2))
+            p2 = tip.point_on_cref(0.5 * (tip.cref.u1 + tip.cref.u2))
+            curve = NurbsCurveByPoints([p1, p2]).curve
+            RibsAlongCurveByNumber('rib', curve, 3, fspar, rspar, self.wing)
+            events = [e for e in Profiler.events() if e['cat'] == 'builder']
+        finally:
+            Profiler.disable()
+            Profiler.reset()
+
+        # Base class constructors are not recorded
+        ops = [e['op'] for e in events]
+        self.assertEqual(ops.count('SparByParameters'), 2)
+        self.assertEqual(ops.count('RibsAlongCurveByNumber'), 1)
+        self.assertNotIn('SurfacePartByParameters', ops)
+        self.assertNotIn('SurfacePartsAlongCurveByNumber', ops)
+
     def test_curve_part_by_shape(self):
         e = EdgeByPoints((0., 0., 0.), (10., 0., 0.)).edge
         builder = CurvePartByShape('part', e)
@@ -441,5 +586,558 @@ class TestStructureCreate(unittest.TestCase):
         self.assertIsInstance(skin, Skin)
 
 
+class TestStructureMass(unittest.TestCase):
+
+    def tearDown(self):
+        GroupAPI.reset()
+        MassProps.clear_cache()
+
+    def test_mass_props(self):
+        mat = Isotropic('mat', 1., 1., 0.3, 10.)
+        prop = Shell('shell', 0.1, mat)
+
+        pln1 = PlaneByAxes((0., 0., 0.), 'xy').plane
+        f1 = FaceByPlane(pln1, 0., 1., 0., 1.).face
+        part1 = SurfacePart('plate1', f1)
+        part1.set_prop(prop)
+
+        pln2 = PlaneByAxes((0., 0., 2.), 'xy').plane
+        f2 = FaceByPlane(pln2, 0., 1., 0., 1.).face
+        part2 = SurfacePart('plate2', f2)
+        part2.set_prop(prop)
+
+        props = MassProps()
+        self.assertAlmostEqual(props.mass, 2.)
+        self.assertAlmostEqual(props.cg[2], 1.)
+        self.assertAlmostEqual(props.part_props(part1)[0], 1.)
+        self.assertEqual(len(props.skipped_parts), 0)
+
+        # Parallel axis theorem about the combined cg at z = 1
+        ixx, iyy, izz = props.inertia.diagonal()
+        self.assertAlmostEqual(ixx, 2. * (1. / 12. + 1.))
+        self.assertAlmostEqual(iyy, 2. * (1. / 12. + 1.))
+        self.assertAlmostEqual(izz, 2. / 6.)
+
+    def test_mass_props_plate(self):
+        mat = Isotropic('mat', 1., 1., 0.3, 10.)
+        prop = Shell('shell', 0.1, mat)
+
+        pln = PlaneByAxes((0., 0., 0.), 'xy').plane
+        f = FaceByPlane(pln, 0., 2., 0., 1.).face
+        part = SurfacePart('plate', f)
+        part.set_prop(prop)
+
+        # Thin 2 x 1 plate with unit mass per area
+        props = MassProps()
+        self.assertAlmostEqual(props.mass, 2.)
+        for x, y in zip(props.cg, [1., 0.5, 0.]):
+            self.assertAlmostEqual(x, y)
+        expected = [[2. / 12., 0., 0.],
+                    [0., 2. * 4. / 12., 0.],
+                    [0., 0., 2. * 5. / 12.]]
+        for row1, row2 in zip(props.inertia, expected):
+            for x, y in zip(row1, row2):
+                self.assertAlmostEqual(x, y)
+
+    def test_mass_props_invalidate(self):
+        mat = Isotropic('mat', 1., 1., 0.3, 10.)
+        prop = Shell('shell', 0.1, mat)
+
+        pln = PlaneByAxes((0., 0., 0.), 'xy').plane
+        f = FaceByPlane(pln, 0., 1., 0., 1.).face
+        part = SurfacePart('plate', f)
+        part.set_prop(prop)
+
+        props = MassProps()
+        self.assertAlmostEqual(props.mass, 1.)
+        self.assertAlmostEqual(props.cg[0], 0.5)
+
+        # New shape
+        f = FaceByPlane(pln, 0., 2., 0., 1.).face
+        part.set_shape(f)
+        props = MassProps()
+        self.assertAlmostEqual(props.mass, 2.)
+        self.assertAlmostEqual(props.cg[0], 1.)
+        self.assertAlmostEqual(props.inertia[1, 1], 2. * 4. / 12.)
+
+        # Same shape set again after an in-place modification
+        part.set_shape(part.shape)
+        props = MassProps()
+        self.assertAlmostEqual(props.mass, 2.)
+
+        # New property
+        part.set_prop(Shell('shell2', 0.2, mat))
+        props = MassProps()
+        self.assertAlmostEqual(props.mass, 4.)
+        self.assertAlmostEqual(props.inertia[1, 1], 4. * 4. / 12.)
+
+
+class TestStructureJoin(unittest.TestCase):
+
+    def tearDown(self):
+        GroupAPI.reset()
+
+    def test_fuse_groups_hierarchical(self):
+        g1 = GroupAPI.create_group('group 1')
+        pln1 = PlaneByAxes((0., 0., 0.), 'xy').plane
+        f1 = FaceByPlane(pln1, -1., 1., -1., 1.).face
+        part1 = SurfacePart('plate1', f1)
+
+        g2 = GroupAPI.create_group('group 2')
+        pln2 = PlaneByAxes((0., 0., 0.), 'xz').plane
+        f2 = FaceByPlane(pln2, -1., 1., -1., 1.).face
+        part2 = SurfacePart('plate2', f2)
+        pln3 = PlaneByAxes((10., 0., 0.), 'yz').plane
+        f3 = FaceByPlane(pln3, -1., 1., -1., 1.).face
+        part3 = SurfacePart('plate3', f3)
+
+        fuse = FuseGroups([g1, g2], hierarchical=True)
+        self.assertTrue(fuse.is_done)
+        self.assertEqual(fuse.nbops, 1)
+        self.assertEqual(fuse.ninterface, 2)
+        self.assertEqual(len(part1.shared_edges(part2)), 1)
+        self.assertEqual(len(part3.faces), 1)
+
+
+class TestStructureModify(unittest.TestCase):
+
+    def tearDown(self):
+        GroupAPI.reset()
+
+    @staticmethod
+    def plate(name, y, x1, x2):
+        pln = PlaneByAxes((0., y, 0.), 'xz').plane
+        face = FaceByPlane(pln, x1, x2, 0., 2.).face
+        cref = NurbsCurveByPoints([(x1, y, 1.), (x2, y, 1.)]).curve
+        return SurfacePart(name, face, cref, pln)
+
+    def test_cut_holes_adjacent(self):
+        # The second plate lies within the hole cylinder of the first plate
+        # and the other way around
+        part1 = self.plate('plate1', 0., 0., 10.)
+        part2 = self.plate('plate2', 0.25, 4., 12.)
+        cut = CutHoles([part1, part2], 1, 1.)
+        self.assertTrue(cut.is_done)
+        self.assertEqual(cut.nholes(part1), 1)
+        self.assertEqual(cut.nholes(part2), 1)
+
+        hole = pi * 0.5 ** 2
+        self.assertAlmostEqual(part1.area, 20. - hole, places=6)
+        self.assertAlmostEqual(part2.area, 16. - hole, places=6)
+
+
+class TestStructureCheck(unittest.TestCase):
+
+    def tearDown(self):
+        GroupAPI.reset()
+
+    def test_check_group_fix(self):
+        pln1 = PlaneByAxes((0., 0., 0.), 'xy').plane
+        f1 = FaceByPlane(pln1, -1., 1., -1., 1.).face
+        part1 = SurfacePart('plate1', f1)
+        pln2 = PlaneByAxes((0., 0., 0.), 'xz').plane
+        f2 = FaceByPlane(pln2, -1., 1., -1., 1.).face
+        part2 = SurfacePart('plate2', f2)
+        self.assertTrue(part1.fuse(part2))
+        f3 = FaceByPlane(pln1, 2., 3., -1., 1.).face
+        part3 = SurfacePart('plate3', f3)
+        shape3 = part3.shape
+
+        # Move a corner vertex of plate1 away from its edges
+        for v in part1.shape.vertices:
+            p = v.point
+            if p.x > 0.5 and p.y > 0.5:
+                BRep_Builder().UpdateVertex(v.object, Point(1., 1., 0.01),
+                                            1.0e-7)
+                break
+        part1.shape.invalidate()
+
+        check = CheckGroup()
+        self.assertFalse(check.is_valid)
+        self.assertEqual(check.invalid_parts, [part1])
+
+        check = CheckGroup(fix=True, max_tol=0.1)
+        self.assertTrue(check.is_valid)
+        self.assertIn(part1, check.fixed_parts)
+        self.assertGreater(check.fix_time, 0.)
+        self.assertEqual(len(part1.shared_edges(part2)), 1)
+        # Valid parts that share nothing with invalid parts are untouched
+        self.assertNotIn(part3, check.fixed_parts)
+        self.assertIs(part3.shape, shape3)
+
+
+class TestStructureMesh(unittest.TestCase):
+
+    def tearDown(self):
+        GroupAPI.reset()
+
+    @staticmethod
+    def fused_plates():
+        pln1 = PlaneByAxes((0., 0., 0.), 'xy').plane
+        f1 = FaceByPlane(pln1, -1., 1., -1., 1.).face
+        part1 = SurfacePart('plate1', f1)
+        pln2 = PlaneByAxes((0., 0., 0.), 'xz').plane
+        f2 = FaceByPlane(pln2, -1., 1., -1., 1.).face
+        part2 = SurfacePart('plate2', f2)
+        part1.fuse(part2)
+        return part1, part2
+
+    @staticmethod
+    def face_nodes(mesh, part):
+        pnts = set()
+        for face in part.faces:
+            for elm in mesh.ds.mesh_elements(face).elm_iter:
+                for n in elm.node_iter:
+                    pnts.add(tuple(round(x, 8) for x in n.xyz))
+        return pnts
+
+    def test_incremental_mesh(self):
+        part1, part2 = self.fused_plates()
+        edge = part1.shared_edges(part2)[0]
+        gen = MeshGen()
+
+        def assign(mesh):
+            mesh.add_hypotheses([NetgenAlgo2D(gen),
+                                 NetgenSimple2D(gen, 0.2)])
+
+        tool = IncrementalMesh(gen, assign)
+        self.assertTrue(tool.compute())
+        self.assertEqual(tool.nkept, 0)
+        mesh = tool.mesh
+        nodes2 = self.face_nodes(mesh, part2)
+        nedge = mesh.ds.mesh_elements(edge).num_nodes
+        self.assertGreater(len(nodes2), 0)
+
+        # Nothing changed
+        self.assertTrue(tool.compute())
+        self.assertIs(tool.mesh, mesh)
+
+        # Cut a hole in the first plate
+        ax1 = Axis1(Point(0.5, 0.5, 0.1), Direction(0., 0., 1.))
+        part1.set_shape(CutCylindricalHole(part1.shape, 0.2, ax1).shape)
+        self.assertEqual(tool.changed_parts, [part1])
+        self.assertEqual(len(part1.shared_edges(part2)), 1)
+
+        self.assertTrue(tool.compute())
+        self.assertIsNot(tool.mesh, mesh)
+        self.assertEqual(tool.nkept, len(part2.faces))
+        self.assertEqual(tool.nmeshed, len(part1.faces))
+
+        # The second plate and shared edge are copied, not re-meshed
+        mesh = tool.mesh
+        self.assertEqual(self.face_nodes(mesh, part2), nodes2)
+        self.assertEqual(mesh.ds.mesh_elements(edge).num_nodes, nedge)
+        for face in part1.faces:
+            self.assertGreater(mesh.ds.mesh_elements(face).num_elms, 0)
+
+    def mesh_plates(self):
+        part1, part2 = self.fused_plates()
+        shape = GroupAPI.prepare_shape_to_mesh()
+        gen = MeshGen()
+        mesh = gen.create_mesh(shape)
+        mesh.add_hypotheses([NetgenAlgo2D(gen), NetgenSimple2D(gen, 0.2)])
+        self.assertTrue(gen.compute(mesh))
+        return gen, mesh, part1, part2
+
+    @staticmethod
+    def bandwidth(mesh):
+        ds = mesh.ds
+        bw = 0
+        for elm in ds.faces_iter:
+            nids = [ds.mapped_node_id(nid) for nid in elm.nids]
+            bw = max(bw, max(nids) - min(nids))
+        return bw
+
+    def test_renumber_nodes(self):
+        gen, mesh, part1, part2 = self.mesh_plates()
+        ds = mesh.ds
+        nids = sorted(n.id for n in ds.node_iter)
+        order = ds.compute_node_ordering('rcm')
+        self.assertEqual(sorted(order.tolist()), nids)
+        self.assertEqual(ds.compute_node_ordering('natural').tolist(), nids)
+        self.assertRaises(ValueError, ds.compute_node_ordering, 'amd')
+
+        bw = self.bandwidth(mesh)
+        ds.renumber_nodes(method='rcm')
+        self.assertEqual(sorted(ds.node_id_map.values()),
+                         list(range(1, len(nids) + 1)))
+        self.assertEqual(ds.mapped_node_id(order[0]), 1)
+        self.assertLessEqual(self.bandwidth(mesh), bw)
+
+        # Clearing or computing the mesh resets the maps
+        mesh.clear()
+        self.assertIsNone(ds.node_id_map)
+        self.assertTrue(gen.compute(mesh))
+        ds.renumber_nodes(method='rcm')
+        self.assertTrue(gen.compute(mesh))
+        self.assertIsNone(ds.node_id_map)
+
+    def test_renumber_elements(self):
+        gen, mesh, part1, part2 = self.mesh_plates()
+        ds = mesh.ds
+        self.assertRaises(ValueError, ds.renumber_elements, 1, 1,
+                          [(part1, 1), (part2, 2)])
+
+        ds.renumber_elements(ranges=[(part1, 1001), (part2, 2001)])
+        for part, first_id in [(part1, 1001), (part2, 2001)]:
+            for face in part.faces:
+                for elm in ds.mesh_elements(face).elm_iter:
+                    eid = ds.mapped_elm_id(elm.id)
+                    self.assertTrue(first_id <= eid < first_id + 1000)
+        self.assertEqual(len(set(ds.elm_id_map.values())),
+                         len(ds.elm_id_map))
+
+        mesh.clear_submesh(part1.shape)
+        self.assertIsNone(ds.elm_id_map)
+
+    def test_export_bdf(self):
+        gen, mesh, part1, part2 = self.mesh_plates()
+        ds = mesh.ds
+        ds.renumber_nodes(101, method='rcm')
+        ds.renumber_elements(ranges=[(part1, 1001), (part2, 2001)])
+
+        fn = os.path.join(tempfile.mkdtemp(), 'plates.bdf')
+        try:
+            self.assertTrue(export_bdf(mesh, fn))
+            grids, elms = [], {}
+            with open(fn, 'r') as fin:
+                for line in fin:
+                    card = line[:8].strip()
+                    if card == 'GRID':
+                        grids.append(int(line[8:16]))
+                    elif card in ['CTRIA3', 'CQUAD4']:
+                        nids = [int(line[i:i + 8]) for i in
+                                range(24, len(line.rstrip()), 8)]
+                        elms[int(line[8:16])] = nids
+        finally:
+            shutil.rmtree(os.path.dirname(fn))
+
+        self.assertEqual(grids, list(range(101, 101 + ds.num_nodes)))
+        self.assertEqual(len(elms), mesh.num_faces)
+        for elm in ds.faces_iter:
+            nids = [ds.mapped_node_id(nid) for nid in elm.nids]
+            self.assertEqual(elms[ds.mapped_elm_id(elm.id)], nids)
+
+    @staticmethod
+    def face_types(mesh, part):
+        types = set()
+        for face in part.faces:
+            for elm in mesh.ds.mesh_elements(face).elm_iter:
+                types.add('quad' if elm.is_quad else 'tri')
+        return types
+
+    def test_mesh_rules(self):
+        part1, part2 = self.fused_plates()
+        faces1 = set(part1.faces)
+        shape = GroupAPI.prepare_shape_to_mesh()
+        gen = MeshGen()
+
+        rules = MeshRules()
+        rules.add_rule([QuadrangleAlgo2D(gen), QuadrangleHypo2D(gen)],
+                       predicate=lambda f: f in faces1)
+        rules.add_rule([NetgenAlgoOnly2D(gen), NetgenHypo2D(gen, 0.25),
+                        Regular1D(gen), LocalLength1D(gen, 0.25)])
+        self.assertEqual(rules.nrules, 2)
+        self.assertRaises(ValueError, rules.add_rule, [], shape_type='solid')
+
+        # The first rule selects the faces of the first plate for both
+        # checks. The 2-D hypotheses of the second rule only apply to the
+        # remaining faces while its 1-D hypotheses apply to all faces.
+        mesh = gen.create_mesh(shape)
+        nfaces = len(part1.faces) + len(part2.faces)
+        self.assertEqual(rules.apply(mesh), [len(faces1), nfaces])
+        self.assertEqual(rules.ncached, 2 * nfaces)
+        self.assertTrue(gen.compute(mesh))
+        self.assertEqual(self.face_types(mesh, part1), {'quad'})
+        self.assertEqual(self.face_types(mesh, part2), {'tri'})
+
+        # Applying the rules again uses the cached checks
+        mesh = gen.create_mesh(shape)
+        self.assertEqual(rules.apply(mesh, nthreads=2),
+                         [len(faces1), nfaces])
+        self.assertEqual(rules.ncached, 2 * nfaces)
+        self.assertTrue(gen.compute(mesh))
+        self.assertEqual(self.face_types(mesh, part1), {'quad'})
+
+        # Cached checks of faces that are no longer used are dropped
+        pln = PlaneByAxes((0., 0., 5.), 'xy').plane
+        part2.set_shape(FaceByPlane(pln, 0., 1., 0., 1.).face)
+        mesh = gen.create_mesh(GroupAPI.prepare_shape_to_mesh())
+        nfaces = len(part1.faces) + 1
+        self.assertEqual(rules.apply(mesh), [len(faces1), nfaces])
+        self.assertEqual(rules.ncached, 2 * nfaces)
+
+        rules.clear_cache()
+        self.assertEqual(rules.ncached, 0)
+
+    def test_mesh_rules_order(self):
+        part1, part2 = self.fused_plates()
+        faces1 = set(part1.faces)
+        shape = GroupAPI.prepare_shape_to_mesh()
+        gen = MeshGen()
+
+        # A general rule added first takes precedence
+        rules = MeshRules()
+        rules.add_rule([NetgenAlgoOnly2D(gen), NetgenHypo2D(gen, 0.25),
+                        Regular1D(gen), LocalLength1D(gen, 0.25)])
+        rules.add_rule([QuadrangleAlgo2D(gen), QuadrangleHypo2D(gen)],
+                       predicate=lambda f: f in faces1)
+
+        mesh = gen.create_mesh(shape)
+        nfaces = len(part1.faces) + len(part2.faces)
+        self.assertEqual(rules.apply(mesh), [nfaces, len(faces1)])
+        self.assertTrue(gen.compute(mesh))
+        self.assertEqual(self.face_types(mesh, part1), {'tri'})
+        self.assertEqual(self.face_types(mesh, part2), {'tri'})
+
+
+class TestStructureArchive(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        GroupAPI.reset()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    @staticmethod
+    def build_model():
+        GroupAPI.create_group('plates')
+        pln = PlaneByAxes((0., 0., 0.), 'xy').plane
+        f1 = FaceByPlane(pln, 0., 1., 0., 1.).face
+        part1 = SurfacePart('plate1', f1)
+        part1.metadata.set('thickness', 0.1)
+        f2 = FaceByPlane(pln, 2., 3., 0., 1.).face
+        SurfacePart('plate2', f2)
+
+    def test_archive(self):
+        for fn in ['model', 'model.zip']:
+            GroupAPI.reset()
+            self.build_model()
+            ModelArchive(os.path.join(self.tmp, fn)).write()
+
+            GroupAPI.reset()
+            archive = ModelArchive(os.path.join(self.tmp, fn))
+            self.assertEqual(sorted(archive.part_names),
+                             ['plate1', 'plate2'])
+            parts = archive.read(names=['plate1'])
+            self.assertEqual(len(parts), 1)
+
+            part = GroupAPI.get_group('plates').get_part('plate1')
+            self.assertFalse(part.is_loaded)
+            self.assertEqual(len(part.faces), 1)
+            self.assertTrue(part.is_loaded)
+            self.assertAlmostEqual(part.metadata['thickness'], 0.1)
+
+    def test_archive_shared_edges(self):
+        for fn in ['fused', 'fused.zip']:
+            GroupAPI.reset()
+            pln1 = PlaneByAxes((0., 0., 0.), 'xy').plane
+            f1 = FaceByPlane(pln1, -1., 1., -1., 1.).face
+            part1 = SurfacePart('plate1', f1)
+            pln2 = PlaneByAxes((0., 0., 0.), 'xz').plane
+            f2 = FaceByPlane(pln2, -1., 1., -1., 1.).face
+            part2 = SurfacePart('plate2', f2)
+            self.assertTrue(part1.fuse(part2))
+            self.assertEqual(len(part1.shared_edges(part2)), 1)
+            ModelArchive(os.path.join(self.tmp, fn)).write()
+
+            GroupAPI.reset()
+            archive = ModelArchive(os.path.join(self.tmp, fn))
+            entries = archive.manifest['parts']
+            self.assertNotEqual(entries[0]['shape'], entries[1]['shape'])
+
+            # Each part is loaded by itself
+            part1, part2 = archive.read(lazy=True)
+            part1.load_shape()
+            self.assertTrue(part1.is_loaded)
+            self.assertFalse(part2.is_loaded)
+            self.assertEqual(len(part1.shared_edges(part2)), 1)
+            for part in [part1, part2]:
+                self.assertTrue(CheckShape(part.shape).is_valid)
+            # A loaded shape would no longer share the edge
+            self.assertFalse(part1.unload())
+
+            GroupAPI.reset()
+            part1, part2 = archive.read(lazy=False)
+            self.assertEqual(len(part1.shared_edges(part2)), 1)
+
+    def test_archive_overwrite(self):
+        self.build_model()
+        path = os.path.join(self.tmp, 'other')
+        os.makedirs(path)
+        with open(os.path.join(path, 'data.txt'), 'w') as f:
+            f.write('data')
+        archive = ModelArchive(path)
+        self.assertRaises(ValueError, archive.write)
+        self.assertTrue(os.path.isfile(os.path.join(path, 'data.txt')))
+
+        archive.write(overwrite=True)
+        self.assertFalse(os.path.isfile(os.path.join(path, 'data.txt')))
+
+        # A previous archive is replaced
+        ModelArchive(path).write()
+
+    def test_unload(self):
+        self.build_model()
+        ShapeCache.set_spill_dir(self.tmp)
+        group = GroupAPI.get_group('plates')
+        self.assertEqual(group.unload(), 2)
+        part = group.get_part('plate1')
+        self.assertFalse(part.is_loaded)
+        self.assertEqual(group.preload(), 2)
+        self.assertTrue(part.is_loaded)
+        self.assertEqual(len(part.faces), 1)
+
+        ShapeCache.set_budget(1)
+        try:
+            # Shapes are not evicted unless allowed
+            for part in group.get_parts():
+                self.assertEqual(len(part.faces), 1)
+            self.assertEqual(ShapeCache.nloaded(), 0)
+
+            group.set_evictable()
+            for part in group.get_parts():
+                self.assertEqual(len(part.faces), 1)
+            self.assertEqual(ShapeCache.nloaded(), 1)
+        finally:
+            ShapeCache.set_budget(None)
+            ShapeCache.set_spill_dir(None)
+
+    def test_unload_modified(self):
+        self.build_model()
+        ShapeCache.set_spill_dir(self.tmp)
+        try:
+            part = GroupAPI.get_group('plates').get_part('plate1')
+            self.assertTrue(part.unload())
+            FixShape.set_tolerance(part.shape, 0.01)
+            self.assertTrue(part.unload())
+            self.assertAlmostEqual(part.shape.tol_max, 0.01)
+        finally:
+            ShapeCache.set_spill_dir(None)
+
+    def test_evictable(self):
+        self.build_model()
+        group = GroupAPI.get_group('plates')
+        part1, part2 = group.get_parts(order=True)
+        pln = PlaneByAxes((0., 0., 0.), 'xz').plane
+        f3 = FaceByPlane(pln, -1., 4., -1., 1.).face
+        part3 = SurfacePart('plate3', f3)
+        self.assertTrue(part1.fuse(part2, part3))
+        self.assertRaises(ValueError, group.set_evictable)
+        self.assertFalse(part1.is_evictable)
+
+        GroupAPI.prepare_shape_to_mesh()
+        self.assertTrue(part3.is_pinned)
+        self.assertFalse(part3.unload())
+
+        GroupAPI.unpin()
+        self.assertFalse(part3.is_pinned)
+        # Parts sharing sub-shapes are not unloaded
+        self.assertFalse(part3.unload())
+        self.assertEqual(group.unload(), 0)
+        self.assertTrue(part1.is_loaded)
+
+
 if __name__ == '__main__':
     unittest.main()
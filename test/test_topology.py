@@ -16,12 +16,19 @@
 # You should have received a copy of the GNU Lesser General Public
 # License along with this library; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+import os
+import shutil
+import tempfile
 import unittest
 
+from afem.base.cache import PropertyCache
 from afem.exchange import brep
-from afem.geometry import Point
+from afem.exchange.xde import XdeDocument
+from afem.geometry import PlaneByAxes, PlaneByNormal, Point
 from afem.graphics import Viewer
+from afem.misc.profiler import Profiler
 from afem.topology import *
+from afem.topology.transform import mirror_shape, rigid_instance
 
 
 def show_shapes(*shapes):
@@ -181,6 +188,229 @@ class TestTopologyBop(unittest.TestCase):
         self.assertEqual(len(section.edges), 1)
         self.assertEqual(len(section.vertices), 2)
 
+    def test_auto_options(self):
+        box1 = BoxBy2Points((0., 0., 0.), (10., 10., 10.)).solid
+        box2 = BoxBy2Points((10., 0., 0.), (20., 10., 10.)).solid
+        box3 = BoxBy2Points((5., 5., 5.), (15., 15., 15.)).solid
+
+        # Boxes sharing a face can be glued
+        options = BopAlgo.auto_options([box1], [box2])
+        self.assertEqual(options['glue'], 'shift')
+
+        # Overlapping boxes cannot
+        options = BopAlgo.auto_options([box1], [box3])
+        self.assertEqual(options['glue'], 'off')
+
+        fuse = FuseShapes(box1, box2, parallel='auto', use_obb='auto',
+                          glue='auto')
+        self.assertTrue(fuse.is_done)
+        self.assertEqual(len(fuse.shape.solids), 1)
+
+
+class TestTopologySection(unittest.TestCase):
+    """
+    Test cases for sectioning shapes at many planes.
+    """
+
+    def test_parallel_planes(self):
+        box = BoxBySize(10., 10., 10.).solid
+        planes = [PlaneByAxes((x, 0., 0.), 'yz').plane for x in (2., 5., 20.)]
+        builder = SectionBodyAtPlanes(box, planes)
+        self.assertTrue(builder.is_single_pass)
+        self.assertEqual(builder.nstations, 3)
+        self.assertEqual(builder.nwires(0), 1)
+        self.assertEqual(builder.nwires(1), 1)
+        self.assertEqual(builder.nwires(2), 0)
+        self.assertAlmostEqual(builder.wires(0)[0].length, 40.)
+
+    def test_arbitrary_planes(self):
+        box = BoxBySize(10., 10., 10.).solid
+        planes = [PlaneByAxes((5., 0., 0.), 'yz').plane,
+                  PlaneByNormal((5., 5., 5.), (0., 0., 1.)).plane]
+        builder = SectionBodyAtPlanes(box, planes, nthreads=2)
+        self.assertFalse(builder.is_single_pass)
+        self.assertEqual(builder.nwires(0), 1)
+        self.assertEqual(builder.nwires(1), 1)
+        self.assertAlmostEqual(builder.wires(1)[0].length, 40.)
+
+
+class TestTopologyCheck(unittest.TestCase):
+    """
+    Test cases for shape checks.
+    """
+
+    def test_classify_points(self):
+        box = BoxBySize(10., 10., 10.).solid
+        tool = ClassifyPointInSolid(box)
+        pnts = [(5., 5., 5.), (20., 5., 5.), (0., 5., 5.), (5., 5., 9.)]
+        codes = tool.classify_points(pnts)
+        self.assertListEqual(list(codes), [0, 1, 2, 0])
+
+        codes = tool.classify_points(pnts * 10, nthreads=2, chunk_size=1)
+        self.assertListEqual(list(codes), [0, 1, 2, 0] * 10)
+
+
+class TestTopologyPropertyCache(unittest.TestCase):
+    """
+    Test cases for memoized shape properties.
+    """
+
+    def test_memoized_area(self):
+        PropertyCache.reset_stats()
+        box = BoxBySize(10., 10., 10.).solid
+        self.assertAlmostEqual(box.area, 600.)
+        self.assertAlmostEqual(box.area, 600.)
+        self.assertEqual(PropertyCache.stats()['Shape.area'], (1, 1))
+
+        box.invalidate()
+        self.assertAlmostEqual(box.area, 600.)
+        self.assertEqual(PropertyCache.stats()['Shape.area'], (1, 2))
+
+    def test_memoized_tolerance(self):
+        box = BoxBySize(10., 10., 10.).solid
+        tol = box.tol_max
+        FixShape.set_tolerance(box, 0.01)
+        self.assertGreater(box.tol_max, tol)
+
+    def test_memoized_tolerance_bop(self):
+        box1 = BoxBySize(10., 10., 10.).solid
+        box2 = BoxBy2Points((5., 5., 5.), (15., 15., 15.)).solid
+        box3 = BoxBy2Points((20., 0., 0.), (30., 10., 10.)).solid
+        for box in [box1, box3]:
+            self.assertGreater(box.tol_max, 0.)
+        PropertyCache.reset_stats()
+
+        # Only the arguments of the operation are invalidated
+        self.assertTrue(FuseShapes(box1, box2).is_done)
+        box1.tol_max
+        box3.tol_max
+        self.assertEqual(PropertyCache.stats()['Shape.tol_max'], (1, 1))
+
+
+class TestTopologyTessellate(unittest.TestCase):
+    """
+    Test cases for shape tessellation.
+    """
+
+    def test_tessellate_and_skip(self):
+        box = BoxBySize(10., 10., 10.).solid
+        tool = TessellateShapes(box, 0.1)
+        self.assertTrue(tool.is_done)
+        self.assertEqual(tool.ntessellated, 1)
+        self.assertTrue(TessellateShapes.is_tessellated(box, 0.1))
+
+        # Already fine enough
+        tool = TessellateShapes(box, 0.5)
+        self.assertEqual(tool.nskipped, 1)
+        self.assertEqual(tool.ntessellated, 0)
+
+        # Finer deflection requires a new triangulation
+        tool = TessellateShapes(box, 0.01)
+        self.assertEqual(tool.ntessellated, 1)
+
+    def test_tessellate_instances(self):
+        box = BoxBySize(10., 10., 10.).solid
+        pln = PlaneByAxes((0., 0., 0.), 'yz').plane
+        box2 = mirror_shape(box, pln, False)
+        tool = TessellateShapes([box, box2], 0.1)
+        self.assertEqual(tool.ntessellated, 1)
+        self.assertEqual(tool.nskipped, 1)
+        self.assertTrue(TessellateShapes.is_tessellated(box2, 0.1))
+
+
+class TestTopologyTransform(unittest.TestCase):
+    """
+    Test cases for shape transformations.
+    """
+
+    def test_mirror_instance(self):
+        box = BoxBySize(10., 10., 10.).solid
+        pln = PlaneByAxes((0., 0., 0.), 'yz').plane
+        box2 = mirror_shape(box, pln, False)
+        self.assertTrue(box2.is_partner(box))
+        self.assertAlmostEqual(box2.volume, 1000.)
+        bbox = BBox()
+        bbox.add_shape(box2)
+        self.assertAlmostEqual(bbox.xmin, -10., places=5)
+
+        prototypes = {}
+        box3 = rigid_instance(box2, prototypes)
+        self.assertFalse(box3.is_partner(box))
+        self.assertFalse(box3.object.Location().Transformation().IsNegative())
+        self.assertAlmostEqual(box3.volume, 1000.)
+        bbox = BBox()
+        bbox.add_shape(box3)
+        self.assertAlmostEqual(bbox.xmin, -10., places=5)
+
+        # Reflected instances share one mirrored prototype
+        pln = PlaneByAxes((0., 0., 20.), 'xy').plane
+        box4 = rigid_instance(mirror_shape(box, pln, False), prototypes)
+        self.assertTrue(box4.is_partner(box3))
+        self.assertEqual(len(prototypes), 1)
+        bbox = BBox()
+        bbox.add_shape(box4)
+        self.assertAlmostEqual(bbox.zmin, 30., places=5)
+
+    def test_xde_assembly(self):
+        box = BoxBySize(10., 10., 10.).solid
+        pln = PlaneByAxes((0., 0., 0.), 'yz').plane
+        box2 = mirror_shape(box, pln, False)
+        pln = PlaneByAxes((0., 0., 20.), 'xy').plane
+        box3 = mirror_shape(box, pln, False)
+
+        doc = XdeDocument()
+        assy = doc.new_assembly('assembly')
+        self.assertEqual(assy.name, 'assembly')
+        label1 = doc.add_component(assy, box, 'box1')
+        label2 = doc.add_component(assy, box2, 'box2')
+        label3 = doc.add_component(assy, box3, 'box3')
+        self.assertEqual(assy.nb_children, 3)
+        self.assertEqual(label2.name, 'box2')
+        self.assertTrue(label1.shape.is_partner(box))
+        self.assertTrue(label2.shape.is_partner(label3.shape))
+        self.assertFalse(label2.shape.is_partner(box))
+
+        # The assembly, the box, and one mirrored prototype
+        self.assertEqual(len(doc.get_shapes()), 3)
+
+        tmp = tempfile.mkdtemp()
+        try:
+            fn = os.path.join(tmp, 'assembly.stp')
+            self.assertTrue(doc.write_step(fn))
+            with open(fn, 'r') as f:
+                self.assertEqual(f.read().count('MANIFOLD_SOLID_BREP'), 2)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+class TestTopologyProfiler(unittest.TestCase):
+    """
+    Test cases for profiling topology operations.
+    """
+
+    def tearDown(self):
+        Profiler.disable()
+        Profiler.reset()
+
+    def test_profile_bop(self):
+        box1 = BoxBySize(10., 10., 10.).solid
+        box2 = BoxBy2Points((5., 5., 5.), (15., 15., 15.)).solid
+
+        FuseShapes(box1, box2)
+        self.assertEqual(len(Profiler.events()), 0)
+
+        Profiler.enable()
+        FuseShapes(box1, box2)
+        events = Profiler.events()
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]['op'], 'FuseShapes')
+        self.assertEqual(events[0]['args']['args_nfaces'], 6)
+        self.assertEqual(events[0]['args']['tools_nfaces'], 6)
+
+        rows = Profiler.summary('cat')
+        self.assertEqual(rows[0]['count'], 1)
+        self.assertIn('traceEvents', Profiler.chrome_trace())
+
 
 if __name__ == '__main__':
     unittest.main()